@@ -0,0 +1,370 @@
+"""End-to-end benchmark of the agent graph with a per-phase timing breakdown.
+
+Drives the real graph (`ainvoke` or `astream`) offline: the chat model is a
+scripted fake that calls MCP tools a fixed number of times and then answers,
+and the tools come from the fake MCP server of `react_agent.fake_servers`
+(stdio or SSE). Every phase the graph goes through on each step is timed:
+
+- `config_load`: reading the MCP configuration (`load_mcp_servers`)
+- `mcp_startup`: getting the MCP tools (`mcp_pool.get_tools`, a pool hit when warm)
+- `model_construction`: `load_chat_model`
+- `agent_compilation`: getting the compiled nested agent (`get_agent`)
+- `llm_call` / `tool_call`: one fake model request / one MCP tool call
+- `checkpoint_write`: one checkpoint or pending-writes write
+- `run`: one complete `ainvoke`/`astream`
+
+p50/p95/p99 per phase are printed and written to a JSON file that records the
+commit and the parameters, so results can be compared across commits with
+`--compare`. With `--cold`, the MCP pool and the model and agent caches are
+cleared before every run.
+
+Usage:
+    python benchmarks/bench_e2e.py [--runs 50] [--warmup 3] [--graph-mode nested]
+        [--transport stdio] [--tool-calls 2] [--llm-latency 0.0] [--tool-latency 0.0]
+        [--payload-size 500] [--stream] [--cold] [--output benchmarks/results/e2e.json]
+        [--compare previous.json]
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import mcp_pool
+from react_agent.fake_servers import BackgroundServer, FakeBehavior, create_mcp_server
+
+graph_module = importlib.import_module("react_agent.graph")
+
+PHASES = [
+    "config_load",
+    "mcp_startup",
+    "model_construction",
+    "agent_compilation",
+    "llm_call",
+    "tool_call",
+    "checkpoint_write",
+    "run",
+]
+
+
+class PhaseTimer:
+    """Collects durations (in seconds) per phase."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.samples[phase].append(seconds)
+
+    def wrap(self, func: Callable[..., Any], phase: str) -> Callable[..., Any]:
+        """Return `func` (sync or async) timed under `phase`."""
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - started)
+
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - started)
+
+        return timed
+
+    def instrument(self, obj: Any, name: str, phase: str) -> None:
+        setattr(obj, name, self.wrap(getattr(obj, name), phase))
+
+
+class BenchModel(BaseChatModel):
+    """Calls `fake_read` `tool_calls` times, then answers with the last result's size."""
+
+    tool_calls: int = 2
+    latency: float = 0.0
+    timer: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "BenchModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        # 마지막 사용자 메시지 이후의 도구 결과 수로 몇 번째 단계인지 판단합니다.
+        done = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            done += isinstance(message, ToolMessage)
+        if done < self.tool_calls:
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "fake_read",
+                        "args": {"path": f"file-{done}.txt"},
+                        "id": f"call-{done}",
+                    }
+                ],
+            )
+        else:
+            message = AIMessage(
+                content=f"read {done} files ({len(str(messages[-1].content))} chars)"
+            )
+        self.timer.add("llm_call", time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (0 < q <= 100)."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for phase in PHASES:
+        values = samples.get(phase)
+        if not values:
+            continue
+        summary[phase] = {
+            "count": len(values),
+            "mean_ms": 1000 * sum(values) / len(values),
+            "p50_ms": 1000 * percentile(values, 50),
+            "p95_ms": 1000 * percentile(values, 95),
+            "p99_ms": 1000 * percentile(values, 99),
+            "max_ms": 1000 * max(values),
+        }
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def mcp_config(args: argparse.Namespace, sse_url: str | None) -> Dict[str, Any]:
+    if args.transport == "sse":
+        return {"mcpServers": {"fake": {"url": sse_url, "transport": "sse"}}}
+    return {
+        "mcpServers": {
+            "fake": {
+                "command": sys.executable,
+                "args": [
+                    "-m",
+                    "react_agent.fake_servers",
+                    "mcp",
+                    "--latency",
+                    str(args.tool_latency),
+                    "--payload-size",
+                    str(args.payload_size),
+                    "--seed",
+                    "0",
+                ],
+                "transport": "stdio",
+            }
+        }
+    }
+
+
+async def run_benchmark(
+    args: argparse.Namespace, timer: PhaseTimer, config_path: str
+) -> None:
+    model = BenchModel(
+        tool_calls=args.tool_calls, latency=args.llm_latency, timer=timer
+    )
+    graph_module._create_chat_model = lambda *a: model
+    graph_module._chat_models.clear()
+    graph_module._agents.clear()
+
+    timer.instrument(graph_module, "load_mcp_servers", "config_load")
+    timer.instrument(mcp_pool, "get_tools", "mcp_startup")
+    timer.instrument(graph_module, "load_chat_model", "model_construction")
+    timer.instrument(graph_module, "get_agent", "agent_compilation")
+    original_publish = mcp_pool.publish
+
+    def publish(tools: List[Any]) -> List[Any]:
+        for tool in tools:
+            tool.coroutine = timer.wrap(tool.coroutine, "tool_call")
+        return original_publish(tools)
+
+    mcp_pool.publish = publish
+    # 바깥 그래프와 중첩 에이전트가 같은 체크포인터를 쓰므로 양쪽의 쓰기가 모두 측정됩니다.
+    memory = graph_module.get_memory()
+    timer.instrument(memory, "put", "checkpoint_write")
+    timer.instrument(memory, "put_writes", "checkpoint_write")
+    graph = graph_module.builder.compile(checkpointer=memory)
+
+    async def one_run(i: int) -> float:
+        if args.cold:
+            await mcp_pool.aclose_all()
+            graph_module._chat_models.clear()
+            graph_module._agents.clear()
+        config = {
+            "configurable": {
+                "thread_id": f"bench-{i}",
+                "mcp_tools": config_path,
+                "graph_mode": args.graph_mode,
+            }
+        }
+        run_input = {"messages": [("user", "벤치마크 질문")]}
+        started = time.perf_counter()
+        if args.stream:
+            async for _ in graph.astream(run_input, config, stream_mode="updates"):
+                pass
+        else:
+            await graph.ainvoke(run_input, config)
+        return time.perf_counter() - started
+
+    try:
+        for i in range(args.warmup):
+            await one_run(-1 - i)
+        timer.samples.clear()
+        for i in range(args.runs):
+            timer.add("run", await one_run(i))
+    finally:
+        await mcp_pool.aclose_all()
+
+
+def print_summary(
+    summary: Dict[str, Dict[str, float]], baseline: Dict[str, Any] | None
+) -> None:
+    print(
+        f"{'phase':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        + ("   p50 vs base" if baseline else "")
+    )
+    for phase, stats in summary.items():
+        line = (
+            f"{phase:<20}{stats['count']:>7}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+        base = (baseline or {}).get("phases", {}).get(phase)
+        if base and base["p50_ms"]:
+            line += f"   {stats['p50_ms'] / base['p50_ms'] - 1:+8.1%}"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--graph-mode", choices=["nested", "single"], default="nested")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio")
+    parser.add_argument("--tool-calls", type=int, default=2)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--tool-latency", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=500)
+    parser.add_argument(
+        "--stream", action="store_true", help="use astream instead of ainvoke"
+    )
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="clear the pools and caches before every run",
+    )
+    parser.add_argument("--output", default="benchmarks/results/e2e.json")
+    parser.add_argument(
+        "--compare", help="a previous result file to compare p50s against"
+    )
+    args = parser.parse_args()
+    # 요청마다 찍히는 로그가 측정값을 흐리지 않도록 경고 이상만 남깁니다.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    timer = PhaseTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        sse: BackgroundServer | None = None
+        if args.transport == "sse":
+            behavior = FakeBehavior(
+                latency=args.tool_latency, payload_size=args.payload_size, seed=0
+            )
+            sse = BackgroundServer(create_mcp_server(behavior).sse_app()).start()
+        config_path = os.path.join(tmp, "mcp_config.json")
+        with open(config_path, "w") as f:
+            json.dump(mcp_config(args, sse and f"{sse.url}/sse"), f)
+        try:
+            asyncio.run(run_benchmark(args, timer, config_path))
+        finally:
+            if sse is not None:
+                sse.stop()
+
+    summary = summarize(timer.samples)
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                k: v for k, v in vars(args).items() if k not in ("output", "compare")
+            },
+        },
+        "phases": summary,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(summary, baseline)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Measure how long importing the agent takes, based on `python -X importtime`.
+
+Each sample runs a fresh interpreter with `-X importtime`, and reads the
+cumulative import time of the target module from its report. The script
+prints the median, the slowest imports of the last sample and fails when the
+median is above the threshold, so it can run as a regression check in CI.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module react_agent.graph]
+        [--samples 5] [--threshold-ms 1500] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+
+def import_time(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Import `module` in a fresh interpreter.
+
+    Returns:
+        The cumulative import time of `module` in milliseconds, and the modules
+        it imported directly with their cumulative times in milliseconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time:  self_us | cumulative_us | <indent>name";
+    # a module's own imports are listed before it, one level deeper.
+    entries: List[Tuple[int, str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, raw_name = line[len("import time:") :].split("|")
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        entries.append((depth, raw_name.strip(), int(cumulative_us) / 1000))
+    for i in range(len(entries) - 1, -1, -1):
+        depth, name, ms = entries[i]
+        if name == module:
+            break
+    else:
+        raise RuntimeError(f"{module} not found in -X importtime output")
+    children: List[Tuple[str, float]] = []
+    for child_depth, child_name, child_ms in reversed(entries[:i]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            children.append((child_name, child_ms))
+    return ms, children
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="react_agent.graph")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings: List[float] = []
+    children: List[Tuple[str, float]] = []
+    for _ in range(args.samples):
+        ms, children = import_time(args.module)
+        timings.append(ms)
+
+    median = statistics.median(timings)
+    print(
+        f"import {args.module}: median {median:.0f} ms over {args.samples} runs "
+        f"(min {min(timings):.0f}, max {max(timings):.0f})"
+    )
+    print("\nslowest direct imports (cumulative, last run):")
+    for name, ms in sorted(children, key=lambda x: x[1], reverse=True)[: args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    if median > args.threshold_ms:
+        print(
+            f"\nFAIL: median {median:.0f} ms exceeds threshold {args.threshold_ms:.0f} ms"
+        )
+        return 1
+    print(f"\nOK: below threshold {args.threshold_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
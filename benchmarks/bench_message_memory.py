@@ -0,0 +1,84 @@
+"""Measure the memory used per message by the default and the compact state.
+
+Builds a tool-heavy conversation (human → AI with tool call → tool result → AI),
+then reports the bytes allocated per message for LangChain messages and for the
+equivalent `CompactMessage` records. Both numbers include the content strings,
+which the compact records share with the messages they were converted from.
+
+Usage:
+    python benchmarks/bench_message_memory.py [--messages 2000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+import uuid
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.messages import CompactMessage, to_compact
+
+
+def build_conversation(n_messages: int) -> List[BaseMessage]:
+    messages: List[BaseMessage] = []
+    for i in range(n_messages // 4):
+        call_id = f"call_{i}"
+        messages.extend(
+            [
+                HumanMessage(content=f"질문 {i}", id=str(uuid.uuid4())),
+                AIMessage(
+                    content="",
+                    id=str(uuid.uuid4()),
+                    tool_calls=[
+                        {
+                            "name": "sequentialthinking",
+                            "args": {"thought": f"step {i}"},
+                            "id": call_id,
+                        }
+                    ],
+                    usage_metadata={
+                        "input_tokens": 120,
+                        "output_tokens": 30,
+                        "total_tokens": 150,
+                    },
+                ),
+                ToolMessage(
+                    content=f"결과 {i} " * 8,
+                    tool_call_id=call_id,
+                    name="sequentialthinking",
+                    id=str(uuid.uuid4()),
+                ),
+                AIMessage(content=f"답변 {i}", id=str(uuid.uuid4())),
+            ]
+        )
+    return messages
+
+
+def measure(n_messages: int) -> None:
+    tracemalloc.start()
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    langchain_messages = build_conversation(n_messages)
+    gc.collect()
+    langchain_bytes = tracemalloc.get_traced_memory()[0] - start
+
+    compact: List[CompactMessage] = [to_compact(m) for m in langchain_messages]
+    # Keep only what the compact records reference (content, ids, tool args).
+    del langchain_messages
+    gc.collect()
+    compact_bytes = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    count = len(compact)
+    print(f"messages:              {count}")
+    print(f"LangChain messages:    {langchain_bytes / count:8.0f} bytes/message")
+    print(f"CompactMessage:        {compact_bytes / count:8.0f} bytes/message")
+    print(f"reduction:             {1 - compact_bytes / langchain_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    measure(args.messages)
@@ -0,0 +1,294 @@
+"""Concurrent load test of a running agent server, ramping until an SLO breaks.
+
+Simulates virtual users. Each user runs conversation scripts (a list of user
+messages sent in turn on a new thread) and waits a random think time between
+messages. The number of users grows in stages until the error rate or the p95
+latency of a stage breaks the SLO. The last stage within the SLO is reported
+as the saturation point of the instance.
+
+For every stage the throughput, latency percentiles, a latency histogram and
+the errors by kind are printed; everything is also written to a JSON file.
+
+Two server APIs are supported:
+
+- `serve`: the production server (`python -m react_agent.serve`),
+  `POST /threads/{id}/runs/wait`.
+- `langgraph`: the LangGraph API server (`langgraph dev`), which creates a
+  thread with `POST /threads` and runs the `--assistant-id` graph on it.
+
+Scripts are a JSON file holding a list of conversations, each a list of
+messages; a built-in script is used by default. To load-test without API keys
+or MCP servers, run the server with `CASSETTE_MODE=replay` (see
+`react_agent.cassette`) or `MCP_CONFIG_PROFILE=test`.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 [--api serve]
+        [--start-users 1] [--step-users 2] [--max-users 64] [--stage-seconds 30]
+        [--think-time 1.0] [--script conversations.json] [--timeout 120]
+        [--slo-p95-ms 10000] [--slo-error-rate 0.01] [--output benchmarks/results/load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import httpx
+
+DEFAULT_SCRIPT = [
+    ["안녕하세요, 자기소개를 해 주세요."],
+    ["오늘 날짜를 알려 주세요.", "그 날짜의 요일은 무엇인가요?"],
+    ["피보나치 수열을 설명해 주세요.", "열 번째 항은 무엇인가요?", "고마워요."],
+]
+
+# 히스토그램 구간의 상한 (밀리초)
+BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, math.inf]
+
+
+@dataclass
+class Result:
+    """The outcome of one request."""
+
+    finished: float
+    latency: float
+    error: str | None = None
+
+
+@dataclass
+class Stage:
+    """Results of one ramp stage."""
+
+    users: int
+    started: float
+    ended: float = 0.0
+    results: List[Result] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(r.latency * 1000 for r in self.results if r.error is None)
+        errors = Counter(r.error for r in self.results if r.error is not None)
+        total = len(self.results)
+        histogram = Counter(next(b for b in BUCKETS_MS if ms <= b) for ms in latencies)
+        return {
+            "users": self.users,
+            "seconds": round(self.ended - self.started, 2),
+            "requests": total,
+            "throughput_rps": round(total / max(self.ended - self.started, 1e-9), 3),
+            "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+            "errors": dict(errors),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+            "histogram_ms": {
+                ("inf" if b == math.inf else str(b)): histogram.get(b, 0)
+                for b in BUCKETS_MS
+            },
+        }
+
+
+def _percentile(ordered: List[float], q: float) -> float | None:
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(len(ordered) * q / 100))
+    return round(ordered[rank - 1], 1)
+
+
+class Client:
+    """Sends one conversation turn to the server under test."""
+
+    def __init__(self, http: httpx.AsyncClient, api: str, assistant_id: str) -> None:
+        self.http = http
+        self.api = api
+        self.assistant_id = assistant_id
+
+    async def new_thread(self) -> str:
+        if self.api == "langgraph":
+            response = await self.http.post("/threads", json={})
+            response.raise_for_status()
+            return str(response.json()["thread_id"])
+        return str(uuid.uuid4())
+
+    async def send(self, thread_id: str, text: str) -> None:
+        body: Dict[str, Any] = {
+            "input": {"messages": [{"role": "user", "content": text}]}
+        }
+        if self.api == "langgraph":
+            body["assistant_id"] = self.assistant_id
+        response = await self.http.post(f"/threads/{thread_id}/runs/wait", json=body)
+        response.raise_for_status()
+
+
+def _error_kind(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return type(error).__name__
+
+
+async def virtual_user(
+    client: Client,
+    script: List[List[str]],
+    think_time: float,
+    stages: List[Stage],
+    rng: random.Random,
+) -> None:
+    """Run random conversations until cancelled, recording into the current stage."""
+    while True:
+        conversation = rng.choice(script)
+        try:
+            thread_id = await client.new_thread()
+        except Exception as e:  # noqa: BLE001 - recorded as an error
+            stages[-1].results.append(Result(time.monotonic(), 0.0, _error_kind(e)))
+            await asyncio.sleep(think_time)
+            continue
+        for text in conversation:
+            started = time.monotonic()
+            error = None
+            try:
+                await client.send(thread_id, text)
+            except Exception as e:  # noqa: BLE001 - recorded as an error
+                error = _error_kind(e)
+            finished = time.monotonic()
+            stages[-1].results.append(Result(finished, finished - started, error))
+            if error is not None:
+                break
+            if think_time:
+                # 사용자마다 생각하는 시간이 다르도록 지수 분포에서 뽑습니다.
+                await asyncio.sleep(rng.expovariate(1 / think_time))
+
+
+def within_slo(summary: Dict[str, Any], args: argparse.Namespace) -> bool:
+    if not summary["requests"]:
+        return False
+    p95 = summary["latency_ms"]["p95"]
+    return (
+        summary["error_rate"] <= args.slo_error_rate
+        and p95 is not None
+        and p95 <= args.slo_p95_ms
+    )
+
+
+def print_stage(summary: Dict[str, Any]) -> None:
+    latency = summary["latency_ms"]
+    print(
+        f"users {summary['users']:>4}  requests {summary['requests']:>6}  "
+        f"{summary['throughput_rps']:>7.2f} req/s  errors {summary['error_rate']:>6.1%}  "
+        f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms"
+    )
+    peak = max(summary["histogram_ms"].values()) or 1
+    for bucket, count in summary["histogram_ms"].items():
+        if count:
+            print(
+                f"    <= {bucket:>6} ms {count:>6} {'#' * max(1, round(40 * count / peak))}"
+            )
+    for kind, count in sorted(summary["errors"].items(), key=lambda x: -x[1]):
+        print(f"    error {kind}: {count}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(
+        max_connections=args.max_users, max_keepalive_connections=args.max_users
+    )
+    stages: List[Stage] = []
+    summaries: List[Dict[str, Any]] = []
+    saturation: Dict[str, Any] | None = None
+    users: List[asyncio.Task[None]] = []
+
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as http:
+        client = Client(http, args.api, args.assistant_id)
+        target = args.start_users
+        try:
+            while target <= args.max_users:
+                stages.append(Stage(users=target, started=time.monotonic()))
+                while len(users) < target:
+                    seed = rng.random()
+                    users.append(
+                        asyncio.create_task(
+                            virtual_user(
+                                client,
+                                script,
+                                args.think_time,
+                                stages,
+                                random.Random(seed),
+                            )
+                        )
+                    )
+                await asyncio.sleep(args.stage_seconds)
+                stages[-1].ended = time.monotonic()
+                summary = stages[-1].summary()
+                summaries.append(summary)
+                print_stage(summary)
+                if not within_slo(summary, args):
+                    print(f"\nSLO broken at {target} users.")
+                    break
+                saturation = summary
+                target += args.step_users
+        finally:
+            for task in users:
+                task.cancel()
+            await asyncio.gather(*users, return_exceptions=True)
+
+    if saturation is not None:
+        print(
+            f"Saturation point: {saturation['users']} users, "
+            f"{saturation['throughput_rps']:.2f} req/s within the SLO."
+        )
+    else:
+        print("No stage met the SLO.")
+    return {
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "stages": summaries,
+        "saturation": saturation,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--api", choices=["serve", "langgraph"], default="serve")
+    parser.add_argument("--assistant-id", default="agent")
+    parser.add_argument("--start-users", type=int, default=1)
+    parser.add_argument("--step-users", type=int, default=2)
+    parser.add_argument("--max-users", type=int, default=64)
+    parser.add_argument("--stage-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--think-time", type=float, default=1.0, help="mean seconds between messages"
+    )
+    parser.add_argument(
+        "--script", help="JSON file with a list of conversations (lists of messages)"
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--slo-p95-ms", type=float, default=10000.0)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,19 @@
 
 This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
+
+The compiled `graph` is imported lazily, so importing the package (for example
+to read `react_agent.configuration`) does not build the graph.
 """
 
-from react_agent.graph import graph
+from typing import Any
 
 __all__ = ["graph"]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "graph":
+        from react_agent.graph import graph
+
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,359 @@
+"""Token and cost accounting per run, thread, model and tool.
+
+Every chat model call is recorded from its LangChain callbacks: the input,
+output and cached (prompt cache read) tokens of `usage_metadata`, and the
+estimated cost from a price table. The totals are kept in process and grouped
+by:
+
+- `model`: the model that answered.
+- `thread`: the conversation thread (`thread_id`).
+- `run`: one turn of a thread, i.e. everything after its latest human message,
+  keyed `<thread_id>:<turn>`.
+- `tool`: which tools the tokens are spent on. The input tokens of a call are
+  split across the tools in proportion to how much of the prompt their results
+  take up, so tools whose outputs inflate the context show up with the most
+  input tokens. The output tokens of a call go to the tools whose results
+  triggered it (the tool results after the latest model message).
+
+`summary()` returns the totals for one grouping, also served on `/usage`. The
+cost per model and the tokens and cost per tool are exported on `/metrics`.
+`message_cost()` prices a single model response, which the run budget uses for
+`max_run_cost`.
+
+Prices are in USD per million tokens. The defaults cover the models the agent
+falls back to; `MODEL_PRICES` (a JSON object, or the path of a JSON file) adds
+or overrides entries, for example
+`{"claude-3-7-sonnet": {"input": 3, "output": 15, "cached": 0.3}}`.
+A model uses every price key its name starts with, longer keys overriding the
+fields of shorter ones. Calls are keyed by the model name of their invocation
+params, the same label the model call metrics use (`metrics.model_name`). The
+table is read by `load_prices()` when the server starts. `ACCOUNTING_MAX_THREADS`
+bounds the number of threads and runs kept (default 10000, oldest evicted first).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.messages import CompactMessage
+from react_agent.metrics import StartedRuns, counter, model_name, usage_of
+
+MODEL_COST = counter(
+    "agent_model_cost_usd_total",
+    "Estimated cost of chat model requests in USD.",
+    ("model",),
+)
+TOOL_TOKENS = counter(
+    "agent_tool_tokens_total",
+    "Model tokens attributed to the tools whose results were in the prompt.",
+    ("tool", "direction"),
+)
+TOOL_COST = counter(
+    "agent_tool_cost_usd_total",
+    "Estimated model cost in USD attributed to the tools whose results were in the prompt.",
+    ("tool",),
+)
+
+# 백만 토큰당 USD. cached 는 프롬프트 캐시 읽기, cache_write 는 캐시 쓰기 가격입니다.
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "claude-3-7-sonnet": {
+        "input": 3.0,
+        "output": 15.0,
+        "cached": 0.3,
+        "cache_write": 3.75,
+    },
+    "claude-3-5-sonnet": {
+        "input": 3.0,
+        "output": 15.0,
+        "cached": 0.3,
+        "cache_write": 3.75,
+    },
+    "claude-3-5-haiku": {
+        "input": 0.8,
+        "output": 4.0,
+        "cached": 0.08,
+        "cache_write": 1.0,
+    },
+    "claude-3-haiku": {
+        "input": 0.25,
+        "output": 1.25,
+        "cached": 0.03,
+        "cache_write": 0.3,
+    },
+    "gpt-4-turbo": {"input": 10.0, "output": 30.0},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.6, "cached": 0.075},
+    "gpt-4o": {"input": 2.5, "output": 10.0, "cached": 1.25},
+}
+
+
+@lru_cache(maxsize=4)
+def _load_prices(setting: str) -> Dict[str, Dict[str, float]]:
+    prices = {name: dict(price) for name, price in DEFAULT_PRICES.items()}
+    if setting:
+        if not setting.lstrip().startswith("{"):
+            with open(setting, encoding="utf-8") as f:
+                setting = f.read()
+        for name, price in json.loads(setting).items():
+            prices[name] = {
+                **prices.get(name, {}),
+                **{k: float(v) for k, v in price.items()},
+            }
+    return prices
+
+
+def load_prices() -> None:
+    """Read the `MODEL_PRICES` table now instead of on the first model call."""
+    _load_prices(os.getenv("MODEL_PRICES", ""))
+
+
+def price_for(model: str) -> Dict[str, float] | None:
+    """Return the price entry of `model`, or `None` if it has none."""
+    prices = _load_prices(os.getenv("MODEL_PRICES", ""))
+    matches = sorted((name for name in prices if model.startswith(name)), key=len)
+    if not matches:
+        return None
+    # 더 긴(구체적인) 키의 값이 짧은 키의 값을 덮어씁니다.
+    price: Dict[str, float] = {}
+    for name in matches:
+        price.update(prices[name])
+    return price
+
+
+@dataclass
+class Usage:
+    """Tokens and estimated cost of one or more model calls."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+
+    def add(self, other: Usage) -> None:
+        """Add the calls, tokens and cost of `other` to these totals."""
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cost += other.cost
+
+
+def _costs(model: str, usage: Mapping[str, Any]) -> Tuple[float, float, int]:
+    """Return the input cost, the output cost and the cached tokens of one call."""
+    details = usage.get("input_token_details") or {}
+    cached = int(details.get("cache_read") or 0)
+    written = int(details.get("cache_creation") or 0)
+    price = price_for(model)
+    if price is None:
+        return 0.0, 0.0, cached
+    input_price = price.get("input", 0.0)
+    uncached = max(int(usage.get("input_tokens") or 0) - cached - written, 0)
+    input_cost = (
+        uncached * input_price
+        + cached * price.get("cached", input_price)
+        + written * price.get("cache_write", input_price)
+    ) / 1e6
+    output_cost = int(usage.get("output_tokens") or 0) * price.get("output", 0.0) / 1e6
+    return input_cost, output_cost, cached
+
+
+def message_cost(message: Any) -> float:
+    """Estimated cost of one model response (a message or a `CompactMessage`)."""
+    if isinstance(message, CompactMessage):
+        extra = message.extra or {}
+        usage, metadata = extra.get("usage_metadata"), extra.get("response_metadata")
+    else:
+        usage = getattr(message, "usage_metadata", None)
+        metadata = getattr(message, "response_metadata", None)
+    if not usage:
+        return 0.0
+    input_cost, output_cost, _ = _costs(model_name(metadata), usage)
+    return input_cost + output_cost
+
+
+def _text_size(message: BaseMessage) -> int:
+    content = message.content
+    return (
+        len(content)
+        if isinstance(content, str)
+        else len(json.dumps(content, default=str))
+    )
+
+
+def tool_shares(messages: Sequence[BaseMessage]) -> Tuple[Dict[str, float], List[str]]:
+    """Split a prompt by tool.
+
+    Returns:
+        The fraction of the prompt taken up by each tool's results, and the
+        tools whose results come after the latest model message.
+    """
+    sizes: Dict[str, int] = {}
+    total = 0
+    triggering: List[str] = []
+    for message in messages:
+        size = _text_size(message)
+        total += size
+        if isinstance(message, ToolMessage):
+            name = message.name or "unknown"
+            sizes[name] = sizes.get(name, 0) + size
+            triggering.append(name)
+        elif isinstance(message, AIMessage):
+            triggering = []
+    shares = {name: size / total for name, size in sizes.items()} if total else {}
+    return shares, list(dict.fromkeys(triggering))
+
+
+class Ledger:
+    """Usage totals grouped by model, tool, thread and run."""
+
+    def __init__(self, max_threads: int = 10_000) -> None:
+        """Create an empty ledger that keeps at most `max_threads` threads and runs."""
+        self.max_threads = max_threads
+        self._groups: Dict[str, OrderedDict[str, Usage]] = {
+            group: OrderedDict() for group in ("model", "tool", "thread", "run")
+        }
+        self._lock = threading.Lock()
+
+    def add(self, group: str, key: str, usage: Usage) -> None:
+        """Add `usage` to the totals of `key` in `group`, dropping the oldest thread or run."""
+        with self._lock:
+            totals = self._groups[group]
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = Usage()
+                if group in ("thread", "run") and len(totals) > self.max_threads:
+                    totals.popitem(last=False)
+            else:
+                totals.move_to_end(key)
+            entry.add(usage)
+
+    def get(self, group: str, key: str) -> Usage | None:
+        """Return a copy of the totals of `key` in `group`, if any."""
+        with self._lock:
+            entry = self._groups[group].get(key)
+            return Usage(**asdict(entry)) if entry else None
+
+    def summary(
+        self, group: str, limit: int = 50, prefix: str = ""
+    ) -> List[Dict[str, Any]]:
+        """Return the largest totals of `group`, most expensive first."""
+        with self._lock:
+            items = [
+                {"key": key, **asdict(usage)}
+                for key, usage in self._groups[group].items()
+                if key.startswith(prefix)
+            ]
+        items.sort(key=lambda item: (item["cost"], item["input_tokens"]), reverse=True)
+        for item in items:
+            item["cost"] = round(item["cost"], 6)
+        return items[:limit]
+
+    def clear(self) -> None:
+        """Forget every total."""
+        with self._lock:
+            for totals in self._groups.values():
+                totals.clear()
+
+
+ledger = Ledger(int(os.getenv("ACCOUNTING_MAX_THREADS", "10000")))
+
+
+def summary(
+    by: str = "model", limit: int = 50, thread_id: str | None = None
+) -> List[Dict[str, Any]]:
+    """Usage totals grouped `by` model, tool, thread or run, most expensive first.
+
+    With `thread_id`, only the runs of that thread are returned (`by` is ignored).
+    """
+    if thread_id is not None:
+        return ledger.summary("run", limit, prefix=f"{thread_id}:")
+    if by not in ("model", "tool", "thread", "run"):
+        raise ValueError(f"unknown grouping: {by}")
+    return ledger.summary(by, limit)
+
+
+class AccountingCallbackHandler(BaseCallbackHandler):
+    """Record the usage of every chat model call in the ledger and the metrics.
+
+    Runs inline; the prompt is only measured when the call starts. Like the
+    metrics handler, it remembers at most `max_runs` calls in flight, so the
+    calls of cancelled runs are eventually forgotten.
+    """
+
+    run_inline = True
+
+    def __init__(self, ledger: Ledger, max_runs: int = 10_000) -> None:
+        """Create a handler that records into `ledger`."""
+        self.ledger = ledger
+        self._started: StartedRuns = StartedRuns(max_runs)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):  # type: ignore[no-untyped-def]
+        """Measure the prompt and note the model, thread and run of the call."""
+        prompt = messages[0] if messages else []
+        thread_id = str((metadata or {}).get("thread_id") or "no-thread")
+        turn = sum(isinstance(m, HumanMessage) for m in prompt)
+        model = model_name(kwargs.get("invocation_params"))
+        shares, triggering = tool_shares(prompt)
+        self._started[run_id] = (
+            model,
+            thread_id,
+            f"{thread_id}:{turn}",
+            shares,
+            triggering,
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Forget a failed call."""
+        self._started.pop(run_id, None)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Record the usage of a finished call."""
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        for _, usage in usage_of(response):
+            self._record(*started, usage)
+
+    def _record(
+        self,
+        model: str,
+        thread_id: str,
+        run_key: str,
+        shares: Dict[str, float],
+        triggering: List[str],
+        usage: Mapping[str, Any],
+    ) -> None:
+        input_cost, output_cost, cached = _costs(model, usage)
+        input_tokens = int(usage.get("input_tokens") or 0)
+        output_tokens = int(usage.get("output_tokens") or 0)
+        call = Usage(1, input_tokens, output_tokens, cached, input_cost + output_cost)
+        self.ledger.add("model", model, call)
+        self.ledger.add("thread", thread_id, call)
+        self.ledger.add("run", run_key, call)
+        MODEL_COST.inc(call.cost, model=model)
+
+        for tool in set(shares) | set(triggering):
+            share = shares.get(tool, 0.0)
+            output_share = 1 / len(triggering) if tool in triggering else 0.0
+            attributed = Usage(
+                calls=1 if tool in triggering else 0,
+                input_tokens=round(input_tokens * share),
+                output_tokens=round(output_tokens * output_share),
+                cached_tokens=round(cached * share),
+                cost=input_cost * share + output_cost * output_share,
+            )
+            self.ledger.add("tool", tool, attributed)
+            TOOL_TOKENS.inc(attributed.input_tokens, tool=tool, direction="input")
+            TOOL_TOKENS.inc(attributed.output_tokens, tool=tool, direction="output")
+            TOOL_COST.inc(attributed.cost, tool=tool)
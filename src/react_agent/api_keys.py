@@ -4,12 +4,18 @@
 민감한 API 키를 직접 코드에 포함하지 않고, 환경 변수나 외부 파일에서 로드합니다.
 """
 
-import os
+import asyncio
 import json
-import re
-from typing import Dict, Optional, Any
 import logging
+import os
+import signal
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from react_agent.key_pool import parse_keys
+from react_agent.secret_providers import SecretsProvider
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +23,7 @@ logger = logging.getLogger(__name__)
 API_KEY_PLACEHOLDER = {
     "openai": "sk-placeholder-openai-key",
     "anthropic": "sk-ant-REDACTED",
-    "langsmith": "lsv2-placeholder-langsmith-key"
+    "langsmith": "lsv2-placeholder-langsmith-key",
 }
 
 # 외부 키 파일 경로
@@ -36,18 +42,23 @@ def load_api_keys_from_env() -> Dict[str, str]:
     keys = {
         "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", ""),
         "ANTHROPIC_API_KEY": os.getenv("ANTHROPIC_API_KEY", ""),
+        "OPENAI_API_KEYS": os.getenv("OPENAI_API_KEYS", ""),
+        "ANTHROPIC_API_KEYS": os.getenv("ANTHROPIC_API_KEYS", ""),
+        "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", ""),
         "LANGSMITH_API_KEY": os.getenv("LANGSMITH_API_KEY", ""),
-        "LANGSMITH_ENDPOINT": os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"),
+        "LANGSMITH_ENDPOINT": os.getenv(
+            "LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"
+        ),
         "LANGSMITH_PROJECT": os.getenv("LANGSMITH_PROJECT", "langgraph-react-mcp-chat"),
         "SSL_VERIFY": os.getenv("SSL_VERIFY", "true").lower() == "true",
         "HTTP2_ENABLED": os.getenv("HTTP2_ENABLED", "false").lower() == "true",
         "REQUESTS_TIMEOUT": int(os.getenv("REQUESTS_TIMEOUT", "30")),
     }
-    
+
     # 키 마스킹하여 로깅
     masked_keys = {k: mask_api_key(v) if "KEY" in k else v for k, v in keys.items()}
     logger.info(f"환경에서 로드된 API 키 및 설정: {masked_keys}")
-    
+
     return keys
 
 
@@ -57,12 +68,14 @@ def load_api_keys_from_file(file_path: str = ".env.json") -> Dict[str, str]:
         if os.path.exists(file_path):
             with open(file_path, "r") as f:
                 keys = json.load(f)
-                masked_keys = {k: mask_api_key(v) if "KEY" in k else v for k, v in keys.items()}
+                masked_keys = {
+                    k: mask_api_key(v) if "KEY" in k else v for k, v in keys.items()
+                }
                 logger.info(f"파일에서 로드된 API 키 및 설정: {masked_keys}")
                 return keys
     except Exception as e:
         logger.error(f"API 키 파일 로드 중 오류 발생: {e}")
-    
+
     return {}
 
 
@@ -70,24 +83,26 @@ def is_valid_openai_key(key: str) -> bool:
     """OpenAI API 키가 유효한지 확인합니다."""
     if not key:
         return False
-    
+
     # 길이 체크와 sk- 접두사 확인
     if len(key) < 30 or not key.startswith("sk-"):
         logger.warning(f"OpenAI API 키 형식이 올바르지 않습니다: {mask_api_key(key)}")
         return False
-        
+
     # 기본 키 또는 테스트 키 확인
     invalid_patterns = ["없음", "your_", "test_", "demo_", "placeholder"]
     for pattern in invalid_patterns:
         if pattern in key.lower():
-            logger.warning(f"OpenAI API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}")
+            logger.warning(
+                f"OpenAI API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}"
+            )
             return False
-    
+
     # 추가 검증: 단순히 "sk-"만 있는지 확인
     if key == "sk-":
         logger.warning("OpenAI API 키가 단순히 'sk-'만 포함되어 있습니다")
         return False
-            
+
     return True
 
 
@@ -95,29 +110,33 @@ def is_valid_anthropic_key(key: str) -> bool:
     """Anthropic API 키가 유효한지 확인합니다."""
     if not key:
         return False
-        
+
     # Anthropic 키는 sk-ant로 시작해야 함
     if not key.startswith("sk-ant"):
-        logger.warning(f"Anthropic API 키 형식이 올바르지 않습니다: {mask_api_key(key)}")
+        logger.warning(
+            f"Anthropic API 키 형식이 올바르지 않습니다: {mask_api_key(key)}"
+        )
         return False
-        
+
     # 길이 체크
     if len(key) < 30:
         logger.warning("Anthropic API 키가 너무 짧습니다")
         return False
-        
+
     # 기본 키 또는 테스트 키 확인
     invalid_patterns = ["없음", "your_", "test_", "demo_", "placeholder"]
     for pattern in invalid_patterns:
         if pattern in key.lower():
-            logger.warning(f"Anthropic API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}")
+            logger.warning(
+                f"Anthropic API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}"
+            )
             return False
-    
+
     # 추가 검증: 단순히 "sk-ant-api03"만 있는지 확인
     if key == "sk-ant-api03":
         logger.warning("Anthropic API 키가 단순히 'sk-ant-api03'만 포함되어 있습니다")
         return False
-            
+
     return True
 
 
@@ -125,58 +144,325 @@ def is_valid_langsmith_key(key: str) -> bool:
     """LangSmith API 키가 유효한지 확인합니다."""
     if not key:
         return False
-        
-    # LangSmith 키는 ls_로 시작해야 함 
+
+    # LangSmith 키는 ls_로 시작해야 함
     if not key.startswith("ls_"):
-        logger.warning(f"LangSmith API 키 형식이 올바르지 않습니다: {mask_api_key(key)}")
+        logger.warning(
+            f"LangSmith API 키 형식이 올바르지 않습니다: {mask_api_key(key)}"
+        )
         return False
-        
+
     # 길이 체크
     if len(key) < 30:
         logger.warning("LangSmith API 키가 너무 짧습니다")
         return False
-        
+
     # 기본 키 또는 테스트 키 확인
     invalid_patterns = ["없음", "your_", "test_", "demo_", "placeholder"]
     for pattern in invalid_patterns:
         if pattern in key.lower():
-            logger.warning(f"LangSmith API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}")
+            logger.warning(
+                f"LangSmith API 키에 유효하지 않은 패턴이 포함되어 있습니다: {pattern}"
+            )
             return False
-            
+
     return True
 
 
+def _load_api_keys() -> Dict[str, Any]:
+    """읽어 둔 환경 변수와 키 파일의 값에 시크릿 프로바이더의 값을 덮어 합칩니다 (I/O 없음)."""
+    keys: Dict[str, Any] = dict(_local_keys.snapshot)
+
+    # 시크릿 프로바이더가 설정되어 있으면 그 값이 우선합니다 (키 교체 지원).
+    if _secrets_provider is not None:
+        keys.update(_secrets_provider.snapshot)
+
+    return keys
+
+
 def get_validated_api_keys() -> Dict[str, str]:
     """환경 변수와 파일에서 API 키를 로드하고 검증합니다."""
-    # 환경 변수에서 먼저 로드
-    keys = load_api_keys_from_env()
-    
-    # 환경 변수에 없으면 파일에서 로드 시도
-    if not any([keys.get("OPENAI_API_KEY"), keys.get("ANTHROPIC_API_KEY")]):
-        file_keys = load_api_keys_from_file()
-        # 파일에서 가져온 키로 환경 변수의 빈 키 업데이트
-        for key_name, key_value in file_keys.items():
-            if not keys.get(key_name):
-                keys[key_name] = key_value
-    
+    keys = dict(get_credentials().keys)
+
     # 검증 결과 출력
     validation_results = {
         "OPENAI_API_KEY": is_valid_openai_key(keys.get("OPENAI_API_KEY", "")),
         "ANTHROPIC_API_KEY": is_valid_anthropic_key(keys.get("ANTHROPIC_API_KEY", "")),
         "LANGSMITH_API_KEY": is_valid_langsmith_key(keys.get("LANGSMITH_API_KEY", "")),
     }
-    
+
     logger.info(f"API 키 검증 결과: {validation_results}")
-    
+
     return keys
 
 
+# 자격 증명 캐시가 변경을 감지할 때 확인하는 환경 변수와 키 파일
+CREDENTIAL_ENV_VARS = (
+    "OPENAI_API_KEY",
+    "ANTHROPIC_API_KEY",
+    "OPENAI_API_KEYS",
+    "ANTHROPIC_API_KEYS",
+    "TAVILY_API_KEY",
+    "LANGSMITH_API_KEY",
+    "LANGSMITH_ENDPOINT",
+    "LANGSMITH_PROJECT",
+)
+CREDENTIALS_FILE = ".env.json"
+# 키 파일의 변경 여부(mtime)는 이 간격(초)마다 한 번만 확인합니다.
+CREDENTIALS_FILE_CHECK_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class CredentialState:
+    """부팅 시 한 번 계산해 두는 API 키와 검증 결과입니다.
+
+    환경 변수나 키 파일이 바뀌었거나 `reload_credentials()`가 호출될 때만 다시 계산됩니다.
+    """
+
+    keys: Dict[str, Any]
+    openai_valid: bool
+    anthropic_valid: bool
+    langsmith_valid: bool
+    env: Tuple[str | None, ...] = field(repr=False)
+    file_mtime: float | None = None
+    openai_keys: Tuple[Tuple[str, float], ...] = field(default=(), repr=False)
+    anthropic_keys: Tuple[Tuple[str, float], ...] = field(default=(), repr=False)
+
+    @property
+    def available_providers(self) -> Tuple[str, ...]:
+        """사용 가능한 모델 프로바이더를 우선순위대로 반환합니다."""
+        providers = []
+        if self.anthropic_valid:
+            providers.append("anthropic")
+        if self.openai_valid:
+            providers.append("openai")
+        return tuple(providers)
+
+    def provider_keys(self, provider: str) -> Tuple[Tuple[str, float], ...]:
+        """프로바이더의 유효한 키 목록을 (키, 가중치) 쌍으로 반환합니다."""
+        return self.anthropic_keys if provider == "anthropic" else self.openai_keys
+
+
+def _credentials_file_mtime() -> float | None:
+    try:
+        return os.stat(CREDENTIALS_FILE).st_mtime
+    except OSError:
+        return None
+
+
+def _credential_env() -> Tuple[str | None, ...]:
+    return tuple(os.environ.get(name) for name in CREDENTIAL_ENV_VARS)
+
+
+class LocalKeysProvider(SecretsProvider):
+    """환경 변수와 키 파일(`CREDENTIALS_FILE`)에서 API 키를 읽는 프로바이더입니다.
+
+    파일 읽기는 작업 스레드에서 실행되므로 이벤트 루프를 막지 않습니다. 환경 변수 값과
+    키 파일의 수정 시각이 마지막으로 읽었을 때와 같으면 다시 읽지 않습니다.
+    """
+
+    def __init__(self) -> None:
+        """아직 한 번도 읽지 않은 상태로 만듭니다."""
+        super().__init__()
+        self.env: Tuple[str | None, ...] | None = None
+        self.file_mtime: float | None = None
+        # 다시 읽기 신호를 받으면 다음 확인 때 바뀐 것이 없어도 다시 읽습니다.
+        self.stale = True
+
+    def read(self, force: bool = False) -> Dict[str, Any] | None:
+        """키를 읽어 반환합니다. 바뀐 것이 없으면 `None`을 반환합니다 (블로킹)."""
+        env = _credential_env()
+        file_mtime = _credentials_file_mtime()
+        if not (force or self.stale) and (env, file_mtime) == (
+            self.env,
+            self.file_mtime,
+        ):
+            return None
+        self.env, self.file_mtime, self.stale = env, file_mtime, False
+
+        # 환경 변수에서 먼저 로드
+        keys: Dict[str, Any] = load_api_keys_from_env()
+
+        # 환경 변수에 없으면 파일에서 로드 시도
+        if not any(
+            keys.get(name)
+            for name in (
+                "OPENAI_API_KEY",
+                "ANTHROPIC_API_KEY",
+                "OPENAI_API_KEYS",
+                "ANTHROPIC_API_KEYS",
+            )
+        ):
+            file_keys = load_api_keys_from_file(CREDENTIALS_FILE)
+            # 파일에서 가져온 키로 환경 변수의 빈 키 업데이트
+            for key_name, key_value in file_keys.items():
+                if not keys.get(key_name):
+                    keys[key_name] = key_value
+        return keys
+
+    def reload(self) -> bool:
+        """호출한 스레드에서 바로 키를 다시 읽습니다."""
+        return self._swap(self.read(force=True))
+
+    async def _load(self) -> Dict[str, Any] | None:
+        return await asyncio.to_thread(self.read)
+
+
+_credentials: CredentialState | None = None
+_last_file_check = 0.0
+_local_keys = LocalKeysProvider()
+_secrets_provider: SecretsProvider | None = None
+
+
+def _log_credential_state(state: CredentialState) -> None:
+    logger.info("===== API 키 상태 =====")
+    logger.info(
+        f"OpenAI API 키: {mask_api_key(state.keys.get('OPENAI_API_KEY', ''))} - {'유효함 ✅' if state.openai_valid else '유효하지 않음 ❌'}"
+    )
+    logger.info(
+        f"Anthropic API 키: {mask_api_key(state.keys.get('ANTHROPIC_API_KEY', ''))} - {'유효함 ✅' if state.anthropic_valid else '유효하지 않음 ❌'}"
+    )
+    for provider in ("openai", "anthropic"):
+        if len(state.provider_keys(provider)) > 1:
+            logger.info(
+                f"{provider} 키 풀: 유효한 키 {len(state.provider_keys(provider))}개"
+            )
+    logger.info("======================")
+
+    if not state.openai_valid:
+        logger.warning("OpenAI API 키가 유효하지 않습니다. 환경 변수를 확인하세요.")
+
+    if not state.anthropic_valid:
+        logger.warning("Anthropic API 키가 유효하지 않습니다. 환경 변수를 확인하세요.")
+
+    # 사용 가능한 모델 표시
+    available_models = []
+    if state.openai_valid:
+        available_models.append("OpenAI (gpt-4-turbo)")
+    if state.anthropic_valid:
+        available_models.append("Anthropic (claude-3-7-sonnet, claude-3-haiku)")
+
+    if available_models:
+        logger.info(f"사용 가능한 모델: {', '.join(available_models)}")
+    else:
+        logger.warning("사용 가능한 모델이 없습니다. API 키를 확인하세요.")
+
+
+def _provider_keys(
+    keys: Dict[str, Any], provider: str, is_valid: Any
+) -> Tuple[Tuple[str, float], ...]:
+    """`{PROVIDER}_API_KEY`와 `{PROVIDER}_API_KEYS`에서 유효한 키만 모읍니다."""
+    prefix = provider.upper()
+    pooled = parse_keys(str(keys.get(f"{prefix}_API_KEYS") or ""))
+    single = keys.get(f"{prefix}_API_KEY")
+    if single and single not in [key for key, _ in pooled]:
+        pooled.insert(0, (single, 1.0))
+    return tuple((key, weight) for key, weight in pooled if is_valid(key))
+
+
+def _build_credentials() -> CredentialState:
+    """읽어 둔 키로 자격 증명 상태를 다시 계산해 캐시를 갱신합니다 (I/O 없음)."""
+    global _credentials
+    keys = _load_api_keys()
+    openai_keys = _provider_keys(keys, "openai", is_valid_openai_key)
+    anthropic_keys = _provider_keys(keys, "anthropic", is_valid_anthropic_key)
+    state = CredentialState(
+        keys=keys,
+        openai_valid=bool(openai_keys),
+        anthropic_valid=bool(anthropic_keys),
+        langsmith_valid=is_valid_langsmith_key(keys.get("LANGSMITH_API_KEY", "")),
+        env=_local_keys.env or (),
+        file_mtime=_local_keys.file_mtime,
+        openai_keys=openai_keys,
+        anthropic_keys=anthropic_keys,
+    )
+    _credentials = state
+    _log_credential_state(state)
+    return state
+
+
+def reload_credentials() -> CredentialState:
+    """호출한 스레드에서 API 키를 바로 다시 읽고 검증해 캐시를 갱신합니다.
+
+    키 파일을 읽으므로 이벤트 루프에서는 `arefresh_credentials()`를 사용하세요.
+    """
+    global _last_file_check
+    _local_keys.reload()
+    _last_file_check = time.monotonic()
+    return _build_credentials()
+
+
+async def arefresh_credentials() -> CredentialState:
+    """작업 스레드에서 API 키를 다시 읽고, 바뀌었으면 캐시를 갱신합니다."""
+    global _last_file_check
+    _last_file_check = time.monotonic()
+    if _credentials is None:
+        _local_keys.stale = True
+    if await _local_keys.refresh() or _credentials is None:
+        return _build_credentials()
+    return _credentials
+
+
+async def aget_credentials() -> CredentialState:
+    """자격 증명 상태를 반환하되, 바뀌었을 수 있으면 작업 스레드에서 다시 읽습니다.
+
+    환경 변수 값이 바뀌었거나, 다시 읽기 신호를 받았거나, 키 파일을 마지막으로 확인한 지
+    `CREDENTIALS_FILE_CHECK_INTERVAL`초가 지났을 때만 다시 읽습니다.
+    """
+    state = _credentials
+    if (
+        state is None
+        or _local_keys.stale
+        or _local_keys.env != _credential_env()
+        or time.monotonic() - _last_file_check >= CREDENTIALS_FILE_CHECK_INTERVAL
+    ):
+        return await arefresh_credentials()
+    return state
+
+
+def get_credentials() -> CredentialState:
+    """캐시된 자격 증명 상태를 반환합니다.
+
+    바뀐 키를 읽는 일은 `aget_credentials()`가 작업 스레드에서 합니다. 아직 한 번도 읽지 않았을
+    때(부팅, CLI)만 호출한 스레드에서 바로 읽습니다.
+    """
+    return _credentials or reload_credentials()
+
+
+def set_secrets_provider(provider: SecretsProvider) -> None:
+    """시크릿 프로바이더를 연결합니다.
+
+    프로바이더의 값은 환경 변수와 키 파일보다 우선하며, 프로바이더가 키를 교체하면
+    자격 증명 캐시가 즉시 다시 계산됩니다.
+    """
+    global _secrets_provider
+    _secrets_provider = provider
+    provider.subscribe(lambda snapshot: _build_credentials())
+    _build_credentials()
+
+
+def install_reload_signal(signum: int = signal.SIGHUP) -> None:
+    """시그널(기본 SIGHUP)을 받으면 자격 증명을 다시 읽도록 설정합니다."""
+
+    def _handle(signum: int, frame: Any) -> None:
+        # 시그널 핸들러에서는 파일을 읽지 않고, 다음 확인 때 작업 스레드에서 다시 읽습니다.
+        logger.info("자격 증명 다시 읽기 신호를 받았습니다.")
+        _local_keys.stale = True
+
+    signal.signal(signum, _handle)
+
+
+def get_api_key(key_name: str) -> str:
+    """캐시된 자격 증명에서 API 키를 가져옵니다 (환경 변수 우선, 없으면 키 파일)."""
+    return get_credentials().keys.get(key_name, "")
+
+
 def check_and_display_api_keys() -> None:
     """API 키를 체크하고 상태를 표시합니다."""
     keys = get_validated_api_keys()
-    
+
     # OpenAI API 키 검증
-    openai_key = keys.get('OPENAI_API_KEY', '')
+    openai_key = keys.get("OPENAI_API_KEY", "")
     openai_valid = is_valid_openai_key(openai_key)
     openai_error = ""
     if not openai_valid:
@@ -186,15 +472,18 @@ def check_and_display_api_keys() -> None:
             openai_error = "키가 너무 짧음"
         elif not openai_key.startswith("sk-"):
             openai_error = "잘못된 형식 (sk- 로 시작해야 함)"
-        elif any(pattern in openai_key.lower() for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]):
+        elif any(
+            pattern in openai_key.lower()
+            for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]
+        ):
             openai_error = "테스트/샘플 키 사용됨"
         elif openai_key == "sk-":
             openai_error = "불완전한 키"
         else:
             openai_error = "알 수 없는 문제"
-    
+
     # Anthropic API 키 검증
-    anthropic_key = keys.get('ANTHROPIC_API_KEY', '')
+    anthropic_key = keys.get("ANTHROPIC_API_KEY", "")
     anthropic_valid = is_valid_anthropic_key(anthropic_key)
     anthropic_error = ""
     if not anthropic_valid:
@@ -204,15 +493,18 @@ def check_and_display_api_keys() -> None:
             anthropic_error = "잘못된 형식 (sk-ant로 시작해야 함)"
         elif len(anthropic_key) < 30:
             anthropic_error = "키가 너무 짧음"
-        elif any(pattern in anthropic_key.lower() for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]):
+        elif any(
+            pattern in anthropic_key.lower()
+            for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]
+        ):
             anthropic_error = "테스트/샘플 키 사용됨"
         elif anthropic_key == "sk-ant-api03":
             anthropic_error = "불완전한 키"
         else:
             anthropic_error = "알 수 없는 문제"
-    
+
     # LangSmith API 키 검증
-    langsmith_key = keys.get('LANGSMITH_API_KEY', '')
+    langsmith_key = keys.get("LANGSMITH_API_KEY", "")
     langsmith_valid = is_valid_langsmith_key(langsmith_key)
     langsmith_error = ""
     if not langsmith_valid:
@@ -222,87 +514,98 @@ def check_and_display_api_keys() -> None:
             langsmith_error = "잘못된 형식 (ls_로 시작해야 함)"
         elif len(langsmith_key) < 30:
             langsmith_error = "키가 너무 짧음"
-        elif any(pattern in langsmith_key.lower() for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]):
+        elif any(
+            pattern in langsmith_key.lower()
+            for pattern in ["없음", "your_", "test_", "demo_", "placeholder"]
+        ):
             langsmith_error = "테스트/샘플 키 사용됨"
         else:
             langsmith_error = "알 수 없는 문제"
-    
+
     # 컬러 코드 (터미널에서만 작동)
     GREEN = "\033[92m"  # 초록색
-    RED = "\033[91m"    # 빨간색
-    YELLOW = "\033[93m" # 노란색
-    BLUE = "\033[94m"   # 파란색
-    BOLD = "\033[1m"    # 굵게
-    END = "\033[0m"     # 서식 종료
-    
+    RED = "\033[91m"  # 빨간색
+    YELLOW = "\033[93m"  # 노란색
+    BLUE = "\033[94m"  # 파란색
+    BOLD = "\033[1m"  # 굵게
+    END = "\033[0m"  # 서식 종료
+
     print("\n" + BOLD + "╔══════════════════════════════════════════════════╗" + END)
     print(BOLD + "║              🔑 API 키 상태 확인                 ║" + END)
     print(BOLD + "╚══════════════════════════════════════════════════╝" + END)
-    
+
     # OpenAI 키 상태
     print(f"\n🔹 {BOLD}OpenAI API 키:{END} {mask_api_key(openai_key)}")
     if openai_valid:
         print(f"   {GREEN}✅ 상태: 유효함{END}")
     else:
         print(f"   {RED}❌ 상태: 유효하지 않음 - {openai_error}{END}")
-    
+
     # Anthropic 키 상태
     print(f"\n🔹 {BOLD}Anthropic API 키:{END} {mask_api_key(anthropic_key)}")
     if anthropic_valid:
         print(f"   {GREEN}✅ 상태: 유효함{END}")
     else:
         print(f"   {RED}❌ 상태: 유효하지 않음 - {anthropic_error}{END}")
-    
+
     # LangSmith 키 상태
     print(f"\n🔹 {BOLD}LangSmith API 키:{END} {mask_api_key(langsmith_key)}")
     if langsmith_valid:
         print(f"   {GREEN}✅ 상태: 유효함{END}")
     else:
         print(f"   {YELLOW}⚠️ 상태: 유효하지 않음 - {langsmith_error}{END}")
-    
+
     # 사용 가능한 모델 표시
     print("\n" + BOLD + "╔══════════════════════════════════════════════════╗" + END)
     print(BOLD + "║              🤖 사용 가능한 모델                 ║" + END)
     print(BOLD + "╚══════════════════════════════════════════════════╝" + END)
-    
+
     models_available = False
     if openai_valid:
         models_available = True
         print(f"\n{GREEN}✅ OpenAI 모델{END}")
         print(f"   • {BLUE}GPT-4-TURBO{END} - 고성능 추론")
         print(f"   • {BLUE}GPT-3.5-TURBO{END} - 빠른 응답")
-    
+
     if anthropic_valid:
         models_available = True
         print(f"\n{GREEN}✅ Anthropic 모델{END}")
         print(f"   • {BLUE}CLAUDE-3-7-SONNET{END} - 통합 지능")
         print(f"   • {BLUE}CLAUDE-3-HAIKU{END} - 빠른 응답")
-    
+
     if not models_available:
         print(f"\n{RED}❌ 사용 가능한 모델이 없습니다.{END}")
         print(f"{RED}   API 키를 확인하고 .env 파일에 올바르게 설정하세요.{END}")
-    
+
     # 추가 설정 상태
     print("\n" + BOLD + "╔══════════════════════════════════════════════════╗" + END)
     print(BOLD + "║              ⚙️ 시스템 구성 상태                 ║" + END)
     print(BOLD + "╚══════════════════════════════════════════════════╝" + END)
-    
-    langsmith_endpoint = keys.get('LANGSMITH_ENDPOINT', 'https://api.smith.langchain.com')
-    langsmith_project = keys.get('LANGSMITH_PROJECT', 'langgraph-react-mcp-chat')
-    ssl_verify = keys.get('SSL_VERIFY', True)
-    http2_enabled = keys.get('HTTP2_ENABLED', False)
-    requests_timeout = keys.get('REQUESTS_TIMEOUT', 30)
-    
+
+    langsmith_endpoint = keys.get(
+        "LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"
+    )
+    langsmith_project = keys.get("LANGSMITH_PROJECT", "langgraph-react-mcp-chat")
+    ssl_verify = keys.get("SSL_VERIFY", True)
+    http2_enabled = keys.get("HTTP2_ENABLED", False)
+    requests_timeout = keys.get("REQUESTS_TIMEOUT", 30)
+
     print(f"\n🔹 {BOLD}LangSmith 설정:{END}")
     print(f"   • 엔드포인트: {BLUE}{langsmith_endpoint}{END}")
     print(f"   • 프로젝트: {BLUE}{langsmith_project}{END}")
-    print(f"   • 트레이싱: {GREEN if langsmith_valid else YELLOW}{'활성화됨' if langsmith_valid else '비활성화됨'}{END}")
-    
+    print(
+        f"   • 트레이싱: {GREEN if langsmith_valid else YELLOW}{'활성화됨' if langsmith_valid else '비활성화됨'}{END}"
+    )
+
     print(f"\n🔹 {BOLD}네트워크 설정:{END}")
-    print(f"   • SSL 검증: {GREEN if ssl_verify else YELLOW}{'✅ 사용' if ssl_verify else '⚠️ 비활성화됨'}{END}")
-    print(f"   • HTTP/2: {GREEN if http2_enabled else ''}{'✅ 사용' if http2_enabled else '❌ 사용 안 함'}{END}")
+    print(
+        f"   • SSL 검증: {GREEN if ssl_verify else YELLOW}{'✅ 사용' if ssl_verify else '⚠️ 비활성화됨'}{END}"
+    )
+    print(
+        f"   • HTTP/2: {GREEN if http2_enabled else ''}{'✅ 사용' if http2_enabled else '❌ 사용 안 함'}{END}"
+    )
     print(f"   • 요청 타임아웃: {BLUE}{requests_timeout}초{END}")
-    
+
     print("\n" + BOLD + "═════════════════════════════════════════════════════" + END)
 
 
@@ -312,7 +615,7 @@ def get_langsmith_project() -> str:
     project = os.environ.get("LANGSMITH_PROJECT")
     if project:
         return project
-    
+
     # 기본 프로젝트 이름
     return "langgraph-react-mcp-chat"
 
@@ -321,25 +624,37 @@ def setup_langsmith():
     """LangSmith 관련 설정을 진행합니다."""
     # LangSmith API 키 가져오기
     langsmith_key = get_api_key("LANGSMITH_API_KEY")
-    
+
     # 키가 없거나 자리 표시자면 트레이싱 비활성화
     if not langsmith_key or langsmith_key.startswith("lsv2-placeholder"):
         print("⚠️ 유효한 LangSmith API 키가 없어 트레이싱이 비활성화됩니다.")
         os.environ["LANGCHAIN_TRACING_V2"] = "false"
         os.environ["LANGSMITH_TRACING"] = "false"
         return False
-    
+
     # 환경 변수 설정
     os.environ["LANGSMITH_API_KEY"] = langsmith_key
-    os.environ["LANGSMITH_ENDPOINT"] = os.environ.get("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
+    os.environ["LANGSMITH_ENDPOINT"] = os.environ.get(
+        "LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"
+    )
     os.environ["LANGSMITH_PROJECT"] = get_langsmith_project()
-    
+
+    # 샘플링 모드: SDK 의 전체 트레이싱은 끄고 일부 스레드만 백그라운드로 내보냅니다.
+    from react_agent.tracing import configure_tracing, sample_rate, tracing_mode
+
+    if tracing_mode() == "sampled":
+        configure_tracing()
+        logger.info(
+            f"✅ LangSmith 샘플링 트레이싱 활성화: {os.environ.get('LANGSMITH_PROJECT')} (스레드의 {sample_rate():.0%})"
+        )
+        return True
+
     # 트레이싱 활성화 설정
     tracing_enabled = (
-        os.environ.get("LANGCHAIN_TRACING_V2", "").lower() == "true" or
-        os.environ.get("LANGSMITH_TRACING", "").lower() == "true"
+        os.environ.get("LANGCHAIN_TRACING_V2", "").lower() == "true"
+        or os.environ.get("LANGSMITH_TRACING", "").lower() == "true"
     )
-    
+
     if tracing_enabled:
         print(f"✅ LangSmith 트레이싱 활성화: {os.environ.get('LANGSMITH_PROJECT')}")
         os.environ["LANGCHAIN_TRACING_V2"] = "true"
@@ -356,12 +671,12 @@ def test_langsmith_connection() -> bool:
     """LangSmith 연결을 테스트합니다."""
     if not setup_langsmith():
         return False
-        
+
     try:
-        from langsmith import Client
         import requests
+        from langsmith import Client
         from requests.adapters import HTTPAdapter, Retry
-        
+
         # 연결 타임아웃 설정
         session = requests.Session()
         retry_strategy = Retry(
@@ -372,44 +687,44 @@ def test_langsmith_connection() -> bool:
         adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
-        
+
         # API 키 준비
         api_key = get_api_key("LANGSMITH_API_KEY")
-        api_url = os.environ.get("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
-        
+        api_url = os.environ.get(
+            "LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"
+        )
+
         print(f"\n===== LangSmith 연결 테스트 =====")
         print(f"API URL: {api_url}")
         print(f"API 키: {'설정됨' if api_key else '없음'}")
-        
+
         if not api_key:
             print("⚠️ LangSmith API 키가 설정되지 않았습니다.")
             os.environ["LANGCHAIN_TRACING_V2"] = "false"
             os.environ["LANGSMITH_TRACING"] = "false"
             return False
-        
+
         # 직접 REST API 호출 테스트 (인증 기본 테스트)
         try:
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
-                "Accept": "application/json"
+                "Accept": "application/json",
             }
-            
+
             # 1. GET /runs 호출 (기본 API 호출)
             runs_url = f"{api_url}/runs?limit=1"
             print(f"테스트 1: GET {runs_url}")
-            runs_response = session.get(
-                runs_url,
-                headers=headers,
-                timeout=10
-            )
+            runs_response = session.get(runs_url, headers=headers, timeout=10)
             print(f"응답 코드: {runs_response.status_code}")
-            
+
             if runs_response.status_code in [200, 201]:
                 print("✅ 기본 API 호출 성공")
             else:
-                print(f"⚠️ 기본 API 호출 실패: {runs_response.status_code} - {runs_response.text[:100]}")
-                
+                print(
+                    f"⚠️ 기본 API 호출 실패: {runs_response.status_code} - {runs_response.text[:100]}"
+                )
+
             # 2. 프로젝트 생성 시도 (쓰기 권한 테스트)
             project_name = f"test-project-{int(datetime.now().timestamp())}"
             project_url = f"{api_url}/projects"
@@ -418,25 +733,23 @@ def test_langsmith_connection() -> bool:
                 project_url,
                 headers=headers,
                 json={"name": project_name, "description": "Test project"},
-                timeout=10
+                timeout=10,
             )
             print(f"응답 코드: {project_response.status_code}")
-            
+
             if project_response.status_code in [200, 201]:
                 print("✅ 프로젝트 생성 API 호출 성공")
             else:
-                print(f"⚠️ 프로젝트 생성 API 호출 실패: {project_response.status_code} - {project_response.text[:100]}")
-                
+                print(
+                    f"⚠️ 프로젝트 생성 API 호출 실패: {project_response.status_code} - {project_response.text[:100]}"
+                )
+
             # 테스트 3: Client 객체 사용
             print("테스트 3: LangSmith Client 객체 사용")
             try:
                 # Client 초기화 시 명시적 파라미터 사용
-                client = Client(
-                    api_key=api_key,
-                    api_url=api_url,
-                    timeout_ms=10000
-                )
-                
+                client = Client(api_key=api_key, api_url=api_url, timeout_ms=10000)
+
                 # 프로젝트 목록 조회
                 try:
                     projects = list(client.list_projects(limit=5))
@@ -446,24 +759,27 @@ def test_langsmith_connection() -> bool:
                     print(f"⚠️ 프로젝트 목록 조회 실패: {str(e)}")
             except Exception as e:
                 print(f"⚠️ Client 초기화 실패: {str(e)}")
-                
+
             # 어느 정도 성공했다면 트레이싱 활성화
-            if runs_response.status_code in [200, 201] or project_response.status_code in [200, 201]:
+            if runs_response.status_code in [
+                200,
+                201,
+            ] or project_response.status_code in [200, 201]:
                 print("✅ 부분적으로 API 호출 성공. 트레이싱 활성화")
                 return True
-                
+
             # 모든 테스트 실패
             print("⚠️ 모든 LangSmith API 테스트 실패")
             os.environ["LANGCHAIN_TRACING_V2"] = "false"
             os.environ["LANGSMITH_TRACING"] = "false"
             return False
-                
+
         except Exception as e:
             print(f"⚠️ API 직접 호출 실패: {str(e)}")
             os.environ["LANGCHAIN_TRACING_V2"] = "false"
             os.environ["LANGSMITH_TRACING"] = "false"
             return False
-            
+
     except ImportError:
         print("⚠️ LangSmith 라이브러리가 설치되지 않았습니다.")
         os.environ["LANGCHAIN_TRACING_V2"] = "false"
@@ -473,10 +789,10 @@ def test_langsmith_connection() -> bool:
         print(f"⚠️ LangSmith 연결 테스트 중 오류 발생: {str(e)}")
         os.environ["LANGCHAIN_TRACING_V2"] = "false"
         os.environ["LANGSMITH_TRACING"] = "false"
-        return False 
+        return False
 
 
 if __name__ == "__main__":
     # 로깅 설정
     logging.basicConfig(level=logging.INFO)
-    check_and_display_api_keys() 
\ No newline at end of file
+    check_and_display_api_keys()
@@ -0,0 +1,217 @@
+"""Per-run budgets for model steps, tool calls, wall-clock time, tokens and cost.
+
+A run is the part of the conversation after the latest human message. The
+budget is checked by the model node before and after each model call (and by
+the nested agent loop after each step). When a limit is reached the run ends
+with a partial answer instead of an exception.
+
+LangGraph's own step limit (`recursion_limit` of the run config, 25 by default)
+is enforced the same way: the model node stops when the graph has too few steps
+left to run the requested tools (see `out_of_graph_steps`), so whichever of the
+two limits is lower ends the run with a partial answer.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+from langchain_core.messages import AIMessage, AnyMessage
+
+from react_agent.accounting import message_cost
+from react_agent.configuration import Configuration
+from react_agent.messages import CompactMessage, as_langchain_message
+from react_agent.utils import get_message_text
+
+
+@dataclass(frozen=True)
+class RunBudget:
+    """Limits for a single run. A limit of `0` means unlimited."""
+
+    max_steps: int = 0
+    max_tool_calls: int = 0
+    max_seconds: float = 0.0
+    max_tokens: int = 0
+    max_cost: float = 0.0
+
+    @classmethod
+    def from_configuration(cls, configuration: Configuration) -> RunBudget:
+        """Create the budget described by a `Configuration`."""
+        return cls(
+            max_steps=configuration.recursion_limit,
+            max_tool_calls=configuration.max_tool_calls,
+            max_seconds=configuration.max_run_seconds,
+            max_tokens=configuration.max_run_tokens,
+            max_cost=configuration.max_run_cost,
+        )
+
+
+@dataclass(frozen=True)
+class RunUsage:
+    """What a run has consumed so far."""
+
+    steps: int = 0
+    tool_calls: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    cost: float = 0.0
+
+
+def _role(message: AnyMessage | CompactMessage) -> str:
+    if isinstance(message, CompactMessage):
+        return message.role
+    return message.type
+
+
+def _tokens(message: AnyMessage | CompactMessage) -> int:
+    if isinstance(message, CompactMessage):
+        usage = (message.extra or {}).get("usage_metadata")
+    else:
+        usage = getattr(message, "usage_metadata", None)
+    return int(usage.get("total_tokens", 0)) if usage else 0
+
+
+def measure_run(
+    messages: Sequence[AnyMessage | CompactMessage],
+    started_at: float,
+    now: float | None = None,
+) -> RunUsage:
+    """Measure the usage of the current run from the conversation messages.
+
+    Args:
+        messages: The conversation, in order.
+        started_at: Wall-clock time (`time.time()`) at which the run started.
+        now: The current wall-clock time. Defaults to `time.time()`.
+    """
+    start = 0
+    for i in range(len(messages) - 1, -1, -1):
+        if _role(messages[i]) == "human":
+            start = i + 1
+            break
+    steps = tool_calls = tokens = 0
+    cost = 0.0
+    for message in messages[start:]:
+        role = _role(message)
+        if role == "ai":
+            steps += 1
+            tokens += _tokens(message)
+            cost += message_cost(message)
+        elif role == "tool":
+            tool_calls += 1
+    now = time.time() if now is None else now
+    return RunUsage(
+        steps=steps,
+        tool_calls=tool_calls,
+        tokens=tokens,
+        seconds=max(0.0, now - started_at) if started_at else 0.0,
+        cost=cost,
+    )
+
+
+def exceeded(
+    budget: RunBudget, usage: RunUsage, pending_tool_calls: int = 0
+) -> str | None:
+    """Return which limit is exhausted, or `None` if the run may continue.
+
+    Args:
+        budget: The limits of the run.
+        usage: The usage so far.
+        pending_tool_calls: Tool calls the next step is about to make.
+    """
+    if budget.max_steps and usage.steps >= budget.max_steps:
+        return "steps"
+    if (
+        budget.max_tool_calls
+        and usage.tool_calls + pending_tool_calls > budget.max_tool_calls
+    ):
+        return "tool calls"
+    if budget.max_seconds and usage.seconds >= budget.max_seconds:
+        return "time"
+    if budget.max_tokens and usage.tokens >= budget.max_tokens:
+        return "tokens"
+    if budget.max_cost and usage.cost >= budget.max_cost:
+        return "cost"
+    return None
+
+
+def should_stop(
+    budget: RunBudget,
+    messages: Sequence[AnyMessage | CompactMessage],
+    started_at: float,
+) -> str | None:
+    """Check the budget before the run takes its next step.
+
+    A run whose latest message is a final model answer (no tool calls) is done
+    and never stopped. Otherwise the tool calls requested by the latest message
+    count against the tool call limit.
+
+    Returns:
+        Optional[str]: The exhausted limit, or `None` if the run may continue.
+    """
+    pending_tool_calls = 0
+    if messages and _role(messages[-1]) == "ai":
+        last = as_langchain_message(messages[-1])
+        pending_tool_calls = len(getattr(last, "tool_calls", None) or ())
+        if not pending_tool_calls:
+            return None
+    return exceeded(budget, measure_run(messages, started_at), pending_tool_calls)
+
+
+# `create_react_agent` 가 단계가 모자랄 때 모델 응답 대신 넣는 메시지입니다.
+PREBUILT_OUT_OF_STEPS = "Sorry, need more steps to process this request."
+
+
+def out_of_graph_steps(
+    remaining_steps: int, message: AnyMessage | CompactMessage
+) -> bool:
+    """Return whether the graph cannot run the tools `message` asks for.
+
+    A tool call takes two more graph steps (the tool node, then the model node
+    with the tool results), and the graph raises `GraphRecursionError` unless a
+    step is still left once the model node has answered, so the run has to end
+    when fewer than three are left. A nested prebuilt agent that ran out of
+    steps answers with `PREBUILT_OUT_OF_STEPS`, which counts as running out too.
+    """
+    if _role(message) != "ai":
+        return False
+    last = as_langchain_message(message)
+    if getattr(last, "tool_calls", None):
+        return remaining_steps < 3
+    return last.content == PREBUILT_OUT_OF_STEPS
+
+
+def is_new_run(messages: Sequence[AnyMessage | CompactMessage]) -> bool:
+    """Return whether the latest message starts a new run."""
+    return bool(messages) and _role(messages[-1]) == "human"
+
+
+def partial_answer(
+    messages: Sequence[AnyMessage | CompactMessage], reason: str, id: str | None = None
+) -> AIMessage:
+    """Build the final answer of a run that ran out of budget.
+
+    The latest text the model produced in this run, if any, is kept so the user
+    still gets the partial result.
+    """
+    partial = ""
+    for message in reversed(messages):
+        role = _role(message)
+        if role == "human":
+            break
+        if role == "ai":
+            text = get_message_text(as_langchain_message(message))
+            if text:
+                partial = text
+                break
+    if partial:
+        content = (
+            f"I had to stop before finishing because this run reached its {reason} limit. "
+            f"Here is what I have so far:\n\n{partial}"
+        )
+    else:
+        content = (
+            "Sorry, I could not find an answer to your question within this run's "
+            f"{reason} limit."
+        )
+    return AIMessage(id=id, content=content)
@@ -0,0 +1,475 @@
+"""Record and replay the model requests and MCP tool calls of the agent.
+
+In record mode every chat model response and every MCP tool call (including
+the tool schemas the servers published) is captured into a cassette file. In
+replay mode the cassette serves them back: no API key, network connection or
+MCP server process is needed, and the real graph code runs under
+`graph.ainvoke` exactly as it did while recording. That makes runs
+deterministic and lets profiles attribute time to the agent's own overhead.
+
+Requests are matched by content (message types, text and tool calls, and the
+names of the bound tools; tool name and arguments for MCP calls), and repeated
+identical requests are served in the order they were recorded. Replayed calls
+take as long as they did when recorded, or no time at all.
+
+MCP tool calls are recorded with their full text and their artifact (the
+non-text content such as images and embedded resources). Oversized outputs are
+offloaded after the cassette (see `react_agent.tool_outputs`), so a replayed
+call is offloaded again under the same handle and `read_tool_output` pages
+through it as it did while recording.
+
+Settings (environment variables):
+
+- `CASSETTE_MODE`: `record`, `replay` or `off` (default).
+- `CASSETTE_PATH`: the cassette file (default `agent.cassette.json`; a `.gz`
+  suffix compresses it). Recordings are written when the process exits.
+- `CASSETTE_LATENCY`: `original` (default) or `zero`.
+
+Tests and benchmarks can use `use_cassette(path, mode)` instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableBinding
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+
+logger = logging.getLogger(__name__)
+
+Mode = Literal["record", "replay"]
+Latency = Literal["original", "zero"]
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was not recorded."""
+
+
+def _digest(value: Any) -> str:
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:24]
+
+
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?"
+)
+
+
+def model_request_key(
+    messages: Sequence[BaseMessage], tools: Sequence[Any] = ()
+) -> str:
+    """Return the key matching a model request to its recorded response.
+
+    Message ids are left out because they are generated anew on every run, and
+    timestamps (such as the system time in the system prompt) are masked.
+    """
+    return _digest(
+        [
+            [
+                m.type,
+                _TIMESTAMP.sub("<time>", m.content)
+                if isinstance(m.content, str)
+                else m.content,
+                [[c["name"], c["args"]] for c in getattr(m, "tool_calls", None) or []],
+            ]
+            for m in messages
+        ]
+        + [sorted(_tool_name(t) for t in tools)]
+    )
+
+
+def tool_call_key(name: str, arguments: Dict[str, Any]) -> str:
+    """Return the key matching an MCP tool call to its recorded result."""
+    return _digest([name, arguments])
+
+
+def _tool_name(tool: Any) -> str:
+    if isinstance(tool, dict):
+        return str(tool.get("name") or tool.get("function", {}).get("name", ""))
+    return str(getattr(tool, "name", tool))
+
+
+class Cassette:
+    """Model responses, MCP tool results and tool schemas of recorded runs.
+
+    Args:
+        path: The cassette file.
+        mode: `record` captures calls; `replay` serves them from the file.
+        latency: Replay with the `original` recorded durations or `zero` latency.
+    """
+
+    def __init__(self, path: str, mode: Mode, latency: Latency = "original") -> None:
+        """Open the cassette at `path`, loading its entries when replaying."""
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.tools: Dict[str, List[Dict[str, Any]]] = {}
+        self.model: BaseChatModel | None = None
+        self.replayed_tools: Dict[str, List[BaseTool]] = {}
+        self._model: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._tool_calls: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    # 파일 형식: {"tools": {설정 키: [스키마]}, "model": {요청 키: [응답]}, "tool_calls": {호출 키: [결과]}}
+    def _load(self) -> None:
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.tools = data.get("tools", {})
+        for key, entries in data.get("model", {}).items():
+            self._model[key].extend(entries)
+        for key, entries in data.get("tool_calls", {}).items():
+            self._tool_calls[key].extend(entries)
+
+    def save(self) -> None:
+        """Write the recorded calls to `path`."""
+        with self._lock:
+            data = {
+                "tools": self.tools,
+                "model": {k: list(v) for k, v in self._model.items()},
+                "tool_calls": {k: list(v) for k, v in self._tool_calls.items()},
+            }
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"카세트를 저장했습니다: {self.path}")
+
+    def record_model(self, key: str, message: BaseMessage, seconds: float) -> None:
+        """Record the response to a model request."""
+        with self._lock:
+            self._model[key].append(
+                {"message": message_to_dict(message), "seconds": seconds}
+            )
+
+    def record_tool_call(self, key: str, entry: Dict[str, Any]) -> None:
+        """Record the result (or error) of an MCP tool call."""
+        with self._lock:
+            self._tool_calls[key].append(entry)
+
+    def record_tools(self, config_key: str, tools: Sequence[BaseTool]) -> None:
+        """Record the schemas of the tools published for an MCP configuration."""
+        with self._lock:
+            self.tools[config_key] = [
+                {
+                    "name": t.name,
+                    "description": t.description,
+                    "args_schema": _schema(t),
+                }
+                for t in tools
+            ]
+
+    def next_model(self, key: str) -> Dict[str, Any]:
+        """Return the next recorded response to a model request."""
+        return self._next(self._model, key, "model request")
+
+    def next_tool_call(self, key: str) -> Dict[str, Any]:
+        """Return the next recorded result of an MCP tool call."""
+        return self._next(self._tool_calls, key, "tool call")
+
+    def _next(
+        self, entries: Dict[str, Deque[Dict[str, Any]]], key: str, kind: str
+    ) -> Dict[str, Any]:
+        with self._lock:
+            queue = entries.get(key)
+            if not queue:
+                raise CassetteMiss(f"{self.path}: no recorded {kind} matches {key}")
+            # 마지막 기록은 남겨 두어, 같은 요청이 기록보다 많이 와도 같은 응답을 돌려줍니다.
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def delay(self, seconds: float) -> float:
+        """Return how long to hold a replayed call that took `seconds` when recorded."""
+        return seconds if self.latency == "original" and seconds > 0 else 0.0
+
+    async def wait(self, seconds: float) -> None:
+        """Sleep for a replayed call's recorded duration, unless latency is `zero`."""
+        if self.delay(seconds):
+            await asyncio.sleep(seconds)
+
+
+def _schema(tool: BaseTool) -> Dict[str, Any]:
+    schema = tool.args_schema
+    if isinstance(schema, dict):
+        return schema
+    return tool.tool_call_schema.model_json_schema() if schema is not None else {}
+
+
+class CassetteChatModel(BaseChatModel):
+    """A chat model that records the responses of `inner`, or replays them.
+
+    While recording, `inner` is called within this model's own run, and the
+    run reports the invocation params of `inner`, so callbacks label the call
+    with the real model and traces keep its streamed tokens.
+    """
+
+    cassette: Any
+    inner: BaseChatModel | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type if self.inner is not None else "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params if self.inner is not None else {}
+
+    def _get_invocation_params(
+        self, stop: List[str] | None = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        if self.inner is None:
+            return super()._get_invocation_params(stop=stop, **kwargs)
+        return self.inner._get_invocation_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        """Send `tools` with each call; the inner model binds them when recording."""
+        return self.bind(tools=list(tools), **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key, model, call_kwargs = self._prepare(messages, kwargs)
+        if model is None:
+            entry = self.cassette.next_model(key)
+            time.sleep(self.cassette.delay(entry["seconds"]))
+            return _replayed_result(entry)
+        started = time.perf_counter()
+        result = model._generate(messages, stop, run_manager, **call_kwargs)
+        return self._record(key, result, started)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key, model, call_kwargs = self._prepare(messages, kwargs)
+        if model is None:
+            entry = self.cassette.next_model(key)
+            await self.cassette.wait(entry["seconds"])
+            return _replayed_result(entry)
+        started = time.perf_counter()
+        result = await model._agenerate(messages, stop, run_manager, **call_kwargs)
+        return self._record(key, result, started)
+
+    def _prepare(
+        self, messages: List[BaseMessage], kwargs: Dict[str, Any]
+    ) -> Tuple[str, BaseChatModel | None, Dict[str, Any]]:
+        """Return the request key, and the model and kwargs to record from (none when replaying)."""
+        tools = kwargs.pop("tools", None) or []
+        key = model_request_key(messages, tools)
+        if self.cassette.mode == "replay":
+            return key, None, {}
+        assert self.inner is not None
+        if not tools:
+            return key, self.inner, kwargs
+        # 도구 스키마 변환은 실제 모델의 bind_tools 에 맡기고, 그 결과 인자로 모델을 직접 호출합니다.
+        bound = self.inner.bind_tools(tools, **kwargs)
+        if isinstance(bound, RunnableBinding):
+            return key, cast(BaseChatModel, bound.bound), dict(bound.kwargs)
+        return key, cast(BaseChatModel, bound), {}
+
+    def _record(self, key: str, result: ChatResult, started: float) -> ChatResult:
+        message = result.generations[0].message
+        self.cassette.record_model(key, message, time.perf_counter() - started)
+        return ChatResult(
+            generations=[ChatGeneration(message=message)], llm_output=result.llm_output
+        )
+
+
+def _replayed_result(entry: Dict[str, Any]) -> ChatResult:
+    message = messages_from_dict([entry["message"]])[0]
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def record_tool_calls(tool: BaseTool) -> BaseTool:
+    """Wrap an MCP tool so that its results are recorded into the active cassette."""
+    call = tool.coroutine  # type: ignore[attr-defined]
+
+    @functools.wraps(call)
+    async def call_tool(**arguments: Any) -> Any:
+        cassette = _active
+        if cassette is None or cassette.mode != "record":
+            return await call(**arguments)
+        key = tool_call_key(tool.name, arguments)
+        started = time.perf_counter()
+        try:
+            content, artifact = await call(**arguments)
+        except ToolException as e:
+            cassette.record_tool_call(
+                key, {"error": str(e), "seconds": time.perf_counter() - started}
+            )
+            raise
+        # 출력 보관(offload)보다 안쪽에서 기록하므로 잘리기 전의 전체 텍스트가 남습니다.
+        cassette.record_tool_call(
+            key,
+            {
+                "content": content,
+                "artifact": _dump_artifact(artifact),
+                "seconds": time.perf_counter() - started,
+            },
+        )
+        return content, artifact
+
+    tool.coroutine = call_tool  # type: ignore[attr-defined]
+    return tool
+
+
+def _dump_artifact(artifact: Any) -> Any:
+    if artifact is None:
+        return None
+    return [
+        a.model_dump(mode="json") if hasattr(a, "model_dump") else a for a in artifact
+    ]
+
+
+def _load_artifact(data: Any) -> Any:
+    if data is None:
+        return None
+    from mcp.types import Content
+    from pydantic import TypeAdapter
+
+    adapter: TypeAdapter[Any] = TypeAdapter(Content)
+    return [adapter.validate_python(a) if isinstance(a, dict) else a for a in data]
+
+
+def replay_tools(config_key: str) -> List[BaseTool]:
+    """Rebuild the MCP tools of a configuration from the active cassette."""
+    cassette = _require_active()
+    schemas = cassette.tools.get(config_key)
+    if schemas is None:
+        raise CassetteMiss(
+            f"{cassette.path}: no recorded MCP tools for this configuration"
+        )
+    return [_replayed_tool(cassette, schema) for schema in schemas]
+
+
+def _replayed_tool(cassette: Cassette, schema: Dict[str, Any]) -> BaseTool:
+    name = schema["name"]
+
+    async def call_tool(**arguments: Any) -> Any:
+        entry = cassette.next_tool_call(tool_call_key(name, arguments))
+        await cassette.wait(entry["seconds"])
+        if "error" in entry:
+            raise ToolException(entry["error"])
+        return entry["content"], _load_artifact(entry.get("artifact"))
+
+    return StructuredTool(
+        name=name,
+        description=schema["description"],
+        args_schema=schema["args_schema"],
+        coroutine=call_tool,
+        response_format="content_and_artifact",
+    )
+
+
+_active: Cassette | None = None
+
+
+def _require_active() -> Cassette:
+    if _active is None:
+        raise RuntimeError("no cassette is active")
+    return _active
+
+
+def active() -> Cassette | None:
+    """Return the active cassette, loading it from the environment on first use."""
+    global _active, _env_checked
+    if not _env_checked:
+        _env_checked = True
+        mode = os.getenv("CASSETTE_MODE", "off")
+        if mode in ("record", "replay"):
+            latency = "zero" if os.getenv("CASSETTE_LATENCY") == "zero" else "original"
+            _active = Cassette(
+                os.getenv("CASSETTE_PATH", "agent.cassette.json"),
+                mode,
+                latency,  # type: ignore[arg-type]
+            )
+            if mode == "record":
+                atexit.register(_active.save)
+            logger.info(f"카세트 {mode} 모드: {_active.path}")
+    return _active
+
+
+_env_checked = False
+
+
+def recording() -> bool:
+    """Whether calls are being recorded."""
+    cassette = active()
+    return cassette is not None and cassette.mode == "record"
+
+
+def replaying() -> bool:
+    """Whether calls are served from a cassette."""
+    cassette = active()
+    return cassette is not None and cassette.mode == "replay"
+
+
+def wrap_model(model: BaseChatModel) -> BaseChatModel:
+    """Return `model` wrapped for recording, or unchanged when not recording."""
+    cassette = active()
+    if cassette is None or cassette.mode != "record":
+        return model
+    return CassetteChatModel(cassette=cassette, inner=model)
+
+
+def replay_model() -> BaseChatModel:
+    """Return the chat model that serves responses from the active cassette."""
+    cassette = _require_active()
+    # 같은 모델 객체를 돌려주어야 컴파일한 에이전트 캐시가 재사용됩니다.
+    if cassette.model is None:
+        cassette.model = CassetteChatModel(cassette=cassette)
+    return cassette.model
+
+
+@contextmanager
+def use_cassette(
+    path: str, mode: Mode, latency: Latency = "original"
+) -> Iterator[Cassette]:
+    """Activate a cassette for the duration of the block; save it if recording."""
+    global _active, _env_checked
+    previous, previous_checked = _active, _env_checked
+    cassette = Cassette(path, mode, latency)
+    _active, _env_checked = cassette, True
+    try:
+        yield cassette
+    finally:
+        _active, _env_checked = previous, previous_checked
+        if mode == "record":
+            cassette.save()
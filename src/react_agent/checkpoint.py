@@ -0,0 +1,526 @@
+"""Checkpointers used by the agent graphs.
+
+`ArchivingMemorySaver` is an in-memory checkpointer that moves threads which
+have not been touched for a while out of the Python heap. Their checkpoints,
+pending writes and channel blobs are appended to segment files and read back
+through `mmap` the next time the thread is used.
+
+It also supports copy-on-write forks: `fork_thread` creates a new thread that
+references the checkpoint lineage of its parent instead of copying it.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import uuid
+import weakref
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from react_agent.metrics import CHECKPOINT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class _Segment:
+    """An append-only segment file that is read through `mmap`."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = 0
+        self.live = 0
+        self._file = open(path, "a+b")
+        self._map: mmap.mmap | None = None
+
+    def append(self, data: bytes) -> int:
+        offset = self.size
+        self._file.write(data)
+        self._file.flush()
+        self.size += len(data)
+        self.live += 1
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        # 매핑 이후에 덧붙여진 레코드를 읽을 때만 다시 매핑합니다.
+        if self._map is None or len(self._map) < offset + length:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(
+                self._file.fileno(), self.size, access=mmap.ACCESS_READ
+            )
+        return self._map[offset : offset + length]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class ArchivingMemorySaver(MemorySaver):
+    """A `MemorySaver` that archives idle threads to memory-mapped segment files.
+
+    A thread that has not been read or written for `idle_seconds` is serialized
+    into the current segment file and removed from the in-memory dictionaries.
+    An index keeps the segment and offset of each archived thread, so the
+    thread is paged back in lazily on its next access. Segments are append-only;
+    a segment file is removed once none of its records are referenced anymore.
+
+    A forked thread stores only the checkpoints and channel values written after
+    the fork. Everything up to the fork point is read from the parent thread.
+
+    Args:
+        archive_dir: Directory for the segment files. A private temporary
+            directory is created inside it (or in the system temp directory).
+        idle_seconds: Idle time after which a thread is archived. `0` disables
+            archiving.
+        sweep_interval: Minimum number of seconds between two idle sweeps.
+        segment_max_bytes: Size after which a new segment file is started.
+    """
+
+    def __init__(
+        self,
+        *,
+        archive_dir: str | None = None,
+        idle_seconds: float = 1800.0,
+        sweep_interval: float = 60.0,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        **kwargs: Any,
+    ) -> None:
+        """Create the saver and its private segment directory."""
+        super().__init__(**kwargs)
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.segment_max_bytes = segment_max_bytes
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        self.archive_dir = tempfile.mkdtemp(
+            prefix="react-agent-checkpoints-", dir=archive_dir
+        )
+        self._segments: Dict[int, _Segment] = {}
+        self._current_segment = -1
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._last_access: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        # child thread_id -> (parent thread_id, checkpoint_id of the fork point)
+        self._forks: Dict[str, Tuple[str, str]] = {}
+        self._finalizer = weakref.finalize(
+            self, _remove_archive, self._segments, self.archive_dir
+        )
+
+    # ------------------------------------------------------------------
+    # Archival
+    # ------------------------------------------------------------------
+
+    @property
+    def archived_threads(self) -> int:
+        """Return the number of threads currently held in segment files."""
+        return len(self._index)
+
+    def _touch(self, thread_id: str) -> None:
+        # 포크된 스레드는 부모 계보까지 함께 메모리에 올려 둡니다.
+        now = time.monotonic()
+        current: str | None = thread_id
+        while current is not None:
+            self._ensure_loaded(current)
+            self._last_access[current] = now
+            fork = self._forks.get(current)
+            current = fork[0] if fork else None
+
+    def _segment_for_append(self) -> Tuple[int, _Segment]:
+        segment = self._segments.get(self._current_segment)
+        if segment is None or segment.size >= self.segment_max_bytes:
+            self._current_segment += 1
+            path = os.path.join(
+                self.archive_dir, f"segment-{self._current_segment:05d}.seg"
+            )
+            segment = _Segment(path)
+            self._segments[self._current_segment] = segment
+        return self._current_segment, segment
+
+    def _release(self, segment_no: int) -> None:
+        segment = self._segments[segment_no]
+        segment.live -= 1
+        if segment.live == 0 and segment_no != self._current_segment:
+            segment.close()
+            os.remove(segment.path)
+            del self._segments[segment_no]
+
+    def archive_thread(self, thread_id: str) -> bool:
+        """Move a thread from the heap into the current segment file.
+
+        Returns:
+            bool: Whether anything was archived.
+        """
+        if thread_id in self._index:
+            return False
+        self._last_access.pop(thread_id, None)
+        # 조회만 된 스레드는 defaultdict에 빈 항목만 남기므로 보관할 내용이 없습니다.
+        checkpoints_by_ns = self.storage.pop(thread_id, None)
+        if not checkpoints_by_ns:
+            return False
+        storage = {
+            ns: dict(checkpoints) for ns, checkpoints in checkpoints_by_ns.items()
+        }
+        writes = {
+            k: self.writes.pop(k) for k in [k for k in self.writes if k[0] == thread_id]
+        }
+        blobs = {
+            k: self.blobs.pop(k) for k in [k for k in self.blobs if k[0] == thread_id]
+        }
+        record = pickle.dumps(
+            (storage, writes, blobs), protocol=pickle.HIGHEST_PROTOCOL
+        )
+        segment_no, segment = self._segment_for_append()
+        offset = segment.append(record)
+        self._index[thread_id] = (segment_no, offset, len(record))
+        return True
+
+    def _ensure_loaded(self, thread_id: str) -> None:
+        location = self._index.pop(thread_id, None)
+        if location is None:
+            return
+        segment_no, offset, length = location
+        storage, writes, blobs = pickle.loads(
+            self._segments[segment_no].read(offset, length)
+        )
+        for ns, checkpoints in storage.items():
+            self.storage[thread_id][ns].update(checkpoints)
+        for k, v in writes.items():
+            self.writes[k].update(v)
+        self.blobs.update(blobs)
+        self._release(segment_no)
+        logger.debug(f"보관된 스레드를 메모리로 불러왔습니다: {thread_id}")
+
+    def archive_idle(self, now: float | None = None) -> int:
+        """Archive every thread that has been idle for at least `idle_seconds`.
+
+        Returns:
+            int: The number of threads that were archived.
+        """
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        idle = [
+            thread_id
+            for thread_id, last_access in self._last_access.items()
+            if now - last_access >= self.idle_seconds
+        ]
+        archived = sum(self.archive_thread(thread_id) for thread_id in idle)
+        if archived:
+            logger.info(f"유휴 스레드 {archived}개를 세그먼트 파일로 보관했습니다.")
+        return archived
+
+    def _maybe_sweep(self) -> None:
+        if (
+            self.idle_seconds
+            and time.monotonic() - self._last_sweep >= self.sweep_interval
+        ):
+            self.archive_idle()
+
+    # ------------------------------------------------------------------
+    # Forking
+    # ------------------------------------------------------------------
+
+    def fork_thread(
+        self, config: RunnableConfig, new_thread_id: str | None = None
+    ) -> RunnableConfig:
+        """Create a new thread that branches off an existing checkpoint.
+
+        The new thread only records a reference to the parent's checkpoint
+        lineage, so forking takes constant time and memory regardless of how
+        long the parent thread is.
+
+        Args:
+            config: Config of the parent thread. If it contains a `checkpoint_id`
+                the fork starts there, otherwise at the latest checkpoint.
+            new_thread_id: Thread ID for the fork. A random UUID by default.
+
+        Returns:
+            RunnableConfig: The config of the forked thread at the fork point.
+
+        Raises:
+            ValueError: If the parent checkpoint does not exist or the new thread
+                ID is already in use.
+        """
+        parent_thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        new_thread_id = new_thread_id or str(uuid.uuid4())
+        if (
+            new_thread_id in self.storage
+            or new_thread_id in self._index
+            or new_thread_id in self._forks
+        ):
+            raise ValueError(f"Thread already exists: {new_thread_id}")
+        self._touch(parent_thread_id)
+        checkpoint_id = get_checkpoint_id(config) or self._latest_checkpoint_id(
+            parent_thread_id, checkpoint_ns
+        )
+        if checkpoint_id is None or not self._has_checkpoint(
+            parent_thread_id, checkpoint_ns, checkpoint_id
+        ):
+            raise ValueError(
+                f"No checkpoint to fork from in thread: {parent_thread_id}"
+            )
+        self._forks[new_thread_id] = (parent_thread_id, checkpoint_id)
+        self._last_access[new_thread_id] = time.monotonic()
+        return {
+            "configurable": {
+                "thread_id": new_thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def afork_thread(
+        self, config: RunnableConfig, new_thread_id: str | None = None
+    ) -> RunnableConfig:
+        """Asynchronous version of fork_thread."""
+        return self.fork_thread(config, new_thread_id)
+
+    def _latest_checkpoint_id(
+        self, thread_id: str, checkpoint_ns: str, cutoff: str | None = None
+    ) -> str | None:
+        checkpoints = (
+            self.storage[thread_id][checkpoint_ns] if thread_id in self.storage else {}
+        )
+        own = [cid for cid in checkpoints if cutoff is None or cid <= cutoff]
+        if own:
+            return max(own)
+        fork = self._forks.get(thread_id)
+        if fork is None:
+            return None
+        parent_thread_id, fork_id = fork
+        return self._latest_checkpoint_id(
+            parent_thread_id,
+            checkpoint_ns,
+            fork_id if cutoff is None else min(cutoff, fork_id),
+        )
+
+    def _has_checkpoint(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> bool:
+        if (
+            thread_id in self.storage
+            and checkpoint_id in self.storage[thread_id][checkpoint_ns]
+        ):
+            return True
+        fork = self._forks.get(thread_id)
+        return (
+            fork is not None
+            and checkpoint_id <= fork[1]
+            and self._has_checkpoint(fork[0], checkpoint_ns, checkpoint_id)
+        )
+
+    def _relabel(
+        self, saved: CheckpointTuple, thread_id: str, checkpoint_ns: str
+    ) -> CheckpointTuple:
+        """Present a checkpoint inherited from a parent as part of `thread_id`."""
+        checkpoint_id = saved.config["configurable"]["checkpoint_id"]
+        pending_writes = saved.pending_writes
+        if checkpoint_id == self._forks[thread_id][1]:
+            # 포크 지점 이후의 작업은 자식 스레드의 것만 사용합니다.
+            own_writes = self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            pending_writes = [
+                (task_id, c, self.serde.loads_typed(v))
+                for task_id, c, v, _ in own_writes.values()
+            ]
+        return saved._replace(
+            config={
+                "configurable": {**saved.config["configurable"], "thread_id": thread_id}
+            },
+            parent_config=(
+                {
+                    "configurable": {
+                        **saved.parent_config["configurable"],
+                        "thread_id": thread_id,
+                    }
+                }
+                if saved.parent_config
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def _get_inherited_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id: str = config["configurable"]["thread_id"]
+        fork = self._forks.get(thread_id)
+        if fork is None:
+            return None
+        parent_thread_id, fork_id = fork
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config) or self._latest_checkpoint_id(
+            parent_thread_id, checkpoint_ns, fork_id
+        )
+        if checkpoint_id is None or checkpoint_id > fork_id:
+            return None
+        saved = self.get_tuple(
+            {
+                "configurable": {
+                    "thread_id": parent_thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+        )
+        return self._relabel(saved, thread_id, checkpoint_ns) if saved else None
+
+    def _list_lineage(
+        self,
+        config: RunnableConfig,
+        filter: Dict[str, Any] | None,
+        before: RunnableConfig | None,
+        limit: int | None,
+    ) -> Iterator[CheckpointTuple]:
+        thread_id: str = config["configurable"]["thread_id"]
+        parent_thread_id, fork_id = self._forks[thread_id]
+        parent_config: RunnableConfig = {
+            "configurable": {**config["configurable"], "thread_id": parent_thread_id}
+        }
+        own = MemorySaver.list(self, config, filter=filter, before=before)
+        inherited = (
+            self._relabel(
+                saved, thread_id, saved.config["configurable"]["checkpoint_ns"]
+            )
+            for saved in self.list(parent_config, filter=filter, before=before)
+            if saved.config["configurable"]["checkpoint_id"] <= fork_id
+        )
+        for count, saved in enumerate(itertools.chain(own, inherited)):
+            if limit is not None and count >= limit:
+                return
+            yield saved
+
+    def _detach_children(self, thread_id: str) -> None:
+        """Copy what the forks of `thread_id` still reference before it is deleted."""
+        children: List[str] = [c for c, (p, _) in self._forks.items() if p == thread_id]
+        for child in children:
+            self._touch(child)
+            fork_id = self._forks[child][1]
+            for checkpoint_ns, checkpoints in self.storage[thread_id].items():
+                for checkpoint_id, saved in checkpoints.items():
+                    if checkpoint_id <= fork_id:
+                        self.storage[child][checkpoint_ns].setdefault(
+                            checkpoint_id, saved
+                        )
+            for (t, checkpoint_ns, checkpoint_id), writes in list(self.writes.items()):
+                if t == thread_id and checkpoint_id < fork_id:
+                    self.writes.setdefault(
+                        (child, checkpoint_ns, checkpoint_id), dict(writes)
+                    )
+            for (t, checkpoint_ns, channel, version), blob in list(self.blobs.items()):
+                if t == thread_id:
+                    self.blobs.setdefault(
+                        (child, checkpoint_ns, channel, version), blob
+                    )
+            grandparent = self._forks.get(thread_id)
+            if grandparent is None:
+                del self._forks[child]
+            else:
+                # 자식은 부모의 포크 지점과 자신의 포크 지점 중 앞선 곳까지만 조부모를 물려받습니다.
+                self._forks[child] = (grandparent[0], min(fork_id, grandparent[1]))
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver
+    # ------------------------------------------------------------------
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        channel_values = super()._load_blobs(thread_id, checkpoint_ns, versions)
+        fork = self._forks.get(thread_id)
+        if fork is not None:
+            # 포크 이후에 바뀌지 않은 채널 값은 부모 스레드에서 읽습니다.
+            missing = {
+                k: v
+                for k, v in versions.items()
+                if (thread_id, checkpoint_ns, k, v) not in self.blobs
+            }
+            if missing:
+                channel_values.update(self._load_blobs(fork[0], checkpoint_ns, missing))
+        return channel_values
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get a checkpoint tuple, paging the thread in if it was archived."""
+        with CHECKPOINT_SECONDS.time(op="get"):
+            self._touch(config["configurable"]["thread_id"])
+            return super().get_tuple(config) or self._get_inherited_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, paging archived threads in as needed."""
+        if config:
+            self._touch(config["configurable"]["thread_id"])
+            if config["configurable"]["thread_id"] in self._forks:
+                return self._list_lineage(config, filter, before, limit)
+        else:
+            for thread_id in list(self._index):
+                self._touch(thread_id)
+        return super().list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and archive idle threads if a sweep is due."""
+        with CHECKPOINT_SECONDS.time(op="put"):
+            self._touch(config["configurable"]["thread_id"])
+            result = super().put(config, checkpoint, metadata, new_versions)
+        self._maybe_sweep()
+        return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save pending writes for a (possibly archived) thread."""
+        with CHECKPOINT_SECONDS.time(op="put_writes"):
+            self._touch(config["configurable"]["thread_id"])
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete a thread from memory and from the archive index.
+
+        Forks of the thread keep working: the checkpoints they inherit are copied
+        into them first.
+        """
+        self._touch(thread_id)
+        self._detach_children(thread_id)
+        self._forks.pop(thread_id, None)
+        location = self._index.pop(thread_id, None)
+        if location is not None:
+            self._release(location[0])
+        self._last_access.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+
+def _remove_archive(segments: Dict[int, _Segment], archive_dir: str) -> None:
+    for segment in segments.values():
+        segment.close()
+    shutil.rmtree(archive_dir, ignore_errors=True)
@@ -3,16 +3,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, fields
-from typing import Annotated, Optional
+from functools import cache, lru_cache
+from typing import Annotated, Any, FrozenSet, Literal, Tuple
 
 from langchain_core.runnables import RunnableConfig, ensure_config
 
 from react_agent import prompts
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True)
 class Configuration:
-    """The configuration for the agent."""
+    """The configuration for the agent.
+
+    Instances are immutable so that `from_runnable_config` can return the same
+    instance for equal configurations, and downstream caches can key on it.
+    """
 
     system_prompt: str = field(
         default=prompts.SYSTEM_PROMPT,
@@ -27,19 +32,104 @@ class Configuration:
         metadata={"description": "The path to the MCP tools configuration file."},
     )
 
+    graph_mode: Literal["nested", "single"] = field(
+        default="nested",
+        metadata={
+            "description": "How the agent graph runs the MCP tools. 'nested' runs a "
+            "complete ReAct agent inside the model node; 'single' binds the MCP tools "
+            "on the model node and executes them in the outer tool node."
+        },
+    )
+
     recursion_limit: int = field(
         default=30,
         metadata={
-            "description": "The maximum number of recursive calls that Agent can make."
+            "description": "The maximum number of recursive calls that Agent can make. "
+            "Also the maximum number of model steps per run."
+        },
+    )
+
+    max_tool_calls: int = field(
+        default=50,
+        metadata={
+            "description": "The maximum number of tool calls per run (0 for no limit)."
+        },
+    )
+
+    max_run_seconds: float = field(
+        default=300.0,
+        metadata={
+            "description": "The maximum wall-clock time of a run in seconds (0 for no limit)."
+        },
+    )
+
+    max_run_tokens: int = field(
+        default=200_000,
+        metadata={
+            "description": "The maximum number of model tokens (input and output) "
+            "per run (0 for no limit)."
+        },
+    )
+
+    max_run_cost: float = field(
+        default=0.0,
+        metadata={
+            "description": "The maximum estimated model cost of a run in USD "
+            "(0 for no limit). Prices are set by MODEL_PRICES."
+        },
+    )
+
+    max_search_results: int = field(
+        default=10,
+        metadata={
+            "description": "The maximum number of search results to return for each search query."
+        },
+    )
+
+    search_concurrency: int = field(
+        default=4,
+        metadata={
+            "description": "The maximum number of search queries run concurrently "
+            "when the search tool is given several queries."
+        },
+    )
+
+    profile: bool = field(
+        default=False,
+        metadata={
+            "description": "Profile this run (CPU samples and memory allocations), "
+            "written to PROFILE_DIR under the thread ID."
         },
     )
 
     @classmethod
     def from_runnable_config(
-        cls, config: Optional[RunnableConfig] = None
+        cls, config: RunnableConfig | None = None
     ) -> Configuration:
-        """Create a Configuration instance from a RunnableConfig object."""
-        config = ensure_config(config)
+        """Create a Configuration instance from a RunnableConfig object.
+
+        Only the configurable keys that are fields of the class are hashed, so
+        per-run values such as `thread_id` do not defeat the cache. Values that
+        are not hashable fall back to building a new instance.
+        """
+        # Nodes and tools always receive a complete config; only fall back to the
+        # context config when none is given.
+        if config is None:
+            config = ensure_config()
         configurable = config.get("configurable") or {}
-        _fields = {f.name for f in fields(cls) if f.init}
-        return cls(**{k: v for k, v in configurable.items() if k in _fields})
+        names = _field_names(cls)
+        items = tuple(sorted((k, v) for k, v in configurable.items() if k in names))
+        try:
+            return _cached_configuration(cls, items)
+        except TypeError:
+            return cls(**dict(items))
+
+
+@cache
+def _field_names(cls: type) -> FrozenSet[str]:
+    return frozenset(f.name for f in fields(cls) if f.init)
+
+
+@lru_cache(maxsize=256)
+def _cached_configuration(cls: type, items: Tuple[Tuple[str, Any], ...]) -> Any:
+    return cls(**dict(items))
@@ -0,0 +1,250 @@
+"""Local stand-ins for the MCP servers and Tavily, for offline tests and benchmarks.
+
+The agent normally talks to live services (MCP servers started through
+Smithery, the Tavily API). These fakes speak the same protocols and let the
+latency, payload size and failure rate of every call be chosen, so the agent
+can be benchmarked and load-tested without network access.
+
+- `python -m react_agent.fake_servers mcp [--transport stdio|sse]` runs a fake
+  MCP server with the tools `fake_search`, `fake_read` and `echo`.
+- `python -m react_agent.fake_servers tavily` runs a fake Tavily search API.
+  Point the search tool at it with `TAVILY_API_URL=http://127.0.0.1:8766`.
+
+The `test` MCP profile (`mcp_config.test.json`, selected with
+`MCP_CONFIG_PROFILE=test`) starts the stdio server itself and connects to an
+SSE server on port 8765, which has to be started first:
+
+    python -m react_agent.fake_servers mcp --transport sse --port 8765 &
+    python -m react_agent.fake_servers tavily --port 8766 &
+
+Common options: `--latency` (seconds per call), `--jitter` (extra random
+seconds), `--payload-size` (characters per result), `--failure-rate`
+(0.0-1.0) and `--seed`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from starlette.applications import Starlette
+
+_WORDS = (
+    "agent graph tool model latency server stream token checkpoint message "
+    "search result context payload benchmark response request"
+).split()
+
+
+@dataclass
+class FakeBehavior:
+    """How a fake server responds to each call.
+
+    Args:
+        latency: Seconds every call takes.
+        jitter: Up to this many extra random seconds per call.
+        payload_size: Number of characters in every generated result.
+        failure_rate: Probability (0.0-1.0) that a call fails.
+        seed: Seed of the random generator, for reproducible runs.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    payload_size: int = 500
+    failure_rate: float = 0.0
+    seed: int | None = None
+    calls: int = field(default=0, init=False)
+    failures: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        """Seed the random source of the failures."""
+        self._random = random.Random(self.seed)
+
+    async def respond(self) -> None:
+        """Wait for the configured latency, then raise if this call should fail."""
+        self.calls += 1
+        delay = self.latency + (
+            self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        )
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise RuntimeError("fake server: injected failure")
+
+    def text(self, prefix: str, size: int | None = None) -> str:
+        """Generate `size` (default `payload_size`) characters starting with `prefix`."""
+        size = self.payload_size if size is None else size
+        parts = [prefix]
+        length = len(prefix)
+        while length < size:
+            word = self._random.choice(_WORDS)
+            parts.append(word)
+            length += len(word) + 1
+        return " ".join(parts)[:size]
+
+
+def create_mcp_server(
+    behavior: FakeBehavior, host: str = "127.0.0.1", port: int = 8765
+) -> Any:
+    """Create a FastMCP server whose tools follow `behavior`."""
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("fake-tools", host=host, port=port, log_level="WARNING")
+
+    @server.tool()
+    async def fake_search(query: str, max_results: int = 3) -> List[Dict[str, str]]:
+        """Search the fake index and return matching documents."""
+        await behavior.respond()
+        return [
+            {"title": f"{query} #{i}", "content": behavior.text(f"{query}:")}
+            for i in range(max_results)
+        ]
+
+    @server.tool()
+    async def fake_read(path: str, size: int | None = None) -> str:
+        """Read a fake file. `size` overrides the configured payload size."""
+        await behavior.respond()
+        return behavior.text(f"{path}:", size)
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        """Return the given text unchanged."""
+        await behavior.respond()
+        return text
+
+    return server
+
+
+def create_tavily_app(behavior: FakeBehavior) -> Starlette:
+    """Create a Starlette app serving a fake Tavily `POST /search`."""
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def search(request: Request) -> JSONResponse:
+        body = await request.json()
+        started = time.perf_counter()
+        try:
+            await behavior.respond()
+        except RuntimeError as e:
+            return JSONResponse({"detail": str(e)}, status_code=500)
+        query = str(body.get("query", ""))
+        results = [
+            {
+                "title": f"{query} #{i}",
+                "url": f"https://fake.example/{zlib.crc32(f'{query}/{i}'.encode()):08x}",
+                "content": behavior.text(f"{query}:"),
+                "score": round(1.0 - i * 0.05, 2),
+            }
+            for i in range(int(body.get("max_results", 5)))
+        ]
+        return JSONResponse(
+            {
+                "query": query,
+                "results": results,
+                "response_time": round(time.perf_counter() - started, 3),
+            }
+        )
+
+    return Starlette(routes=[Route("/search", search, methods=["POST"])])
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a background thread.
+
+    Used by tests and benchmarks to host the SSE MCP server and the Tavily stand-in
+    next to the agent in one process.
+    """
+
+    def __init__(self, app: Any, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Prepare a server for `app`; port `0` picks a free port when it starts."""
+        import uvicorn
+
+        config = uvicorn.Config(
+            app, host=host, port=port, log_level="warning", lifespan="off"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self.host = host
+
+    @property
+    def port(self) -> int:
+        """The bound port (useful when started with port 0)."""
+        return int(self._server.servers[0].sockets[0].getsockname()[1])
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> BackgroundServer:
+        """Start serving and wait until the socket is bound."""
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("fake server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and wait for the thread to finish."""
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> BackgroundServer:
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        """Stop the server."""
+        self.stop()
+
+
+def _behavior(args: argparse.Namespace) -> FakeBehavior:
+    return FakeBehavior(
+        latency=args.latency,
+        jitter=args.jitter,
+        payload_size=args.payload_size,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+
+def main(argv: List[str] | None = None) -> None:
+    """Run one of the fake servers from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("server", choices=["mcp", "tavily"])
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=500)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.server == "mcp":
+        server = create_mcp_server(_behavior(args), args.host, args.port or 8765)
+        server.run(transport=args.transport)
+        return
+
+    import uvicorn
+
+    uvicorn.run(
+        create_tavily_app(_behavior(args)),
+        host=args.host,
+        port=args.port or 8766,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,135 +1,332 @@
-from datetime import datetime, timezone
-from typing import Dict, List, Literal, cast
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from datetime import UTC, datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Tuple,
+    TypeVar,
+    cast,
+)
 
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langchain_core.tools import BaseTool
+from langgraph.errors import GraphRecursionError
 from langgraph.graph import StateGraph
-from langgraph.prebuilt import ToolNode
-
+from langgraph.prebuilt import ToolNode, create_react_agent
+
+from react_agent import accounting, cassette, key_pool, mcp_pool, utils
+from react_agent.accounting import AccountingCallbackHandler
+from react_agent.api_keys import (
+    CredentialState,
+    aget_credentials,
+    check_and_display_api_keys,
+    get_credentials,
+    install_reload_signal,
+)
+from react_agent.budget import (
+    RunBudget,
+    is_new_run,
+    measure_run,
+    out_of_graph_steps,
+    partial_answer,
+    should_stop,
+)
+from react_agent.checkpoint import ArchivingMemorySaver
 from react_agent.configuration import Configuration
+from react_agent.lifecycle import lifecycle
+from react_agent.logging_config import configure_logging
+from react_agent.messages import as_langchain_message, as_langchain_messages
+from react_agent.metrics import (
+    CANCELLED,
+    NODE_SECONDS,
+    MetricsCallbackHandler,
+    active_thread,
+    cache_lookup,
+)
+from react_agent.secret_providers import ensure_default_provider
 from react_agent.state import InputState, State
 from react_agent.tools import TOOLS
-from react_agent import utils
-from contextlib import asynccontextmanager
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.prebuilt import create_react_agent
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.runnables import RunnableConfig
-import os
-from langsmith import Client
-from react_agent.api_keys import get_api_key, check_and_display_api_keys, mask_api_key, is_valid_openai_key, is_valid_anthropic_key
-from .utils import get_llm
-import logging
 
+# 로깅, 트레이싱, 프로파일링 설정은 서버가 시작될 때 `warmup.startup()`에서 합니다.
+logger = logging.getLogger(__name__)
 
-memory = MemorySaver()
+_memory: ArchivingMemorySaver | None = None
 
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+def get_memory() -> ArchivingMemorySaver:
+    """보관 기능이 있는 메모리 체크포인터를 처음 필요할 때 만들어 반환합니다.
+
+    일정 시간 사용되지 않은 스레드는 세그먼트 파일로 옮겨 힙 사용량을 줄입니다.
+    `python -m react_agent.serve`를 CHECKPOINT_BACKEND=memory로 실행하면 사용자 스레드를 가진
+    바깥 그래프의 체크포인터가 됩니다. `langgraph dev`는 자체 저장소로 체크포인터를 대체합니다.
+    """
+    global _memory
+    if _memory is None:
+        _memory = ArchivingMemorySaver(
+            archive_dir=os.getenv("CHECKPOINT_ARCHIVE_DIR") or None,
+            idle_seconds=float(os.getenv("CHECKPOINT_ARCHIVE_AFTER", "1800")),
+        )
+    return _memory
 
 
-def check_api_keys():
-    """환경 변수에서 API 키가 올바르게 로드되었는지 확인하고 상태를 출력합니다."""
-    openai_key = os.environ.get("OPENAI_API_KEY", "")
-    anthropic_key = os.environ.get("ANTHROPIC_API_KEY", "")
-    
-    # API 키 마스킹 (보안을 위해 일부만 표시)
-    masked_openai = mask_api_key(openai_key)
-    masked_anthropic = mask_api_key(anthropic_key)
-    
-    # 키 유효성 검사
-    openai_valid = is_valid_openai_key(openai_key)
-    anthropic_valid = is_valid_anthropic_key(anthropic_key)
-    
-    # 상태 로깅
-    logger.info("===== API 키 상태 =====")
-    logger.info(f"OpenAI API 키: {masked_openai} - {'유효함 ✅' if openai_valid else '유효하지 않음 ❌'}")
-    logger.info(f"Anthropic API 키: {masked_anthropic} - {'유효함 ✅' if anthropic_valid else '유효하지 않음 ❌'}")
-    logger.info("======================")
-    
-    if not openai_valid:
-        logger.warning("OpenAI API 키가 유효하지 않습니다. 환경 변수를 확인하세요.")
-    
-    if not anthropic_valid:
-        logger.warning("Anthropic API 키가 유효하지 않습니다. 환경 변수를 확인하세요.")
-    
-    # 사용 가능한 모델 표시
-    available_models = []
-    if openai_valid:
-        available_models.append("OpenAI (gpt-4-turbo)")
-    if anthropic_valid:
-        available_models.append("Anthropic (claude-3-7-sonnet, claude-3-haiku)")
-    
-    if available_models:
-        logger.info(f"사용 가능한 모델: {', '.join(available_models)}")
-    else:
-        logger.warning("사용 가능한 모델이 없습니다. API 키를 확인하세요.")
-    
-    return openai_valid, anthropic_valid
+T = TypeVar("T")
 
 
-@asynccontextmanager
-async def make_graph(mcp_tools: Dict[str, Dict[str, str]]):
-    async with MultiServerMCPClient(mcp_tools) as client:
-        # API 키 가져오기
-        anthropic_api_key = get_api_key("ANTHROPIC_API_KEY")
-        openai_api_key = get_api_key("OPENAI_API_KEY")
-        
-        # 모델 초기화 시 적절한 타임아웃 설정
+async def check_api_keys():
+    """자격 증명 상태에서 OpenAI/Anthropic API 키의 유효성을 반환합니다.
+
+    키 검증과 상태 로그는 자격 증명이 처음 로드되거나 바뀔 때만 수행되며, 키를 다시 읽는 일은
+    작업 스레드에서 실행되므로 이벤트 루프를 막지 않습니다.
+    """
+    credentials = await aget_credentials()
+    return credentials.openai_valid, credentials.anthropic_valid
+
+
+# 우선순위 순서의 후보 모델 (프로바이더, 모델 이름)
+MODEL_CANDIDATES: List[Tuple[str, str]] = [
+    ("anthropic", "claude-3-7-sonnet"),
+    ("openai", "gpt-4-turbo"),
+    ("anthropic", "claude-3-haiku-20240307"),
+]
+
+
+def _create_chat_model(provider: str, model_name: str, api_key: str) -> BaseChatModel:
+    # 프로바이더 SDK는 무거우므로 처음 사용할 때 불러옵니다.
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(
+            model=model_name,
+            temperature=0.0,
+            max_tokens=800,
+            timeout=60.0,
+            api_key=api_key,
+        )
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model_name,
+        temperature=0.0,
+        max_tokens=800,
+        timeout=60.0,
+        api_key=api_key,
+    )
+
+
+def load_chat_model(api_keys: Mapping[str, str] | None = None) -> BaseChatModel:
+    """사용 가능한 LLM 모델을 초기화합니다.
+
+    캐시된 자격 증명 상태에서 유효한 키가 있는 프로바이더의 모델만 `MODEL_CANDIDATES` 순서대로
+    시도합니다. 유효한 키가 하나도 없으면 모든 후보를 순서대로 시도합니다.
+
+    Args:
+        api_keys: 프로바이더별로 사용할 키 (키 풀에서 빌린 키). 그 프로바이더의 모델을 먼저 시도하며,
+            없으면 프로바이더의 첫 번째 키를 씁니다.
+    """
+    # 카세트 재생 중에는 기록된 응답을 돌려주므로 API 키가 필요 없습니다.
+    if cassette.replaying():
+        return cassette.replay_model()
+    credentials = get_credentials()
+    providers = credentials.available_providers
+    candidates = [c for c in MODEL_CANDIDATES if c[0] in providers] or MODEL_CANDIDATES
+    # 키 풀에서 키를 빌린 프로바이더(다른 프로바이더로 넘어온 경우 포함)의 모델을 먼저 시도합니다.
+    candidates = sorted(candidates, key=lambda c: c[0] not in (api_keys or {}))
+
+    # 키가 교체되면 더 이상 쓰지 않는 키의 클라이언트를 캐시에서 뺍니다.
+    # 진행 중인 요청은 이전 클라이언트 참조를 그대로 들고 있으므로 끊기지 않습니다.
+    global _chat_models_credentials
+    if _chat_models_credentials is not credentials:
+        _chat_models_credentials = credentials
+        current = {
+            key
+            for provider in ("openai", "anthropic")
+            for key, _ in credentials.provider_keys(provider)
+        }
+        for cache_key in [k for k in _chat_models if k[2] not in current]:
+            del _chat_models[cache_key]
+
+    for provider, model_name in candidates:
+        api_key = (api_keys or {}).get(provider) or next(
+            iter(key for key, _ in credentials.provider_keys(provider)),
+            credentials.keys.get(f"{provider.upper()}_API_KEY", ""),
+        )
+        # 같은 키로 만든 클라이언트는 재사용해 HTTP 연결을 유지합니다.
+        cached = _chat_models.get((provider, model_name, api_key))
+        cache_lookup("chat_model", cached is not None)
+        if cached is not None:
+            return cached
         try:
-            # 기본 모델은 Anthropic으로 시도
-            model = ChatAnthropic(
-                model="claude-3-7-sonnet", 
-                temperature=0.0, 
-                max_tokens=800, 
-                timeout=60.0,
-                api_key=anthropic_api_key
+            model = cassette.wrap_model(
+                _create_chat_model(provider, model_name, api_key)
             )
-            print("✅ Anthropic 모델 초기화 성공: claude-3-7-sonnet")
         except Exception as e:
-            print(f"Anthropic 모델 초기화 실패: {e}")
-            print("OpenAI 모델로 대체합니다.")
-            try:
-                # 대체 모델로 OpenAI 사용
-                model = ChatOpenAI(
-                    model="gpt-4-turbo", 
-                    temperature=0.0, 
-                    max_tokens=800,
-                    timeout=60.0,
-                    api_key=openai_api_key
+            logger.warning(f"{model_name} 모델 초기화 실패: {e}")
+            continue
+        _chat_models[(provider, model_name, api_key)] = model
+        logger.info(f"✅ 모델 초기화 성공: {model_name}")
+        return model
+    raise RuntimeError("사용 가능한 LLM 모델이 없습니다. API 키를 확인하세요.")
+
+
+_chat_models: Dict[Tuple[str, str, str], BaseChatModel] = {}
+_chat_models_credentials: CredentialState | None = None
+
+
+async def call_with_key_pool(
+    call: Callable[[Dict[str, str]], Awaitable[T]],
+    can_retry: Callable[[], bool] = lambda: True,
+) -> T:
+    """프로바이더의 키 풀에서 키를 빌려 `call`을 실행합니다.
+
+    요청 한도(429) 오류가 나면 그 키를 잠시 격리하고, `can_retry()`가 참이면 풀의 다른 키로
+    다시 시도합니다. 한 프로바이더의 키가 모두 한도에 걸리면 다음 프로바이더의 키 풀로 넘어갑니다.
+    격리되지 않은 키가 남은 프로바이더부터 우선순위대로 시도합니다. 키 풀이 없으면 기본 키로 한
+    번만 실행합니다.
+
+    Args:
+        call: 프로바이더별 키 매핑을 받아 모델을 호출하는 코루틴 함수.
+        can_retry: 실패한 호출을 다시 실행해도 되는지 (예: 도구를 아직 실행하지 않았는지).
+    """
+    credentials = get_credentials()
+    pools = [
+        (provider, pool)
+        for provider in credentials.available_providers
+        if (pool := key_pool.get_pool(provider, credentials.provider_keys(provider)))
+    ]
+    if not pools:
+        try:
+            return await call({})
+        except asyncio.CancelledError:
+            CANCELLED.inc(stage="model_call")
+            raise
+    pools.sort(key=lambda entry: not entry[1].available())
+
+    index = 0
+    tried: List[str] = []
+    while True:
+        provider, pool = pools[index]
+        api_key = pool.acquire(exclude=tried)
+        tokens = 0
+        try:
+            result = await call({provider: api_key})
+            tokens = _usage_tokens(result)
+            return result
+        except asyncio.CancelledError:
+            CANCELLED.inc(stage="model_call")
+            raise
+        except Exception as e:
+            if not key_pool.is_rate_limit_error(e):
+                raise
+            pool.quarantine(api_key, key_pool.retry_after(e))
+            tried.append(api_key)
+            if not can_retry():
+                raise
+            if len(tried) < len(pool):
+                logger.info(
+                    f"{provider} 키가 요청 한도에 도달해 다른 키로 다시 시도합니다."
                 )
-                print("✅ OpenAI 모델 초기화 성공: gpt-4-turbo")
-            except Exception as e2:
-                print(f"OpenAI 모델 초기화 실패: {e2}")
-                print("더 작은 Anthropic 모델로 대체합니다.")
-                try:
-                    # 최종 대체 모델
-                    model = ChatAnthropic(
-                        model="claude-3-haiku-20240307",
-                        temperature=0.0,
-                        max_tokens=800,
-                        timeout=60.0,
-                        api_key=anthropic_api_key
-                    )
-                    print("✅ Anthropic 대체 모델 초기화 성공: claude-3-haiku")
-                except Exception as e3:
-                    print(f"모든 모델 초기화 실패: {e3}")
-                    raise RuntimeError("사용 가능한 LLM 모델이 없습니다. API 키를 확인하세요.")
-        
-        agent = create_react_agent(model, client.get_tools(), checkpointer=memory)
-        yield agent
+            elif index + 1 < len(pools):
+                index, tried = index + 1, []
+                logger.info(
+                    f"{provider} 키가 모두 요청 한도에 도달해 {pools[index][0]}(으)로 넘어갑니다."
+                )
+            else:
+                raise
+        finally:
+            pool.release(api_key, tokens=tokens)
 
 
-async def call_model(
-    state: State, config: RunnableConfig
-) -> Dict[str, List[AIMessage]]:
+def _usage_tokens(result: Any) -> int:
+    """모델 응답(또는 응답 목록)의 마지막 메시지에서 사용한 토큰 수를 가져옵니다."""
+    if isinstance(result, list):
+        result = result[-1] if result else None
+    usage = getattr(result, "usage_metadata", None)
+    return int(usage.get("total_tokens", 0)) if usage else 0
+
+
+@asynccontextmanager
+async def make_graph(
+    mcp_tools: Dict[str, Dict[str, str]], api_keys: Mapping[str, str] | None = None
+):
+    """중첩 ReAct 에이전트를 반환합니다.
+
+    MCP 도구는 공유 풀에서 가져오고, 같은 모델 클라이언트와 도구 목록으로 컴파일한 에이전트는
+    재사용하므로 매 단계마다 MCP 서버를 띄우거나 그래프를 컴파일하지 않습니다.
+    """
+    tools = await mcp_pool.get_tools(mcp_tools)
+    model = load_chat_model(api_keys)
+    yield get_agent(model, tools)
+
+
+def get_agent(model: BaseChatModel, tools: List[BaseTool]) -> Any:
+    """모델과 도구 목록으로 컴파일한 중첩 에이전트를 캐시에서 가져옵니다."""
+    key = (id(model), id(tools))
+    cached = _agents.get(key)
+    hit = cached is not None and cached[0] is model and cached[1] is tools
+    cache_lookup("agent", hit)
+    if hit:
+        return cached[2]
+    # 캐시 키는 풀에서 받은 MCP 도구 목록이고, 에이전트에는 로컬 도구(`search`)도 함께 넣습니다.
+    # 중첩 에이전트는 자체 체크포인터 없이 바깥 그래프의 체크포인터를 물려받습니다.
+    agent = create_react_agent(model, [*TOOLS, *tools])
+    _agents[key] = (model, tools, agent)
+    # 키가 교체되며 쌓이는 오래된 에이전트는 먼저 들어온 것부터 버립니다.
+    while len(_agents) > MAX_CACHED_AGENTS:
+        del _agents[next(iter(_agents))]
+    return agent
+
+
+MAX_CACHED_AGENTS = 32
+_agents: Dict[Tuple[int, int], Tuple[BaseChatModel, List[BaseTool], Any]] = {}
+
+
+def get_bound_model(model: BaseChatModel, tools: List[BaseTool]) -> Any:
+    """싱글 모드에서 로컬 도구와 MCP 도구를 바인딩한 모델을 캐시에서 가져옵니다.
+
+    도구 스키마 변환은 매 단계 반복할 필요가 없으므로, `get_agent()`처럼 같은 모델 클라이언트와
+    도구 목록이면 바인딩한 모델을 재사용합니다.
+    """
+    key = (id(model), id(tools))
+    cached = _bound_models.get(key)
+    hit = cached is not None and cached[0] is model and cached[1] is tools
+    cache_lookup("bound_model", hit)
+    if hit:
+        return cached[2]
+    bound = model.bind_tools([*TOOLS, *tools])
+    _bound_models[key] = (model, tools, bound)
+    while len(_bound_models) > MAX_CACHED_AGENTS:
+        del _bound_models[next(iter(_bound_models))]
+    return bound
+
+
+_bound_models: Dict[Tuple[int, int], Tuple[BaseChatModel, List[BaseTool], Any]] = {}
+
+
+async def load_mcp_servers(configuration: Configuration) -> Dict[str, Dict[str, str]]:
+    """Load the `mcpServers` mapping referenced by the configuration."""
+    mcp_tools_config = await utils.load_mcp_config_json(configuration.mcp_tools)
+    return mcp_tools_config.get("mcpServers", {})
+
+
+async def call_model(state: State, config: RunnableConfig) -> Dict[str, Any]:
     """Call the LLM powering our "agent".
 
     This function prepares the prompt, initializes the model, and processes the response.
+    The run's budget (steps, tool calls, time and tokens) is enforced here: when it is
+    used up, the run ends with a partial answer.
 
     Args:
         state (State): The current state of the conversation.
@@ -138,55 +335,182 @@ async def call_model(
     Returns:
         dict: A dictionary containing the model's response message.
     """
-    # API 키 확인
-    check_api_keys()
-    
+    # 종료 중에는 새 실행을 받지 않고, 진행 중인 단계는 드레인이 끝날 때까지 기다립니다.
+    if is_new_run(state.messages):
+        lifecycle.admit()
+    # 실행이 취소되면 (클라이언트 연결 끊김, 종료) CancelledError가 중첩 에이전트, 진행 중인
+    # 모델 HTTP 요청과 MCP 도구 호출까지 전파됩니다. 버려진 작업은 메트릭에 기록합니다.
+    with lifecycle.track(), _observe_node("call_model", config):
+        try:
+            return await _call_model(state, with_metrics(config))
+        except asyncio.CancelledError:
+            CANCELLED.inc(stage="model_node")
+            raise
+
+
+_metrics_handler = MetricsCallbackHandler(mcp_pool.tool_servers)
+_accounting_handler = AccountingCallbackHandler(accounting.ledger)
+
+
+def with_metrics(config: RunnableConfig) -> RunnableConfig:
+    """모델과 도구 호출의 소요 시간, 토큰 사용량과 예상 비용을 기록하는 콜백을 설정에 추가합니다."""
+    return merge_configs(config, {"callbacks": [_metrics_handler, _accounting_handler]})
+
+
+@contextmanager
+def _observe_node(node: str, config: RunnableConfig) -> Iterator[None]:
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    with NODE_SECONDS.time(node=node), active_thread(thread_id):
+        yield
+
+
+async def _call_model(state: State, config: RunnableConfig) -> Dict[str, Any]:
+    # API 키 확인 (SECRETS_FILE이 설정되어 있으면 처음 한 번 시크릿 프로바이더를 시작합니다)
+    await ensure_default_provider()
+    await check_api_keys()
+
     configuration = Configuration.from_runnable_config(config)
 
+    # 새 사용자 메시지면 실행 시작 시각을 기록하고, 남은 예산을 확인합니다.
+    budget = RunBudget.from_configuration(configuration)
+    run_started_at = state.run_started_at
+    if is_new_run(state.messages) or not run_started_at:
+        run_started_at = time.time()
+    if reason := should_stop(budget, state.messages, run_started_at):
+        return {
+            "messages": [partial_answer(state.messages, reason)],
+            "run_started_at": run_started_at,
+        }
+    usage = measure_run(state.messages, run_started_at)
+    remaining_seconds = (
+        max(0.0, budget.max_seconds - usage.seconds) if budget.max_seconds else None
+    )
+
     # Format the system prompt. Customize this to change the agent's behavior.
     system_message = configuration.system_prompt.format(
-        system_time=datetime.now(tz=timezone.utc).isoformat()
+        system_time=datetime.now(tz=UTC).isoformat()
     )
 
-    mcp_json_path = configuration.mcp_tools
+    # Extract the servers configuration from mcpServers key
+    mcp_tools = await load_mcp_servers(configuration)
 
-    mcp_tools_config = await utils.load_mcp_config_json(mcp_json_path)
+    # Create the messages list
+    messages = [
+        SystemMessage(content=system_message),
+        *as_langchain_messages(state.messages),
+    ]
 
-    # Extract the servers configuration from mcpServers key
-    mcp_tools = mcp_tools_config.get("mcpServers", {})
-    print(mcp_tools)
-
-    response = None
-
-    async with make_graph(mcp_tools) as my_agent:
-        # Create the messages list
-        messages = [
-            SystemMessage(content=system_message),
-            *state.messages,
-        ]
-
-        # Pass messages with the correct dictionary structure
-        response = cast(
-            AIMessage,
-            await my_agent.ainvoke(
-                {"messages": messages},
-                config,
-            ),
-        )
+    reason = None
+    if configuration.graph_mode == "single":
+        # 로컬 도구와 MCP 도구를 바깥 모델 노드에 직접 바인딩하고, 실행은 바깥 tools 노드에 맡깁니다.
+        tools = await mcp_pool.get_tools(mcp_tools)
 
-    # Handle the case when it's the last step and the model still wants to use a tool
-    if state.is_last_step and response.tool_calls:
-        return {
-            "messages": [
-                AIMessage(
-                    id=response.id,
-                    content="Sorry, I could not find an answer to your question in the specified number of steps.",
+        async def invoke(api_keys: Dict[str, str]) -> AIMessage:
+            model = get_bound_model(load_chat_model(api_keys), tools)
+            return cast(AIMessage, await model.ainvoke(messages, config))
+
+        try:
+            async with asyncio.timeout(remaining_seconds):
+                response = await call_with_key_pool(invoke)
+        except TimeoutError:
+            return {
+                "messages": [partial_answer(state.messages, "time")],
+                "run_started_at": run_started_at,
+            }
+        run_messages = [*state.messages, response]
+    else:
+        run_messages = messages
+        inner_config = config
+        if budget.max_steps:
+            # 중첩 에이전트는 모델 호출과 도구 호출이 각각 한 단계입니다.
+            remaining_steps = budget.max_steps - usage.steps
+            inner_config = {**config, "recursion_limit": 2 * remaining_steps + 1}
+
+        async def run_agent(api_keys: Dict[str, str]) -> None:
+            nonlocal reason, run_messages
+            async with make_graph(mcp_tools, api_keys) as my_agent:
+                # Pass messages with the correct dictionary structure
+                async with aclosing(
+                    my_agent.astream(
+                        {"messages": messages}, inner_config, stream_mode="values"
+                    )
+                ) as stream:
+                    async for values in stream:
+                        run_messages = values["messages"]
+                        if reason := should_stop(budget, run_messages, run_started_at):
+                            break
+
+        try:
+            async with asyncio.timeout(remaining_seconds):
+                # 중첩 에이전트가 한 단계라도 진행했다면 다른 키로 처음부터 다시 실행하지 않습니다.
+                await call_with_key_pool(
+                    run_agent, can_retry=lambda: len(run_messages) <= len(messages)
                 )
-            ]
+        except TimeoutError:
+            reason = "time"
+        except GraphRecursionError:
+            reason = "steps"
+        response = cast(AIMessage, run_messages[-1])
+
+    # 예산을 넘었다면 지금까지의 결과로 실행을 마칩니다.
+    reason = reason or should_stop(budget, run_messages, run_started_at)
+    # 그래프의 남은 단계로 도구를 실행할 수 없거나 중첩 에이전트의 단계가 바닥났어도 마찬가지입니다.
+    if not reason and out_of_graph_steps(state.remaining_steps, response):
+        reason = "steps"
+        if not response.tool_calls:
+            run_messages = run_messages[:-1]
+    if reason:
+        return {
+            "messages": [partial_answer(run_messages, reason)],
+            "run_started_at": run_started_at,
         }
 
     # Return the model's response as a list to be added to existing messages
-    return {"messages": [response["messages"][-1]]}
+    return {"messages": [response], "run_started_at": run_started_at}
+
+
+async def call_tools(
+    state: State, config: RunnableConfig
+) -> Dict[str, List[ToolMessage]]:
+    """Execute the tool calls requested by the last model message.
+
+    The node runs both the local `TOOLS` and the pooled MCP tools, so that in
+    'single' graph mode the MCP tool calls happen in the outer graph.
+
+    Args:
+        state (State): The current state of the conversation.
+        config (RunnableConfig): Configuration for the tool run.
+
+    Returns:
+        dict: A dictionary containing the resulting tool messages.
+    """
+    with lifecycle.track(), _observe_node("tools", config):
+        try:
+            return await _call_tools(state, with_metrics(config))
+        except asyncio.CancelledError:
+            CANCELLED.inc(stage="tool_node")
+            raise
+
+
+async def _call_tools(
+    state: State, config: RunnableConfig
+) -> Dict[str, List[ToolMessage]]:
+    configuration = Configuration.from_runnable_config(config)
+    mcp_tools = await load_mcp_servers(configuration)
+    tools = await mcp_pool.get_tools(mcp_tools)
+    # 풀의 도구 목록이 그대로라면 ToolNode를 다시 만들지 않습니다.
+    key = mcp_pool.config_key(mcp_tools)
+    cached = _tool_nodes.get(key)
+    cache_lookup("tool_node", cached is not None and cached[0] is tools)
+    if cached is None or cached[0] is not tools:
+        cached = (tools, ToolNode([*TOOLS, *tools]))
+        _tool_nodes[key] = cached
+    # ToolNode는 마지막 AI 메시지의 tool_calls만 사용하므로 그 메시지만 넘깁니다.
+    last_message = as_langchain_message(state.messages[-1])
+    return await cached[1].ainvoke({"messages": [last_message]}, config)
+
+
+_tool_nodes: Dict[str, Tuple[List[BaseTool], ToolNode]] = {}
 
 
 # Define a new graph
@@ -195,7 +519,7 @@ builder = StateGraph(State, input=InputState, config_schema=Configuration)
 
 # Define the two nodes we will cycle between
 builder.add_node(call_model)
-builder.add_node("tools", ToolNode(TOOLS))
+builder.add_node("tools", call_tools)
 
 # Set the entrypoint as `call_model`
 # This means that this node is the first one called
@@ -213,16 +537,17 @@ def route_model_output(state: State) -> Literal["__end__", "tools"]:
     Returns:
         str: The name of the next node to call ("__end__" or "tools").
     """
-    last_message = state.messages[-1]
-    if not isinstance(last_message, AIMessage):
-        raise ValueError(
-            f"Expected AIMessage in output edges, but got {type(last_message).__name__}"
-        )
-    # If there is no tool call, then we finish
-    if not last_message.tool_calls:
-        return "__end__"
-    # Otherwise we execute the requested actions
-    return "tools"
+    with NODE_SECONDS.time(node="route_model_output"):
+        last_message = as_langchain_message(state.messages[-1])
+        if not isinstance(last_message, AIMessage):
+            raise ValueError(
+                f"Expected AIMessage in output edges, but got {type(last_message).__name__}"
+            )
+        # If there is no tool call, then we finish
+        if not last_message.tool_calls:
+            return "__end__"
+        # Otherwise we execute the requested actions
+        return "tools"
 
 
 # Add a conditional edge to determine the next step after `call_model`
@@ -245,20 +570,23 @@ graph = builder.compile(
 )
 graph.name = "ReAct Agent"  # This customizes the name in LangSmith
 
+
 def main():
     """메인 함수입니다."""
     # 로깅 설정
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
+    configure_logging()
+
     # API 키 체크 및 표시
     check_and_display_api_keys()
-    
+    # SIGHUP을 받으면 API 키를 다시 읽고 검증합니다.
+    install_reload_signal()
+
     # 기존 실행 부분
     port = int(os.getenv("PORT", "8000"))
     host = os.getenv("HOST", "127.0.0.1")
-    
-    print(f"\n🚀 LangGraph React MCP 에이전트 서버 시작 중...")
+
+    print("\n🚀 LangGraph React MCP 에이전트 서버 시작 중...")
     print(f"📝 OpenAPI 문서: http://{host}:{port}/docs")
     print(f"🔗 서버 URL: http://{host}:{port}")
     print(f"🌐 서버가 {host}:{port}에서 실행 중입니다.")
-    print(f"🛑 종료하려면 Ctrl+C를 누르세요.")
+    print("🛑 종료하려면 Ctrl+C를 누르세요.")
@@ -0,0 +1,245 @@
+"""Per-provider API key pools.
+
+Several keys of one provider (for example keys of different org projects) are
+spread over the requests so throughput scales with the number of keys instead
+of being capped by one key's rate limits. Each key tracks its in-flight and
+total requests and the tokens it consumed. A key that hits a rate limit (HTTP
+429) is quarantined for a while and skipped by the selection.
+
+Keys are configured with `ANTHROPIC_API_KEYS` / `OPENAI_API_KEYS`, a comma
+separated list where each key may carry a weight: `key-a:3,key-b:1`.
+`KEY_POOL_STRATEGY` selects `least_loaded` (default) or `weighted` selection
+and `KEY_POOL_QUARANTINE_SECONDS` the default quarantine time.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Sequence,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+Strategy = Literal["least_loaded", "weighted"]
+
+
+def parse_keys(value: str) -> List[Tuple[str, float]]:
+    """Parse a `key[:weight],...` list into `(key, weight)` pairs."""
+    keys = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, weight = item.rpartition(":")
+        if sep and key:
+            try:
+                keys.append((key, float(weight)))
+                continue
+            except ValueError:
+                pass
+        keys.append((item, 1.0))
+    return keys
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return whether a provider SDK error is a rate limit (HTTP 429) error."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Return the `retry-after` delay (seconds) sent with a rate limit error."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class KeyStats:
+    """Usage of one key in a pool."""
+
+    key: str
+    weight: float = 1.0
+    in_flight: int = 0
+    requests: int = 0
+    tokens: int = 0
+    rate_limited: int = 0
+    quarantined_until: float = 0.0
+
+
+class KeyPool:
+    """Select keys of one provider and track their usage.
+
+    Args:
+        provider: Provider name, used in logs.
+        keys: `(key, weight)` pairs. Weights only matter for the `weighted`
+            strategy and to scale the load in `least_loaded`.
+        strategy: `least_loaded` picks the key with the fewest in-flight
+            requests per weight; `weighted` picks randomly by weight.
+        quarantine_seconds: How long a rate-limited key is skipped when the
+            provider does not say when to retry.
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        keys: Sequence[Tuple[str, float]],
+        strategy: Strategy = "least_loaded",
+        quarantine_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a pool of `keys`; raise `ValueError` if there are none."""
+        if not keys:
+            raise ValueError(f"{provider} 키 풀에 키가 없습니다.")
+        self.provider = provider
+        self.strategy = strategy
+        self.quarantine_seconds = quarantine_seconds
+        self._clock = clock
+        self._stats: Dict[str, KeyStats] = {
+            key: KeyStats(key=key, weight=max(weight, 1e-6)) for key, weight in keys
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of keys in the pool."""
+        return len(self._stats)
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        """The keys of the pool, in configuration order."""
+        return tuple(self._stats)
+
+    def available(self) -> bool:
+        """Return whether any key is out of quarantine."""
+        with self._lock:
+            now = self._clock()
+            return any(s.quarantined_until <= now for s in self._stats.values())
+
+    def stats(self) -> List[KeyStats]:
+        """Return a copy of the usage of every key."""
+        with self._lock:
+            return [KeyStats(**vars(s)) for s in self._stats.values()]
+
+    def acquire(self, exclude: Iterable[str] = ()) -> str:
+        """Pick a key for a new request and count it as in flight.
+
+        Quarantined and excluded keys are skipped. If every key is unavailable,
+        the one whose quarantine ends first is used rather than failing.
+        """
+        excluded = set(exclude)
+        with self._lock:
+            now = self._clock()
+            candidates = [
+                s
+                for s in self._stats.values()
+                if s.key not in excluded and s.quarantined_until <= now
+            ]
+            if not candidates:
+                remaining = [s for s in self._stats.values() if s.key not in excluded]
+                candidates = [
+                    min(
+                        remaining or self._stats.values(),
+                        key=lambda s: s.quarantined_until,
+                    )
+                ]
+            if self.strategy == "weighted":
+                chosen = random.choices(
+                    candidates, weights=[s.weight for s in candidates]
+                )[0]
+            else:
+                chosen = min(
+                    candidates,
+                    key=lambda s: ((s.in_flight + 1) / s.weight, s.requests / s.weight),
+                )
+            chosen.in_flight += 1
+            chosen.requests += 1
+            return chosen.key
+
+    def release(self, key: str, tokens: int = 0) -> None:
+        """Mark a request made with `key` as finished."""
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.in_flight = max(0, stats.in_flight - 1)
+                stats.tokens += tokens
+
+    def quarantine(self, key: str, seconds: float | None = None) -> None:
+        """Skip `key` for `seconds` (default `quarantine_seconds`) after a 429."""
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                return
+            stats.rate_limited += 1
+            stats.quarantined_until = self._clock() + (
+                seconds if seconds is not None else self.quarantine_seconds
+            )
+        logger.warning(
+            f"{self.provider} API 키가 요청 한도에 도달해 잠시 제외됩니다: {key[:8]}...{key[-4:]}"
+        )
+
+    def _carry_over(self, previous: KeyPool) -> None:
+        for key, stats in previous._stats.items():
+            if key in self._stats:
+                weight = self._stats[key].weight
+                self._stats[key] = KeyStats(**{**vars(stats), "weight": weight})
+
+
+_pools: Dict[str, KeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(provider: str, keys: Sequence[Tuple[str, float]]) -> KeyPool | None:
+    """Return the pool of `provider`, rebuilding it when its keys change.
+
+    Usage counters and quarantines of keys that are still configured survive a
+    rebuild, so key rotation does not reset the load balancing.
+
+    Returns:
+        Optional[KeyPool]: The pool, or `None` if the provider has no keys.
+    """
+    if not keys:
+        return None
+    with _pools_lock:
+        pool = _pools.get(provider)
+        if pool is not None and [(s.key, s.weight) for s in pool._stats.values()] == [
+            (k, max(w, 1e-6)) for k, w in keys
+        ]:
+            return pool
+        new_pool = KeyPool(
+            provider,
+            keys,
+            strategy=os.getenv("KEY_POOL_STRATEGY", "least_loaded"),  # type: ignore[arg-type]
+            quarantine_seconds=float(os.getenv("KEY_POOL_QUARANTINE_SECONDS", "60")),
+        )
+        if pool is not None:
+            new_pool._carry_over(pool)
+        _pools[provider] = new_pool
+        return new_pool
+
+
+def usage_snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    """Return the usage of every pool with masked keys, for monitoring."""
+    return {
+        provider: [
+            {**vars(s), "key": f"{s.key[:8]}...{s.key[-4:]}"} for s in pool.stats()
+        ]
+        for provider, pool in _pools.items()
+    }
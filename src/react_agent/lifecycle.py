@@ -0,0 +1,207 @@
+"""Graceful shutdown: drain in-flight runs and clean up MCP server processes.
+
+On SIGTERM (for example during a rolling deploy) the server stops admitting new
+runs, lets the runs in flight finish until a deadline, and cancels the rest.
+LangGraph checkpoints after every step, so a cancelled run keeps everything up
+to its last completed step and can be resumed on the new instance.
+
+Afterwards the pooled MCP clients are closed and every process they spawned is
+terminated. Stdio servers started through `npx` run as grandchildren of the
+server, which survive their parent, so the process tree is collected before the
+clients are closed and whatever is left of it is killed afterwards.
+
+`DRAIN_TIMEOUT` sets the drain deadline in seconds (default 20).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set
+
+from react_agent import mcp_pool, tracing
+from react_agent.metrics import gauge
+from react_agent.tools import aclose_tavily_client
+
+logger = logging.getLogger(__name__)
+
+
+class ShuttingDownError(RuntimeError):
+    """Raised when a run is started while the server is draining."""
+
+
+def drain_timeout() -> float:
+    """Return the drain deadline in seconds."""
+    return float(os.getenv("DRAIN_TIMEOUT", "20"))
+
+
+class Lifecycle:
+    """Track in-flight runs and shut them down gracefully."""
+
+    def __init__(self) -> None:
+        """Create a lifecycle that accepts runs."""
+        self.accepting = True
+        self._tasks: Set[asyncio.Task[object]] = set()
+        self._drain_task: asyncio.Task[int] | None = None
+
+    @property
+    def draining(self) -> bool:
+        """Whether the server stopped admitting new runs."""
+        return not self.accepting
+
+    @property
+    def in_flight(self) -> int:
+        """The number of tracked tasks still running."""
+        return sum(1 for task in self._tasks if not task.done())
+
+    def admit(self) -> None:
+        """Raise `ShuttingDownError` if new runs are no longer accepted."""
+        if not self.accepting:
+            raise ShuttingDownError("서버가 종료 중이라 새 실행을 받지 않습니다.")
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count the current task as in-flight work until the block exits."""
+        task = asyncio.current_task()
+        if task is None or task in self._tasks:
+            yield
+            return
+        self._tasks.add(task)
+        try:
+            yield
+        finally:
+            self._tasks.discard(task)
+
+    async def drain(self, timeout: float) -> int:
+        """Stop admitting runs and wait for in-flight ones until `timeout`.
+
+        Returns:
+            int: The number of runs that had to be cancelled.
+        """
+        self.accepting = False
+        current = asyncio.current_task()
+        pending = {
+            task for task in self._tasks if not task.done() and task is not current
+        }
+        if pending:
+            logger.info(
+                f"진행 중인 실행 {len(pending)}개가 끝나기를 기다립니다 (최대 {timeout:.0f}초)."
+            )
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(
+                f"제한 시간 안에 끝나지 않은 실행 {len(pending)}개를 취소했습니다."
+            )
+        return len(pending)
+
+    def begin_drain(self, timeout: float) -> None:
+        """Stop admitting runs and start draining in the background.
+
+        Called when the shutdown signal arrives, so the drain deadline counts
+        from the signal rather than from the end of the server's own shutdown.
+        """
+        self.accepting = False
+        if self._drain_task is None:
+            self._drain_task = asyncio.ensure_future(self.drain(timeout))
+
+    async def shutdown(self, timeout: float | None = None) -> int:
+        """Drain, close the MCP pool and search client, flush traces and terminate leftover children.
+
+        If `begin_drain` already started the drain, it is awaited instead of
+        starting another one.
+
+        Returns:
+            int: The number of runs that had to be cancelled.
+        """
+        task, self._drain_task = self._drain_task, None
+        if task is not None:
+            cancelled = await task
+        else:
+            cancelled = await self.drain(
+                drain_timeout() if timeout is None else timeout
+            )
+        children = descendant_pids()
+        await mcp_pool.aclose_all()
+        await aclose_tavily_client()
+        # 대기 중인 트레이스는 짧게만 기다리고, 보내지 못한 것은 버립니다.
+        await asyncio.to_thread(tracing.flush, 2.0)
+        await terminate_processes(children)
+        return cancelled
+
+
+def descendant_pids(pid: int | None = None) -> List[int]:
+    """Return every descendant process of `pid` (default: this process).
+
+    Reads `/proc`, so it returns an empty list on systems without it.
+    """
+    pid = os.getpid() if pid is None else pid
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 두 번째 필드(프로세스 이름)에 공백이나 괄호가 있을 수 있으므로 마지막 ')' 뒤를 나눕니다.
+        fields = stat.rpartition(b")")[2].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    result: List[int] = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # 좀비 프로세스는 이미 종료되었으므로 살아 있는 것으로 보지 않습니다.
+            return f.read().rpartition(b")")[2].split()[0] != b"Z"
+    except OSError:
+        return False
+
+
+async def terminate_processes(pids: List[int], grace: float = 3.0) -> None:
+    """Send SIGTERM to `pids`, then SIGKILL to those still alive after `grace`."""
+    alive = [pid for pid in pids if _alive(pid)]
+    if not alive:
+        return
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+    deadline = time.monotonic() + grace
+    while alive and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        alive = [pid for pid in alive if _alive(pid)]
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+    logger.info(f"남아 있던 MCP 서버 프로세스를 정리했습니다: {pids}")
+
+
+lifecycle = Lifecycle()
+
+RUNS_IN_FLIGHT = gauge(
+    "agent_runs_in_flight",
+    "Runs (graph steps) currently in progress.",
+    function=lambda: lifecycle.in_flight,
+)
@@ -0,0 +1,206 @@
+"""Non-blocking logging setup.
+
+Log records are put on an in-memory queue by a `QueueHandler` installed on the
+root logger, and a `QueueListener` thread formats and writes them. The event
+loop therefore never blocks on stdout/stderr or on slow handlers installed by
+the host server, which are moved behind the listener.
+
+Settings (environment variables, all optional):
+
+- `LOG_PROFILE`: `development` (default; text, INFO) or `production` (JSON,
+  INFO, and per-step debug/info records of the graph sampled down).
+- `LOG_LEVEL`: root level, e.g. `DEBUG`.
+- `LOG_FORMAT`: `text` or `json`.
+- `LOG_SAMPLE_RATES`: per-logger sampling of records below WARNING, as
+  `logger=rate` pairs, e.g. `react_agent.graph=0.1,react_agent.checkpoint=0`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Mapping
+
+from react_agent.metrics import gauge
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {"level": "INFO", "json": False, "sample_rates": {}},
+    "production": {
+        "level": "INFO",
+        "json": True,
+        "sample_rates": {"react_agent.graph": 0.1, "react_agent.checkpoint": 0.1},
+    },
+}
+
+# `LogRecord` attributes that are not user supplied `extra` fields.
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Fields passed with `extra=` are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Return `record` as one line of JSON."""
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records below WARNING, per logger.
+
+    The rate of the longest matching logger-name prefix applies; loggers
+    without a rate keep every record. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        """Create a filter keeping the `rates` share of the records of each logger prefix."""
+        super().__init__()
+        # 긴 접두사부터 확인해 가장 구체적인 로거의 비율을 씁니다.
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name: str) -> float:
+        """Return the sampling rate that applies to logger `name`."""
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether `record` is kept."""
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse `logger=rate,...` into a mapping."""
+    rates = {}
+    for item in value.split(","):
+        name, sep, rate = item.strip().partition("=")
+        if sep and name:
+            rates[name] = float(rate)
+    return rates
+
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.handlers.QueueHandler | None = None
+
+LOG_QUEUE_DEPTH = gauge(
+    "agent_log_queue_depth",
+    "Log records waiting for the listener thread.",
+    function=lambda: 0,
+)
+
+
+def configure_logging(
+    profile: str | None = None,
+    *,
+    level: str | None = None,
+    json_format: bool | None = None,
+    sample_rates: Mapping[str, float] | None = None,
+    handlers: List[logging.Handler] | None = None,
+) -> logging.handlers.QueueListener:
+    """Route all logging through a background queue listener.
+
+    Calling it again reconfigures the listener. Arguments override the
+    profile and environment settings.
+
+    Args:
+        profile: `development` or `production`. Defaults to `LOG_PROFILE`.
+        level: Root log level. Defaults to `LOG_LEVEL` or the profile level.
+        json_format: Whether to write JSON lines. Defaults to `LOG_FORMAT`.
+        sample_rates: Per-logger sampling rates for records below WARNING.
+        handlers: Handlers the listener writes to. Defaults to the handlers
+            already on the root logger, or a stderr stream handler.
+
+    Returns:
+        logging.handlers.QueueListener: The running listener.
+    """
+    global _listener, _queue_handler
+    settings = PROFILES.get(
+        profile or os.getenv("LOG_PROFILE", "development"), PROFILES["development"]
+    )
+    level = level or os.getenv("LOG_LEVEL") or settings["level"]
+    if json_format is None:
+        log_format = os.getenv("LOG_FORMAT")
+        json_format = log_format == "json" if log_format else settings["json"]
+    if sample_rates is None:
+        env_rates = os.getenv("LOG_SAMPLE_RATES")
+        sample_rates = (
+            parse_sample_rates(env_rates) if env_rates else settings["sample_rates"]
+        )
+
+    root = logging.getLogger()
+    previous = shutdown_logging()
+    if handlers is None:
+        handlers = [h for h in root.handlers if h is not _queue_handler] or previous
+        if not handlers:
+            handlers = [logging.StreamHandler(sys.stderr)]
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        if json_format or handler.formatter is None:
+            handler.setFormatter(formatter)
+        root.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    LOG_QUEUE_DEPTH.function = log_queue.qsize
+    if sample_rates:
+        # 버려질 레코드는 큐에 넣기 전에 걸러 포맷 비용도 들지 않게 합니다.
+        _queue_handler.addFilter(SamplingFilter(sample_rates))
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> List[logging.Handler]:
+    """Flush the queue and stop the listener.
+
+    Returns:
+        List[logging.Handler]: The handlers the listener was writing to.
+    """
+    global _listener, _queue_handler
+    handlers: List[logging.Handler] = []
+    if _listener is not None:
+        _listener.stop()
+        handlers = list(_listener.handlers)
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    return handlers
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,241 @@
+"""Shared MCP client pool.
+
+MCP servers are started once per distinct server configuration and reused by
+every graph step, instead of being spawned again for each model call. Oversized
+tool outputs are offloaded (see `react_agent.tool_outputs`), and the published
+tool list includes `read_tool_output` to page through them. With a cassette in
+replay mode (see `react_agent.cassette`) no server is started at all.
+
+`MultiServerMCPClient` enters anyio task groups when it connects, and those must
+be exited from the task that entered them. Each pooled client is therefore owned
+by a dedicated background task that opens the client, publishes its tools and
+keeps the connection alive until the pool is closed.
+
+Labelling tools by server and cancelling abandoned calls need attributes that
+`langchain-mcp-adapters` and `mcp` do not document (the per-server sessions and
+the ID of the request in flight); both packages are pinned in `pyproject.toml`.
+When an attribute is missing the feature is turned off with an error log and
+`agent_mcp_internals_missing_total` is incremented, instead of failing tool calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+from typing import Any, Dict, List
+
+from langchain_core.tools import BaseTool
+
+from react_agent import cassette, tool_outputs
+from react_agent.metrics import CANCELLED, cache_lookup, counter
+
+logger = logging.getLogger(__name__)
+
+INTERNALS_MISSING = counter(
+    "agent_mcp_internals_missing_total",
+    "Undocumented MCP client attributes the pool needs but the installed version lacks.",
+    ("attribute",),
+)
+
+
+def _internal(obj: Any, name: str) -> Any:
+    """Return the undocumented attribute `name` of `obj`, or None (counted and logged)."""
+    value = getattr(obj, name, None)
+    if value is None:
+        attribute = f"{type(obj).__name__}.{name}"
+        INTERNALS_MISSING.inc(attribute=attribute)
+        logger.error(
+            f"MCP 클라이언트에 {attribute} 속성이 없습니다. "
+            f"pyproject.toml에 고정된 mcp / langchain-mcp-adapters 버전을 확인하세요."
+        )
+    return value
+
+
+def config_key(mcp_servers: Dict[str, Any]) -> str:
+    """Return a stable key identifying an MCP server configuration."""
+    return json.dumps(mcp_servers, sort_keys=True, default=str)
+
+
+class _PooledClient:
+    """A `MultiServerMCPClient` kept open by its own owner task."""
+
+    def __init__(self, mcp_servers: Dict[str, Any]) -> None:
+        self.mcp_servers = mcp_servers
+        self.tools: List[BaseTool] = []
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: BaseException | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> List[BaseTool]:
+        self._task = asyncio.create_task(self._run(), name="mcp-client")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.tools
+
+    async def _run(self) -> None:
+        try:
+            from langchain_mcp_adapters.client import MultiServerMCPClient
+
+            async with MultiServerMCPClient(self.mcp_servers) as client:
+                by_server = _internal(client, "server_name_to_tools")
+                sessions = _internal(client, "sessions")
+                if by_server is None or sessions is None:
+                    # 서버별 레이블과 취소 알림 없이 공개 API의 도구만 씁니다.
+                    by_server, sessions = {"unknown": client.get_tools()}, {}
+                for server_name, server_tools in by_server.items():
+                    for tool in server_tools:
+                        tool_servers[tool.name] = server_name
+                        if server_name in sessions:
+                            cancel_on_abandon(tool, sessions[server_name])
+                        cassette.record_tool_calls(tool)
+                self.tools = publish(client.get_tools())
+                self._ready.set()
+                await self._closing.wait()
+        except BaseException as e:  # noqa: BLE001 - surfaced to the caller of start()
+            self._error = e
+            self._ready.set()
+            if not isinstance(e, Exception):
+                raise
+
+    async def aclose(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except BaseException as e:  # noqa: BLE001
+                logger.warning(f"MCP 클라이언트 종료 중 오류 발생: {e}")
+
+
+def publish(tools: List[BaseTool]) -> List[BaseTool]:
+    """Offload oversized outputs of `tools` and add the tool that pages through them."""
+    for tool in tools:
+        tool_outputs.offload_large_outputs(tool)
+    if tool_outputs.max_chars() > 0:
+        # 잘린 출력의 나머지를 읽는 도구도 MCP 도구와 함께 모델에 제공합니다.
+        tools.append(tool_outputs.read_tool_output)
+    return tools
+
+
+def cancel_on_abandon(tool: BaseTool, session: Any) -> BaseTool:
+    """Tell the MCP server to stop a tool call when its run is cancelled.
+
+    The MCP client only stops waiting for the response of a cancelled request.
+    The wrapper also sends `notifications/cancelled` for the request, so the
+    server can abort the work instead of finishing it for nobody. `mcp` has no
+    public way to learn the ID of a request, so the session's next request ID is
+    read; without it the tool is returned unchanged.
+    """
+    from mcp.types import (
+        CancelledNotification,
+        CancelledNotificationParams,
+        ClientNotification,
+    )
+
+    if _internal(session, "_request_id") is None:
+        return tool
+    call = tool.coroutine  # type: ignore[attr-defined]
+
+    @functools.wraps(call)
+    async def call_tool(*args: Any, **kwargs: Any) -> Any:
+        # `send_request`는 첫 await 전에 요청 ID를 정하므로, 호출 직전의 값이 이 요청의 ID입니다.
+        request_id = session._request_id
+        try:
+            return await call(*args, **kwargs)
+        except asyncio.CancelledError:
+            CANCELLED.inc(stage="mcp_call")
+            notification = ClientNotification(
+                CancelledNotification(
+                    method="notifications/cancelled",
+                    params=CancelledNotificationParams(
+                        requestId=request_id, reason="run cancelled"
+                    ),
+                )
+            )
+            try:
+                await session.send_notification(notification)
+            except Exception as e:  # noqa: BLE001 - the session may already be gone
+                logger.debug(f"MCP 취소 알림 전송 실패: {e}")
+            raise
+
+    tool.coroutine = call_tool  # type: ignore[attr-defined]
+    return tool
+
+
+_clients: Dict[str, _PooledClient] = {}
+# 도구 이름별 MCP 서버 이름 (메트릭 레이블용)
+tool_servers: Dict[str, str] = {}
+_lock: asyncio.Lock | None = None
+
+
+def _get_lock() -> asyncio.Lock:
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+
+async def get_tools(mcp_servers: Dict[str, Any]) -> List[BaseTool]:
+    """Return the tools of a pooled MCP client, starting it on first use.
+
+    Args:
+        mcp_servers: The `mcpServers` mapping from the MCP configuration file.
+
+    Returns:
+        List[BaseTool]: The LangChain tools exposed by the configured servers.
+    """
+    key = config_key(mcp_servers)
+    if cassette.replaying():
+        return _replayed_tools(key)
+    pooled = _clients.get(key)
+    cache_lookup("mcp_pool", pooled is not None)
+    if pooled is not None:
+        _record_tools(key, pooled.tools)
+        return pooled.tools
+    async with _get_lock():
+        pooled = _clients.get(key)
+        if pooled is None:
+            pooled = _PooledClient(mcp_servers)
+            try:
+                await pooled.start()
+            except asyncio.CancelledError:
+                # 시작 중에 실행이 취소되면 풀에 등록되지 않은 서버 프로세스가 남지 않게 닫습니다.
+                asyncio.ensure_future(pooled.aclose())
+                raise
+            _clients[key] = pooled
+            logger.info(
+                f"MCP 클라이언트 시작: {list(mcp_servers)} ({len(pooled.tools)}개 도구)"
+            )
+    _record_tools(key, pooled.tools)
+    return pooled.tools
+
+
+def _record_tools(key: str, tools: List[BaseTool]) -> None:
+    active = cassette.active()
+    if active is not None and active.mode == "record" and key not in active.tools:
+        active.record_tools(
+            key, [t for t in tools if t is not tool_outputs.read_tool_output]
+        )
+
+
+def _replayed_tools(key: str) -> List[BaseTool]:
+    # 재생 모드에서는 MCP 서버를 띄우지 않고, 카세트에 기록된 스키마로 도구를 만듭니다.
+    active = cassette.active()
+    assert active is not None
+    tools = active.replayed_tools.get(key)
+    if tools is None:
+        tools = active.replayed_tools[key] = publish(cassette.replay_tools(key))
+    return tools
+
+
+async def aclose_all() -> None:
+    """Close every pooled MCP client and stop its server processes."""
+    global _lock
+    clients = list(_clients.values())
+    _clients.clear()
+    for pooled in clients:
+        await pooled.aclose()
+    _lock = None
@@ -0,0 +1,188 @@
+"""Compact in-memory message representation for the graph state.
+
+`CompactMessage` stores a conversation message in a `__slots__` record instead of
+a full pydantic model. Role and name strings are interned, the content string
+is shared with the message it was created from, and empty metadata dicts are
+not stored at all. Messages are converted to and from LangChain messages only
+at the model and tool boundaries.
+"""
+
+from __future__ import annotations
+
+import sys
+import uuid
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+    convert_to_messages,
+)
+from langchain_core.messages.ai import UsageMetadata
+
+_ROLE_TO_CLASS = {
+    "human": HumanMessage,
+    "ai": AIMessage,
+    "system": SystemMessage,
+    "tool": ToolMessage,
+}
+
+_ToolCall = Tuple[str, Dict[str, Any], str | None]
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+class CompactMessage:
+    """A slot-based record holding the parts of a message the agent uses.
+
+    Anything else (additional kwargs, response metadata, usage, artifacts) is
+    kept in `extra`, which is `None` for the common case where it is empty.
+    """
+
+    __slots__ = ("role", "content", "id", "name", "tool_call_id", "tool_calls", "extra")
+
+    def __init__(
+        self,
+        role: str,
+        content: Union[str, List[Union[str, Dict[str, Any]]]],
+        id: str | None = None,
+        name: str | None = None,
+        tool_call_id: str | None = None,
+        tool_calls: Sequence[Sequence[Any]] | None = None,
+        extra: Dict[str, Any] | None = None,
+    ) -> None:
+        """Create a message; the role and tool names are interned."""
+        self.role = sys.intern(role)
+        self.content = content
+        self.id = id
+        self.name = _intern(name)
+        self.tool_call_id = tool_call_id
+        self.tool_calls: Tuple[_ToolCall, ...] | None = (
+            tuple((sys.intern(n), args, i) for n, args, i in tool_calls)
+            if tool_calls
+            else None
+        )
+        self.extra = extra or None
+
+    def _asdict(self) -> Dict[str, Any]:
+        """Return the constructor arguments, used by the checkpoint serializer."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        """Compare every field with another compact message."""
+        if not isinstance(other, CompactMessage):
+            return NotImplemented
+        return self._asdict() == other._asdict()
+
+    def __repr__(self) -> str:
+        """Return the role, id and the start of the content."""
+        return f"CompactMessage(role={self.role!r}, id={self.id!r}, content={self.content!r:.40})"
+
+
+def to_compact(message: BaseMessage) -> CompactMessage:
+    """Convert a LangChain message into a `CompactMessage`."""
+    extra: Dict[str, Any] = {}
+    if message.additional_kwargs:
+        extra["additional_kwargs"] = message.additional_kwargs
+    if message.response_metadata:
+        extra["response_metadata"] = message.response_metadata
+    tool_calls = None
+    tool_call_id = None
+    if isinstance(message, AIMessage):
+        tool_calls = [
+            (tc["name"], tc["args"], tc.get("id")) for tc in message.tool_calls
+        ]
+        if message.usage_metadata:
+            extra["usage_metadata"] = dict(message.usage_metadata)
+        if message.invalid_tool_calls:
+            extra["invalid_tool_calls"] = message.invalid_tool_calls
+    elif isinstance(message, ToolMessage):
+        tool_call_id = message.tool_call_id
+        if message.status != "success":
+            extra["status"] = message.status
+        if message.artifact is not None:
+            extra["artifact"] = message.artifact
+    return CompactMessage(
+        message.type,
+        message.content,
+        id=message.id,
+        name=message.name,
+        tool_call_id=tool_call_id,
+        tool_calls=tool_calls,
+        extra=extra,
+    )
+
+
+def from_compact(message: CompactMessage) -> BaseMessage:
+    """Convert a `CompactMessage` back into the matching LangChain message."""
+    kwargs: Dict[str, Any] = dict(message.extra) if message.extra else {}
+    if message.name is not None:
+        kwargs["name"] = message.name
+    if message.role == "ai":
+        kwargs["tool_calls"] = [
+            {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+            for name, args, call_id in message.tool_calls or ()
+        ]
+        if "usage_metadata" in kwargs:
+            kwargs["usage_metadata"] = UsageMetadata(**kwargs["usage_metadata"])  # type: ignore[typeddict-item]
+    elif message.role == "tool":
+        kwargs["tool_call_id"] = message.tool_call_id
+    return _ROLE_TO_CLASS[message.role](
+        content=message.content, id=message.id, **kwargs
+    )
+
+
+def as_langchain_message(message: Union[BaseMessage, CompactMessage]) -> BaseMessage:
+    """Return `message` as a LangChain message, converting it if it is compact."""
+    return from_compact(message) if isinstance(message, CompactMessage) else message
+
+
+def as_langchain_messages(
+    messages: Iterable[Union[BaseMessage, CompactMessage]],
+) -> List[BaseMessage]:
+    """Return a list of LangChain messages for a mixed message sequence."""
+    return [as_langchain_message(m) for m in messages]
+
+
+def add_compact_messages(
+    left: Sequence[CompactMessage],
+    right: Union[AnyMessage, CompactMessage, Sequence[Any], Any],
+) -> List[CompactMessage]:
+    """Merge messages into a compact message list.
+
+    This is the compact counterpart of LangGraph's `add_messages` reducer: new
+    messages are appended, a message with an existing ID replaces the old one,
+    and a `RemoveMessage` deletes the message with its ID.
+    """
+    if not isinstance(right, list):
+        right = [right]
+    merged = list(left)
+    index = {m.id: i for i, m in enumerate(merged)}
+    removed = set()
+    for item in right:
+        if isinstance(item, RemoveMessage):
+            removed.add(item.id)
+            continue
+        if not isinstance(item, CompactMessage):
+            item = to_compact(
+                item
+                if isinstance(item, BaseMessage)
+                else convert_to_messages([item])[0]
+            )
+        if item.id is None:
+            item.id = str(uuid.uuid4())
+        if item.id in index:
+            merged[index[item.id]] = item
+        else:
+            index[item.id] = len(merged)
+            merged.append(item)
+    if removed:
+        merged = [m for m in merged if m.id not in removed]
+    return merged
@@ -0,0 +1,429 @@
+"""In-process metrics registry.
+
+A deliberately small, dependency-free registry shaped after Prometheus:
+counters, gauges and histograms have a name, a help text and label names, and
+every distinct set of label values has its own value. `render()` returns the
+registry in the Prometheus text exposition format, served on `/metrics`.
+
+Metrics are kept per process; with several worker processes each scrape
+reports the worker that handled it.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+def _key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> None:
+        """Create an unregistered counter; use `counter()` to register one."""
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add `amount` to the value of the given label set."""
+        key = _key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current value of the given label set."""
+        return self._values.get(_key(self.labelnames, labels), 0.0)
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        """Return a copy of every label set and its value."""
+        with self._lock:
+            return dict(self._values)
+
+    def _lines(self) -> List[str]:
+        return [
+            _line(self.name, self.labelnames, k, v) for k, v in self.samples().items()
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, or is read from `function` at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        function: Callable[[], float] | None = None,
+    ) -> None:
+        """Create an unregistered gauge; use `gauge()` to register one."""
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value of the given label set."""
+        with self._lock:
+            self._values[_key(self.labelnames, labels)] = value
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        """Return a copy of every label set and its value."""
+        if self.function is not None:
+            return {(): float(self.function())}
+        return super().samples()
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label set."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Create an unregistered histogram; use `histogram()` to register one."""
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 조합마다 [구간별 개수..., +Inf 개수], 합계
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given label set."""
+        key = _key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations of the given label set."""
+        entry = self._values.get(_key(self.labelnames, labels))
+        return sum(entry[0]) if entry else 0
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            values = {
+                k: (list(counts), total[0])
+                for k, (counts, total) in self._values.items()
+            }
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    _line(
+                        f"{self.name}_bucket",
+                        (*self.labelnames, "le"),
+                        (*key, le),
+                        cumulative,
+                    )
+                )
+            lines.append(_line(f"{self.name}_sum", self.labelnames, key, total))
+            lines.append(_line(f"{self.name}_count", self.labelnames, key, cumulative))
+        return lines
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _line(
+    name: str, labelnames: Sequence[str], key: Sequence[str], value: float
+) -> str:
+    labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(labelnames, key))
+    return f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}"
+
+
+REGISTRY: Dict[str, Metric] = {}
+
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    """Return the counter called `name`, registering it on first use."""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        metric = REGISTRY.setdefault(name, Counter(name, help, labelnames))
+    return metric  # type: ignore[return-value]
+
+
+def gauge(
+    name: str,
+    help: str,
+    labelnames: Tuple[str, ...] = (),
+    function: Callable[[], float] | None = None,
+) -> Gauge:
+    """Return the gauge called `name`, registering it on first use."""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        metric = REGISTRY.setdefault(name, Gauge(name, help, labelnames, function))
+    return metric  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Tuple[str, ...] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Return the histogram called `name`, registering it on first use."""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        metric = REGISTRY.setdefault(name, Histogram(name, help, labelnames, buckets))
+    return metric  # type: ignore[return-value]
+
+
+def render() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in list(REGISTRY.values()):
+        lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric._lines())
+    return "\n".join(lines) + "\n"
+
+
+CANCELLED = counter(
+    "agent_cancelled_total",
+    "Work abandoned because its run was cancelled (client disconnect or shutdown).",
+    ("stage",),
+)
+NODE_SECONDS = histogram(
+    "agent_node_seconds", "Duration of one graph node or edge execution.", ("node",)
+)
+MODEL_CALL_SECONDS = histogram(
+    "agent_model_call_seconds",
+    "Duration of one chat model request.",
+    ("model", "status"),
+)
+MODEL_TOKENS = counter(
+    "agent_model_tokens_total",
+    "Tokens used by chat model requests.",
+    ("model", "direction"),
+)
+TOOL_SECONDS = histogram(
+    "agent_tool_seconds", "Duration of one tool call.", ("server", "tool", "status")
+)
+CHECKPOINT_SECONDS = histogram(
+    "agent_checkpoint_seconds",
+    "Duration of one checkpointer operation.",
+    ("op",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CACHE_REQUESTS = counter(
+    "agent_cache_requests_total",
+    "Lookups in the agent's in-process caches.",
+    ("cache", "result"),
+)
+ACTIVE_THREADS = gauge(
+    "agent_active_threads", "Conversation threads with a graph step in progress."
+)
+
+_active_threads: Dict[str, int] = {}
+
+
+@contextmanager
+def active_thread(thread_id: str | None) -> Iterator[None]:
+    """Count `thread_id` as active while the block runs."""
+    if not thread_id:
+        yield
+        return
+    _active_threads[thread_id] = _active_threads.get(thread_id, 0) + 1
+    ACTIVE_THREADS.set(len(_active_threads))
+    try:
+        yield
+    finally:
+        remaining = _active_threads.pop(thread_id) - 1
+        if remaining:
+            _active_threads[thread_id] = remaining
+        ACTIVE_THREADS.set(len(_active_threads))
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """Count a hit or a miss of one of the in-process caches."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def model_name(params: Mapping[str, Any] | None, default: str = "unknown") -> str:
+    """Return the model named in invocation params or response metadata.
+
+    Every handler labels a model call with this name, so the metrics and the
+    usage totals of one model line up.
+    """
+    params = params or {}
+    return str(
+        params.get("model")
+        or params.get("model_name")
+        or params.get("_type")
+        or default
+    )
+
+
+def usage_of(response: Any) -> Iterator[Tuple[Any, Mapping[str, Any]]]:
+    """Yield each generated message of an LLM result that reports its token usage."""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                yield message, usage
+
+
+class StartedRuns(OrderedDict):
+    """What a callback handler remembers about each run it saw start, by run id.
+
+    A cancelled model or tool call never reaches its end or error callback, so
+    its entry is never popped; the oldest entries are dropped beyond `max_runs`.
+    """
+
+    def __init__(self, max_runs: int = 10_000) -> None:
+        """Create an empty table that keeps at most `max_runs` runs."""
+        super().__init__()
+        self.max_runs = max_runs
+
+    def __setitem__(self, run_id: Any, value: Any) -> None:
+        """Remember `run_id`, dropping the oldest run when the table is full."""
+        super().__setitem__(run_id, value)
+        if len(self) > self.max_runs:
+            self.popitem(last=False)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Record model and tool call durations and token usage from LangChain callbacks.
+
+    Runs inline (no executor hop) and only keeps a start time per run id, for
+    at most `max_runs` runs in flight.
+    `tool_servers` maps a tool name to the MCP server that provides it.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self, tool_servers: Dict[str, str] | None = None, max_runs: int = 10_000
+    ) -> None:
+        """Create a handler that labels tool calls with the servers in `tool_servers`."""
+        self.tool_servers = tool_servers if tool_servers is not None else {}
+        self._started: StartedRuns = StartedRuns(max_runs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Note when the call started and which model it asked."""
+        self._started[run_id] = (
+            time.perf_counter(),
+            model_name(kwargs.get("invocation_params")),
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Observe the call duration and count its tokens."""
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        MODEL_CALL_SECONDS.observe(
+            time.perf_counter() - started[0], model=started[1], status="ok"
+        )
+        for _, usage in usage_of(response):
+            MODEL_TOKENS.inc(
+                usage.get("input_tokens", 0), model=started[1], direction="input"
+            )
+            MODEL_TOKENS.inc(
+                usage.get("output_tokens", 0), model=started[1], direction="output"
+            )
+            cached = (usage.get("input_token_details") or {}).get("cache_read")
+            if cached:
+                MODEL_TOKENS.inc(cached, model=started[1], direction="cached")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Observe the duration of a failed call."""
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            MODEL_CALL_SECONDS.observe(
+                time.perf_counter() - started[0], model=started[1], status="error"
+            )
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Note when the tool call started."""
+        self._started[run_id] = (
+            time.perf_counter(),
+            str((serialized or {}).get("name", "unknown")),
+        )
+
+    def on_tool_end(self, output, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Observe the duration of a finished tool call."""
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):  # type: ignore[no-untyped-def]
+        """Observe the duration of a failed tool call."""
+        self._end_tool(run_id, "error")
+
+    def _end_tool(self, run_id: object, status: str) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            tool = started[1]
+            TOOL_SECONDS.observe(
+                time.perf_counter() - started[0],
+                server=self.tool_servers.get(tool, "local"),
+                tool=tool,
+                status=status,
+            )
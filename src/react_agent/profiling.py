@@ -0,0 +1,340 @@
+"""On-demand CPU and memory profiling of a single run.
+
+A run is profiled when its config has `configurable.profile = true` (or, on the
+production server, when the request has an `X-Profile: 1` header). A callback
+handler installed for every run in the process starts the profile when the
+graph's root run starts and ends it when that run ends, so each run gives one
+report. While a profiled run is in progress:
+
+- a background thread samples the Python stack of the thread that executes
+  the run every `PROFILE_INTERVAL` seconds, and
+- `tracemalloc` traces allocations; a snapshot taken at the start is compared
+  with one taken at the end. Both are taken in worker threads, off the event
+  loop.
+
+When the run ends two files keyed by the thread ID are written to
+`PROFILE_DIR` from a worker thread:
+
+- `<thread_id>.folded`: the sampled stacks in the folded format read by
+  `flamegraph.pl`, speedscope and inferno (counts of the same stack are added
+  up across runs of the thread).
+- `<thread_id>.alloc.txt`: the lines that allocated the most memory during the
+  run, appended per run.
+
+Runs execute on the event loop thread, so the samples and allocations of other
+requests handled at the same time are included too; profile on a quiet instance
+for a clean picture. Without the flag nothing is started and the only cost is
+one method call per chain start and end.
+
+Settings (environment variables):
+
+- `PROFILE_ENABLED`: set to `false` to ignore profiling requests (default true).
+- `PROFILE_DIR`: output directory (default `<tmp>/agent-profiles`).
+- `PROFILE_INTERVAL`: seconds between stack samples (default 0.005).
+- `PROFILE_TOP`: number of allocation sites in the report (default 25).
+- `PROFILE_TRACEMALLOC_FRAMES`: frames kept per allocation (default 10).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tracers.context import register_configure_hook
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def profile_dir() -> Path:
+    """Return the directory profiles are written to."""
+    return Path(
+        os.getenv("PROFILE_DIR") or Path(tempfile.gettempdir()) / "agent-profiles"
+    )
+
+
+def _enabled() -> bool:
+    return os.getenv("PROFILE_ENABLED", "true").lower() == "true"
+
+
+def requested(config: RunnableConfig) -> bool:
+    """Return whether `config` asks for the run to be profiled."""
+    return bool((config.get("configurable") or {}).get("profile")) and _enabled()
+
+
+def _frame_label(code: object) -> str:
+    filename = getattr(code, "co_filename", "?")
+    short = "/".join(Path(filename).parts[-2:])
+    name = getattr(code, "co_qualname", None) or getattr(code, "co_name", "?")
+    return f"{name} ({short}:{getattr(code, 'co_firstlineno', 0)})".replace(";", ":")
+
+
+def _folded_stack(frame: object, limit: int = 256) -> str:
+    labels = []
+    while frame is not None and len(labels) < limit:
+        labels.append(_frame_label(frame.f_code))  # type: ignore[attr-defined]
+        frame = frame.f_back  # type: ignore[attr-defined]
+    return ";".join(reversed(labels))
+
+
+class _Session:
+    def __init__(self, thread_id: str, ident: int) -> None:
+        self.thread_id = thread_id
+        self.ident = ident
+        self.depth = 0
+        self.samples: Counter[str] = Counter()
+        self.started = time.perf_counter()
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+
+class _Profiler:
+    """Runs one sampler thread and tracemalloc while any session is open."""
+
+    def __init__(self) -> None:
+        self.sessions: Dict[str, _Session] = {}
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._started_tracemalloc = False
+
+    def enter(self, thread_id: str) -> _Session:
+        """Open one level of the session of `thread_id`, sampling the calling thread.
+
+        The first snapshot of a new session is left to `_aenter()`, which takes
+        it off the event loop.
+        """
+        with self._lock:
+            session = self.sessions.get(thread_id)
+            if session is None:
+                session = self.sessions[thread_id] = _Session(
+                    thread_id, threading.get_ident()
+                )
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(
+                        int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "10"))
+                    )
+                    self._started_tracemalloc = True
+                if self._sampler is None:
+                    self._stop.clear()
+                    self._sampler = threading.Thread(
+                        target=self._sample, name="profiler-sampler", daemon=True
+                    )
+                    self._sampler.start()
+            session.depth += 1
+            return session
+
+    def exit(self, session: _Session) -> tracemalloc.Snapshot | None:
+        """Close one level of `session`; return the final snapshot when it ends."""
+        with self._lock:
+            session.depth -= 1
+            if session.depth:
+                return None
+            del self.sessions[session.thread_id]
+            snapshot = tracemalloc.take_snapshot()
+            if not self.sessions:
+                self._stop.set()
+                sampler, self._sampler = self._sampler, None
+                if self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+            else:
+                sampler = None
+        if sampler is not None:
+            sampler.join()
+        return snapshot
+
+    def _sample(self) -> None:
+        interval = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                sessions = list(self.sessions.values())
+            stacks = {}
+            for session in sessions:
+                frame = frames.get(session.ident)
+                if frame is not None:
+                    stacks[session.thread_id] = _folded_stack(frame)
+            del frames
+            with self._lock:
+                # 그 사이에 끝난 세션은 이미 파일로 쓰이고 있으므로 건드리지 않습니다.
+                for session in sessions:
+                    if session.depth and session.thread_id in stacks:
+                        session.samples[stacks[session.thread_id]] += 1
+
+
+_profiler = _Profiler()
+
+
+def _write_folded(path: Path, samples: Counter[str]) -> None:
+    merged: Counter[str] = Counter()
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            stack, _, count = line.rpartition(" ")
+            if stack and count.isdigit():
+                merged[stack] += int(count)
+    merged.update(samples)
+    tmp = path.with_suffix(".folded.part")
+    tmp.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in merged.items()),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+def _allocation_report(
+    session: _Session,
+    before: tracemalloc.Snapshot,
+    after: tracemalloc.Snapshot,
+    seconds: float,
+) -> str:
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+    stats = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno"
+    )
+    top = int(os.getenv("PROFILE_TOP", "25"))
+    total = sum(stat.size_diff for stat in stats)
+    lines = [
+        f"# run of thread {session.thread_id} at {time.strftime('%Y-%m-%dT%H:%M:%S%z')}",
+        f"# {seconds:.3f}s, {sum(session.samples.values())} CPU samples, "
+        f"net allocated {total / 1024:+.1f} KiB",
+    ]
+    for stat in sorted(stats, key=lambda s: s.size_diff, reverse=True)[:top]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines) + "\n\n"
+
+
+def _finish(session: _Session) -> None:
+    """End one level of `session`; write the files if it was the last (blocking)."""
+    before = session.snapshot
+    after = _profiler.exit(session)
+    if after is None or before is None:
+        return
+    seconds = time.perf_counter() - session.started
+    directory = profile_dir()
+    name = _UNSAFE.sub("_", session.thread_id)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_folded(directory / f"{name}.folded", session.samples)
+        with open(directory / f"{name}.alloc.txt", "a", encoding="utf-8") as f:
+            f.write(_allocation_report(session, before, after, seconds))
+        logger.info(
+            f"프로파일 저장: {directory / name}.folded, {directory / name}.alloc.txt"
+        )
+    except OSError as e:
+        logger.warning(f"프로파일을 저장하지 못했습니다: {e}")
+
+
+def _take_snapshot() -> tracemalloc.Snapshot | None:
+    # 스냅샷을 찍기 전에 세션이 (취소로) 끝났으면 추적이 이미 멈췄을 수 있습니다.
+    return tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+
+async def _aenter(thread_id: str) -> _Session:
+    """Open one level of a session; a new session's first snapshot is taken in a worker thread."""
+    session = _profiler.enter(thread_id)
+    if session.depth == 1 and session.snapshot is None:
+        # 추적 중인 할당이 많으면 스냅샷에 수십 ms가 걸리므로 이벤트 루프에서 찍지 않습니다.
+        session.snapshot = await asyncio.to_thread(_take_snapshot)
+    return session
+
+
+@asynccontextmanager
+async def profile_run(thread_id: str | None) -> AsyncIterator[None]:
+    """Profile the block as (part of) a run of `thread_id`.
+
+    Nested blocks of the same thread share one session; the files are written
+    from a worker thread when the outermost block ends.
+    """
+    session = await _aenter(str(thread_id or "no-thread"))
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(_finish, session)
+
+
+class ProfilingCallbackHandler(AsyncCallbackHandler):
+    """Profiles each flagged run from the start to the end of its root run."""
+
+    run_inline = True
+    ignore_llm = True
+    ignore_chat_model = True
+    ignore_retriever = True
+    ignore_agent = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self) -> None:
+        """Create a handler with no profiled runs."""
+        self._sessions: Dict[UUID, _Session] = {}
+
+    async def on_chain_start(
+        self,
+        serialized: Dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Start profiling when a flagged root run starts."""
+        if (
+            parent_run_id is not None
+            or not (metadata or {}).get("profile")
+            or not _enabled()
+        ):
+            return
+        thread_id = (metadata or {}).get("thread_id")
+        # 루트 실행은 이벤트 루프 스레드에서 시작되므로 그 스레드의 스택을 샘플링합니다.
+        self._sessions[run_id] = await _aenter(str(thread_id or "no-thread"))
+
+    async def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Write the profile when a profiled root run ends."""
+        await self._end(run_id)
+
+    async def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Write the profile when a profiled root run fails or is cancelled."""
+        await self._end(run_id)
+
+    async def _end(self, run_id: UUID) -> None:
+        session = self._sessions.pop(run_id, None)
+        if session is not None:
+            await asyncio.to_thread(_finish, session)
+
+
+_handler_var: ContextVar[ProfilingCallbackHandler | None] | None = None
+
+
+def install_profiler() -> None:
+    """Attach the profiling callback handler to every run in the process (once)."""
+    global _handler_var
+    if _handler_var is None:
+        _handler_var = ContextVar("agent_profiler", default=ProfilingCallbackHandler())
+        register_configure_hook(_handler_var, inheritable=True)
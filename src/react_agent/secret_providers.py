@@ -0,0 +1,203 @@
+"""Async secrets providers with in-memory caching and hot key rotation.
+
+A provider keeps the current secrets in an immutable snapshot that is replaced
+as a whole when the source changes, so readers always see one consistent set
+of keys. Listeners (such as the credential cache in `react_agent.api_keys`)
+are notified after each rotation.
+
+The default provider is configured from the environment:
+
+- `SECRETS_FILE`: JSON file with the secrets, e.g. `{"ANTHROPIC_API_KEY": "..."}`.
+- `SECRETS_WATCH`: `true` (default) to poll the file and rotate keys live.
+- `SECRETS_POLL_INTERVAL`: seconds between two polls of the file (default 5).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+SecretsListener = Callable[[Mapping[str, str]], None]
+
+
+class SecretsProvider(ABC):
+    """Base class for secrets providers.
+
+    Subclasses implement `_load`, which returns the current secrets from the
+    source (or `None` if they did not change) without blocking the event loop.
+    Reads are served from the cached snapshot.
+    """
+
+    def __init__(self) -> None:
+        """Create a provider with an empty snapshot and no listeners."""
+        self._snapshot: Mapping[str, str] = MappingProxyType({})
+        self._listeners: List[SecretsListener] = []
+
+    @property
+    def snapshot(self) -> Mapping[str, str]:
+        """Return the current secrets as a read-only mapping."""
+        return self._snapshot
+
+    async def start(self) -> None:
+        """Load the secrets for the first time."""
+        await self.refresh()
+
+    async def get(self, name: str, default: str | None = None) -> str | None:
+        """Return a secret from the cached snapshot."""
+        return self._snapshot.get(name, default)
+
+    def subscribe(self, listener: SecretsListener) -> None:
+        """Call `listener` with the new snapshot after every rotation."""
+        self._listeners.append(listener)
+
+    async def refresh(self) -> bool:
+        """Reload the secrets and swap the snapshot if they changed.
+
+        Returns:
+            bool: Whether the secrets changed.
+        """
+        return self._swap(await self._load())
+
+    def _swap(self, secrets: Dict[str, str] | None) -> bool:
+        """Replace the snapshot with `secrets` and notify the listeners if they changed."""
+        if secrets is None or secrets == dict(self._snapshot):
+            return False
+        self._snapshot = MappingProxyType(secrets)
+        logger.info(f"시크릿이 갱신되었습니다: {sorted(secrets)}")
+        for listener in self._listeners:
+            try:
+                listener(self._snapshot)
+            except Exception as e:
+                logger.error(f"시크릿 갱신 알림 중 오류 발생: {e}")
+        return True
+
+    async def aclose(self) -> None:
+        """Release background resources."""
+
+    @abstractmethod
+    async def _load(self) -> Dict[str, str] | None:
+        """Return the current secrets, or `None` if the source did not change."""
+
+
+class EnvSecretsProvider(SecretsProvider):
+    """Read secrets from environment variables."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        """Create a provider of the environment variables in `names`."""
+        super().__init__()
+        self.names = tuple(names)
+
+    async def _load(self) -> Dict[str, str] | None:
+        return {name: os.environ[name] for name in self.names if os.environ.get(name)}
+
+
+class JsonFileSecretsProvider(SecretsProvider):
+    """Read secrets from a JSON file, reloading it only when its mtime changes."""
+
+    def __init__(self, path: str) -> None:
+        """Create a provider of the JSON object in the file at `path`."""
+        super().__init__()
+        self.path = path
+        self._mtime: float | None = None
+
+    async def _load(self) -> Dict[str, str] | None:
+        try:
+            mtime = (await asyncio.to_thread(os.stat, self.path)).st_mtime
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return None
+        try:
+            async with aiofiles.open(self.path) as f:
+                secrets = json.loads(await f.read())
+        except (OSError, json.JSONDecodeError) as e:
+            # 파일이 쓰이는 중일 수 있으므로 이전 값을 유지하고 다음 확인 때 다시 읽습니다.
+            logger.warning(f"시크릿 파일을 읽지 못했습니다: {self.path} ({e})")
+            return None
+        self._mtime = mtime
+        return {k: str(v) for k, v in secrets.items() if v}
+
+
+class WatchedFileSecretsProvider(JsonFileSecretsProvider):
+    """A JSON file provider that polls the file and rotates keys while running."""
+
+    def __init__(self, path: str, poll_interval: float = 5.0) -> None:
+        """Create a provider that checks the file every `poll_interval` seconds."""
+        super().__init__(path)
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Load the secrets and start watching the file."""
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch(), name="secrets-watch")
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"시크릿 파일 확인 중 오류 발생: {e}")
+
+    async def aclose(self) -> None:
+        """Stop watching the file."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_default_provider: SecretsProvider | None = None
+_default_started = False
+_lock: asyncio.Lock | None = None
+
+
+def provider_from_env() -> SecretsProvider | None:
+    """Build the secrets provider described by the `SECRETS_*` environment variables."""
+    path = os.getenv("SECRETS_FILE")
+    if not path:
+        return None
+    if os.getenv("SECRETS_WATCH", "true").lower() == "true":
+        return WatchedFileSecretsProvider(
+            path, poll_interval=float(os.getenv("SECRETS_POLL_INTERVAL", "5"))
+        )
+    return JsonFileSecretsProvider(path)
+
+
+async def ensure_default_provider() -> SecretsProvider | None:
+    """Start the default provider once and connect it to the credential cache.
+
+    Returns:
+        Optional[SecretsProvider]: The running provider, or `None` if no
+        secrets file is configured.
+    """
+    global _default_provider, _default_started, _lock
+    if _default_started:
+        return _default_provider
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        if not _default_started:
+            from react_agent import api_keys
+
+            provider = provider_from_env()
+            if provider is not None:
+                await provider.start()
+                api_keys.set_secrets_provider(provider)
+            _default_provider = provider
+            _default_started = True
+    return _default_provider
@@ -0,0 +1,370 @@
+"""Multi-process production server.
+
+`langgraph dev` serves everything from one interpreter with an in-memory
+runtime, so CPU-bound work (JSON (de)serialization of large tool results,
+message conversion) serializes behind the GIL. This module runs several
+uvicorn worker processes behind one port instead. Every worker compiles the
+agent graph with the same SQLite checkpoint file (WAL mode), so a thread can be
+resumed by whichever worker receives the next request.
+
+Run it with `python -m react_agent.serve`. Settings (environment variables):
+
+- `HOST` / `PORT`: bind address (defaults `0.0.0.0` / `8080`).
+- `WEB_CONCURRENCY`: number of worker processes (default: CPU count, max 4).
+- `CHECKPOINT_BACKEND`: `sqlite` (default) or `memory`. `memory` keeps the
+  threads in the worker's `ArchivingMemorySaver`, which moves idle threads to
+  segment files (see `react_agent.checkpoint`); it cannot be shared, so it
+  runs a single worker.
+- `CHECKPOINT_DB`: path of the shared SQLite checkpoint file
+  (default `checkpoints.sqlite`). All workers must see the same local file.
+
+Endpoints:
+
+- `POST /threads/{thread_id}/runs/wait`: run to completion, return the final state.
+- `POST /threads/{thread_id}/runs/stream`: stream node updates as NDJSON.
+- `GET /threads/{thread_id}/state`: the latest state of a thread.
+- `POST /threads/{thread_id}/fork`: branch a new thread off a checkpoint of the
+  thread (`{"checkpoint_id": ..., "thread_id": ...}`, both optional). Only the
+  `memory` backend supports forking.
+- `GET /ok` (liveness) and `GET /ready` (readiness, see `react_agent.webapp`).
+- `GET /metrics`: Prometheus metrics of the worker that answers the scrape.
+- `GET /usage`: token and cost totals of that worker (see `react_agent.accounting`).
+- `GET /traces` and `GET /traces/{trace_id}`: sampled traces kept by that worker.
+
+Request bodies are `{"input": {"messages": [...]}, "config": {"configurable": {...}}}`.
+An `X-Profile: 1` header profiles the run (see `react_agent.profiling`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, TypeVar
+
+import aiosqlite
+from langchain_core.messages import message_to_dict
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from react_agent import warmup
+from react_agent.lifecycle import drain_timeout, lifecycle
+from react_agent.messages import as_langchain_messages
+from react_agent.metrics import CANCELLED, CHECKPOINT_SECONDS
+from react_agent.webapp import metrics_endpoint, ready, traces, usage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def checkpoint_backend() -> str:
+    """Return the configured checkpoint backend (`sqlite` or `memory`)."""
+    return os.getenv("CHECKPOINT_BACKEND", "sqlite").lower()
+
+
+def default_workers() -> int:
+    """Return the number of worker processes to run."""
+    return int(os.getenv("WEB_CONCURRENCY") or min(os.cpu_count() or 1, 4))
+
+
+class InstrumentedSqliteSaver(AsyncSqliteSaver):
+    """`AsyncSqliteSaver` that records the duration of reads and writes."""
+
+    async def aget_tuple(self, config: Any) -> Any:
+        """Read a checkpoint, timed as `get`."""
+        with CHECKPOINT_SECONDS.time(op="get"):
+            return await super().aget_tuple(config)
+
+    async def aput(self, *args: Any, **kwargs: Any) -> Any:
+        """Write a checkpoint, timed as `put`."""
+        with CHECKPOINT_SECONDS.time(op="put"):
+            return await super().aput(*args, **kwargs)
+
+    async def aput_writes(self, *args: Any, **kwargs: Any) -> None:
+        """Write the pending writes of a task, timed as `put_writes`."""
+        with CHECKPOINT_SECONDS.time(op="put_writes"):
+            await super().aput_writes(*args, **kwargs)
+
+
+async def open_checkpointer(path: str) -> AsyncSqliteSaver:
+    """Open the shared SQLite checkpoint store.
+
+    WAL mode lets the workers read while another worker writes, and the busy
+    timeout makes concurrent writers wait for the lock instead of failing.
+    """
+    conn = await aiosqlite.connect(path)
+    try:
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        saver = InstrumentedSqliteSaver(conn)
+        await saver.setup()
+    except BaseException:
+        await conn.close()
+        raise
+    return saver
+
+
+def _to_json(values: Dict[str, Any]) -> Dict[str, Any]:
+    result = dict(values)
+    if "messages" in result:
+        result["messages"] = [
+            message_to_dict(m) for m in as_langchain_messages(result["messages"])
+        ]
+    return result
+
+
+def _run_args(request: Request, body: Dict[str, Any]) -> tuple[Any, Dict[str, Any]]:
+    config = dict(body.get("config") or {})
+    configurable = dict(config.get("configurable") or {})
+    configurable["thread_id"] = request.path_params["thread_id"]
+    if request.headers.get("x-profile", "").lower() in ("1", "true"):
+        configurable["profile"] = True
+    config["configurable"] = configurable
+    return body.get("input"), config
+
+
+def _draining() -> Response:
+    return JSONResponse(
+        {"detail": "server is shutting down"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def run_wait(request: Request) -> Response:
+    """Run the agent on a thread and return its final state."""
+    if lifecycle.draining:
+        return _draining()
+    graph = request.app.state.graph
+    run_input, config = _run_args(request, await request.json())
+    with lifecycle.track():
+        values = await _cancel_on_disconnect(request, graph.ainvoke(run_input, config))
+    if values is None:
+        # 클라이언트가 이미 떠났으므로 응답은 전달되지 않습니다 (nginx의 499 관례).
+        return Response(status_code=499)
+    return JSONResponse(_to_json(values))
+
+
+async def _cancel_on_disconnect(
+    request: Request, run: Coroutine[Any, Any, T]
+) -> T | None:
+    """Await `run`, cancelling it if the client disconnects first.
+
+    Returns:
+        The result of `run`, or `None` if it was cancelled.
+    """
+    task = asyncio.ensure_future(run)
+
+    async def disconnected() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            CANCELLED.inc(stage="run")
+            logger.info("클라이언트 연결이 끊겨 실행을 취소했습니다.")
+    try:
+        return await task
+    except asyncio.CancelledError:
+        current = asyncio.current_task()
+        if current is not None and current.cancelling():
+            raise
+        return None
+
+
+async def run_stream(request: Request) -> Response:
+    """Run the agent on a thread and stream each node's update as one JSON line."""
+    if lifecycle.draining:
+        return _draining()
+    graph = request.app.state.graph
+    run_input, config = _run_args(request, await request.json())
+
+    async def lines() -> AsyncIterator[str]:
+        # 클라이언트 연결이 끊기면 Starlette가 이 제너레이터를 취소하고, 취소는 그래프 실행까지 전파됩니다.
+        with lifecycle.track():
+            try:
+                async for update in graph.astream(
+                    run_input, config, stream_mode="updates"
+                ):
+                    for node, values in update.items():
+                        yield (
+                            json.dumps(
+                                {"node": node, **_to_json(values or {})}, default=str
+                            )
+                            + "\n"
+                        )
+            except asyncio.CancelledError:
+                CANCELLED.inc(stage="run")
+                raise
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def thread_state(request: Request) -> Response:
+    """Return the latest checkpointed state of a thread."""
+    graph = request.app.state.graph
+    config = {"configurable": {"thread_id": request.path_params["thread_id"]}}
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        return JSONResponse({"detail": "thread not found"}, status_code=404)
+    return JSONResponse(_to_json(snapshot.values))
+
+
+async def fork_thread(request: Request) -> Response:
+    """Create a new thread that branches off a checkpoint of an existing one."""
+    checkpointer = request.app.state.graph.checkpointer
+    if not hasattr(checkpointer, "afork_thread"):
+        return JSONResponse(
+            {"detail": "the checkpoint backend does not support forking"},
+            status_code=501,
+        )
+    body = await request.json() if await request.body() else {}
+    configurable = {"thread_id": request.path_params["thread_id"]}
+    if body.get("checkpoint_id"):
+        configurable["checkpoint_id"] = body["checkpoint_id"]
+    try:
+        forked = await checkpointer.afork_thread(
+            {"configurable": configurable}, body.get("thread_id")
+        )
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    return JSONResponse(
+        {
+            "thread_id": forked["configurable"]["thread_id"],
+            "checkpoint_id": forked["configurable"]["checkpoint_id"],
+        }
+    )
+
+
+async def ok(request: Request) -> Response:
+    """Liveness probe."""
+    return JSONResponse({"ok": True})
+
+
+def install_drain_hook(loop: asyncio.AbstractEventLoop) -> Callable[[], None]:
+    """Start draining as soon as SIGTERM or SIGINT arrives.
+
+    uvicorn waits up to `timeout_graceful_shutdown` for open requests before it
+    runs the lifespan shutdown, so a drain started there would leave `/ready`
+    at 200 and admit new runs for that whole wait. The hook wraps the handler
+    uvicorn installed: it stops admitting runs and starts the drain, then
+    passes the signal on.
+
+    Returns:
+        A function that restores the previous handlers.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    previous: Dict[int, Any] = {}
+
+    def handle(signum: int, frame: Any) -> None:
+        lifecycle.accepting = False
+        # 시그널 핸들러 안에서는 태스크를 만들지 않고 이벤트 루프에 맡깁니다.
+        loop.call_soon_threadsafe(lifecycle.begin_drain, drain_timeout())
+        handler = previous[signum]
+        if callable(handler):
+            handler(signum, frame)
+        else:
+            signal.signal(signum, handler)
+            signal.raise_signal(signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous[signum] = signal.signal(signum, handle)
+
+    def restore() -> None:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+    return restore
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Compile the graph on the shared checkpointer and warm the worker up."""
+    import importlib
+
+    warmup.startup()
+    graph_module = importlib.import_module("react_agent.graph")
+    if checkpoint_backend() == "memory":
+        # 사용자 스레드를 가진 바깥 그래프가 보관 기능이 있는 메모리 체크포인터를 씁니다.
+        checkpointer: Any = graph_module.get_memory()
+    else:
+        checkpointer = await open_checkpointer(
+            os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+        )
+    app.state.graph = graph_module.builder.compile(checkpointer=checkpointer)
+    app.state.graph.name = graph_module.graph.name
+    if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+        warmup.start_warmup()
+    restore_signals = install_drain_hook(asyncio.get_running_loop())
+    logger.info(f"워커 시작 (pid={os.getpid()})")
+    try:
+        yield
+    finally:
+        # 종료 신호를 받았을 때 시작한 드레인을 마저 기다린 뒤 MCP 서버를 정리하고 체크포인트 DB를 닫습니다.
+        restore_signals()
+        await lifecycle.shutdown()
+        if isinstance(checkpointer, AsyncSqliteSaver):
+            await checkpointer.conn.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/ok", ok),
+        Route("/ready", ready),
+        Route("/metrics", metrics_endpoint),
+        Route("/usage", usage),
+        Route("/traces", traces),
+        Route("/traces/{trace_id}", traces),
+        Route("/threads/{thread_id}/runs/wait", run_wait, methods=["POST"]),
+        Route("/threads/{thread_id}/runs/stream", run_stream, methods=["POST"]),
+        Route("/threads/{thread_id}/state", thread_state),
+        Route("/threads/{thread_id}/fork", fork_thread, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main() -> None:
+    """Serve the agent with `WEB_CONCURRENCY` worker processes."""
+    import uvicorn
+
+    from react_agent.logging_config import configure_logging
+
+    configure_logging()
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8080"))
+    workers = default_workers()
+    if checkpoint_backend() == "memory" and workers > 1:
+        logger.warning(
+            "CHECKPOINT_BACKEND=memory 는 워커끼리 공유되지 않으므로 워커 1개로 실행합니다."
+        )
+        workers = 1
+    logger.info(f"프로덕션 서버 시작: http://{host}:{port} (워커 {workers}개)")
+    uvicorn.run(
+        "react_agent.serve:app",
+        host=host,
+        port=port,
+        workers=workers,
+        lifespan="on",
+        # 드레인이 먼저 마감 시간에 실행을 취소하고, uvicorn은 그 뒤에 연결을 정리합니다.
+        timeout_graceful_shutdown=int(drain_timeout()) + 5,
+    )
+
+
+if __name__ == "__main__":
+    main()
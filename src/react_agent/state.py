@@ -2,14 +2,24 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from typing import Sequence
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
-from langgraph.managed import IsLastStep
+from langgraph.managed import RemainingSteps
 from typing_extensions import Annotated
 
+from react_agent.messages import add_compact_messages
+
+# With STATE_MESSAGE_STORE=compact, messages are kept as `CompactMessage` records.
+messages_reducer = (
+    add_compact_messages
+    if os.getenv("STATE_MESSAGE_STORE", "default") == "compact"
+    else add_messages
+)
+
 
 @dataclass
 class InputState:
@@ -18,7 +28,7 @@ class InputState:
     This class is used to define the initial state and structure of incoming data.
     """
 
-    messages: Annotated[Sequence[AnyMessage], add_messages] = field(
+    messages: Annotated[Sequence[AnyMessage], messages_reducer] = field(
         default_factory=list
     )
     """
@@ -35,6 +45,8 @@ class InputState:
 
     The `add_messages` annotation ensures that new messages are merged with existing ones,
     updating by ID to maintain an "append-only" state unless a message with the same ID is provided.
+    The compact store uses `add_compact_messages`, which merges the same way but keeps
+    `CompactMessage` records; nodes convert them with `as_langchain_messages`.
     """
 
 
@@ -45,12 +57,21 @@ class State(InputState):
     This class can be used to store any information needed throughout the agent's lifecycle.
     """
 
-    is_last_step: IsLastStep = field(default=False)
+    remaining_steps: RemainingSteps = field(default=25)
     """
-    Indicates whether the current step is the last one before the graph raises an error.
+    The number of graph steps left before the graph raises `GraphRecursionError`.
 
     This is a 'managed' variable, controlled by the state machine rather than user code.
-    It is set to 'True' when the step count reaches recursion_limit - 1.
+    It is `recursion_limit` minus the current step; the model node ends the run with a
+    partial answer when too few steps are left to run the requested tools.
+    """
+
+    run_started_at: float = field(default=0.0)
+    """
+    Wall-clock time (`time.time()`) at which the current run started.
+
+    Set by the model node when it sees a new human message; used to enforce
+    the run's time budget.
     """
 
     # Additional attributes can be added here as needed.
@@ -0,0 +1,201 @@
+"""Offload large tool outputs out of the conversation state.
+
+MCP tools such as file readers can return outputs of hundreds of kilobytes.
+Kept verbatim in `State.messages`, such an output is re-sent to the model on
+every later step and written into every later checkpoint. Outputs longer than
+a threshold are therefore moved to a side store: the tool message keeps a
+preview and a handle, and the `read_tool_output` tool returns further pages of
+the output on demand.
+
+Stored outputs live in memory up to a size budget; beyond it the oldest ones
+spill to files. With `TOOL_OUTPUT_DIR` set every output is written there
+directly, so workers sharing that directory can serve each other's handles.
+
+Settings (environment variables):
+
+- `TOOL_OUTPUT_MAX_CHARS`: outputs longer than this are offloaded
+  (default 8000, 0 disables offloading).
+- `TOOL_OUTPUT_PREVIEW_CHARS`: length of the preview kept in the message (default 2000).
+- `TOOL_OUTPUT_MEMORY_CHARS`: in-memory budget in characters before spilling
+  (default 32M).
+- `TOOL_OUTPUT_DIR`: store every output in this directory instead of memory.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Tuple
+
+from langchain_core.tools import BaseTool, tool
+
+logger = logging.getLogger(__name__)
+
+_HANDLE = re.compile(r"^out_[0-9a-f]{16}$")
+
+
+def max_chars() -> int:
+    """Return the length above which a tool output is offloaded."""
+    return int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "8000"))
+
+
+def preview_chars() -> int:
+    """Return the length of the preview kept in the tool message."""
+    return int(os.getenv("TOOL_OUTPUT_PREVIEW_CHARS", "2000"))
+
+
+class OutputStore:
+    """Stores tool outputs by handle, in memory with spill-over to files.
+
+    Args:
+        memory_chars: In-memory budget in characters; the oldest outputs beyond it move to files.
+        directory: Where spilled outputs are written (a temporary directory by default).
+        always_spill: Write every output to `directory` instead of keeping it in memory.
+    """
+
+    def __init__(
+        self,
+        memory_chars: int = 32 * 1024 * 1024,
+        directory: str | None = None,
+        always_spill: bool = False,
+    ) -> None:
+        """Create an empty store; the spill directory is created on first use."""
+        self.memory_chars = memory_chars
+        self.always_spill = always_spill
+        self._directory = Path(directory) if directory else None
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        """The directory spilled outputs are written to."""
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="tool-outputs-"))
+        return self._directory
+
+    def put(self, text: str) -> str:
+        """Store `text` and return its handle.
+
+        Handles are derived from the content, so the same output gets the same
+        handle in every run (and replayed runs can page through it again).
+        """
+        handle = f"out_{hashlib.sha256(text.encode()).hexdigest()[:16]}"
+        if self.always_spill:
+            self._write(handle, text)
+            return handle
+        with self._lock:
+            if handle in self._memory:
+                self._memory.move_to_end(handle)
+                return handle
+            self._memory[handle] = text
+            self._memory_size += len(text)
+            spill = []
+            while self._memory_size > self.memory_chars and len(self._memory) > 1:
+                old_handle, old_text = self._memory.popitem(last=False)
+                self._memory_size -= len(old_text)
+                spill.append((old_handle, old_text))
+        for old_handle, old_text in spill:
+            self._write(old_handle, old_text)
+        return handle
+
+    def get(self, handle: str) -> str | None:
+        """Return the output stored under `handle`, or `None` if it is unknown."""
+        if not _HANDLE.match(handle):
+            return None
+        with self._lock:
+            text = self._memory.get(handle)
+        if text is not None:
+            return text
+        try:
+            return (self.directory / f"{handle}.txt").read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write(self, handle: str, text: str) -> None:
+        path = self.directory / f"{handle}.txt"
+        # 다른 워커가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꿉니다.
+        partial = path.with_suffix(".part")
+        partial.write_text(text, encoding="utf-8")
+        partial.replace(path)
+
+
+def _store_from_env() -> OutputStore:
+    directory = os.getenv("TOOL_OUTPUT_DIR") or None
+    return OutputStore(
+        memory_chars=int(os.getenv("TOOL_OUTPUT_MEMORY_CHARS", str(32 * 1024 * 1024))),
+        directory=directory,
+        always_spill=directory is not None,
+    )
+
+
+store = _store_from_env()
+
+
+def offload(content: Any, tool_name: str) -> Any:
+    """Replace an oversized text output with a preview and a handle.
+
+    Outputs that are not text, or short enough, are returned unchanged.
+    """
+    limit = max_chars()
+    if limit <= 0:
+        return content
+    if isinstance(content, list) and all(isinstance(part, str) for part in content):
+        text = "\n\n".join(content)
+    elif isinstance(content, str):
+        text = content
+    else:
+        return content
+    if len(text) <= limit:
+        return content
+    handle = store.put(text)
+    preview = text[: min(preview_chars(), limit)]
+    logger.info(f"{tool_name} 도구 출력 {len(text)}자를 {handle}에 보관했습니다.")
+    return (
+        f"{preview}\n\n[Output truncated: showing {len(preview)} of {len(text)} characters. "
+        f'Call read_tool_output with handle="{handle}" and offset={len(preview)} '
+        "to read more.]"
+    )
+
+
+def offload_large_outputs(tool_: BaseTool) -> BaseTool:
+    """Wrap an MCP tool so that oversized outputs are offloaded."""
+    call = tool_.coroutine  # type: ignore[attr-defined]
+
+    @functools.wraps(call)
+    async def call_tool(*args: Any, **kwargs: Any) -> Tuple[Any, Any]:
+        content, artifact = await call(*args, **kwargs)
+        return offload(content, tool_.name), artifact
+
+    tool_.coroutine = call_tool  # type: ignore[attr-defined]
+    return tool_
+
+
+@tool
+def read_tool_output(handle: str, offset: int = 0, limit: int = 4000) -> str:
+    """Read part of a long tool output that was truncated.
+
+    Args:
+        handle: The handle given in the truncated output, e.g. "out_0123456789abcdef".
+        offset: The character offset to start reading from.
+        limit: The maximum number of characters to return.
+    """
+    text = store.get(handle.strip())
+    if text is None:
+        return f"Unknown or expired output handle: {handle}"
+    offset = max(0, offset)
+    chunk = text[offset : offset + max(1, min(limit, max_chars() or limit))]
+    end = offset + len(chunk)
+    if end >= len(text):
+        return f"{chunk}\n\n[End of output: characters {offset}-{end} of {len(text)}.]"
+    return (
+        f"{chunk}\n\n[Characters {offset}-{end} of {len(text)}. "
+        f"Call read_tool_output again with offset={end} to continue.]"
+    )
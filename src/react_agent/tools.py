@@ -6,29 +6,191 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from typing import Any, Callable, List, Optional, cast
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Set, Tuple, Union
 
-from langchain_community.tools.tavily_search import TavilySearchResults
+import httpx
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import InjectedToolArg
 from typing_extensions import Annotated
 
+from react_agent.api_keys import aget_credentials, get_credentials
 from react_agent.configuration import Configuration
 
+TAVILY_API_URL = "https://api.tavily.com"
+
+
+class TavilyClient:
+    """A Tavily search client that reuses one HTTP connection pool.
+
+    Searches hold the client with `in_use()`. A client replaced after a key
+    rotation is `retire()`d: its pool is closed once the last search holding
+    it has finished.
+
+    Args:
+        api_key: The Tavily API key.
+        base_url: The Tavily API URL (overridable to point at a local stand-in).
+        timeout: Request timeout in seconds.
+        transport: Optional httpx transport, used by tests.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = TAVILY_API_URL,
+        timeout: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Create the client and its connection pool."""
+        self.api_key = api_key
+        self.base_url = base_url
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            transport=transport,
+        )
+        self._in_flight = 0
+        self._retired = False
+
+    @asynccontextmanager
+    async def in_use(self) -> AsyncIterator["TavilyClient"]:
+        """Keep the connection pool open while the block runs."""
+        self._in_flight += 1
+        try:
+            yield self
+        finally:
+            self._in_flight -= 1
+            if self._retired and not self._in_flight:
+                await self.aclose()
+
+    def retire(self) -> None:
+        """Close the connection pool once no search holds the client."""
+        self._retired = True
+        if self._in_flight:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.aclose())
+            return
+        closing = asyncio.ensure_future(self.aclose())
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
+
+    async def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Run one search and return its results."""
+        response = await self._http.post(
+            "/search", json={"query": query, "max_results": max_results}
+        )
+        response.raise_for_status()
+        return list(response.json().get("results", []))
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool."""
+        await self._http.aclose()
+
+
+_client: TavilyClient | None = None
+# Retired clients being closed, referenced until their close task finishes.
+_closing: Set["asyncio.Future[None]"] = set()
+
+
+def get_tavily_client(api_key: str | None = None) -> TavilyClient:
+    """Return the shared Tavily client, recreating it if the key or URL changed.
+
+    `api_key` defaults to the `TAVILY_API_KEY` of the cached credentials, so a
+    key rotated by the secrets provider or the key file is picked up too.
+    """
+    global _client
+    if api_key is None:
+        api_key = str(get_credentials().keys.get("TAVILY_API_KEY") or "")
+    base_url = os.getenv("TAVILY_API_URL", TAVILY_API_URL)
+    if _client is None or (_client.api_key, _client.base_url) != (api_key, base_url):
+        if _client is not None:
+            # The previous client is closed once its in-flight searches finish.
+            _client.retire()
+        _client = TavilyClient(api_key, base_url)
+    return _client
+
+
+async def aclose_tavily_client() -> None:
+    """Close the shared Tavily client and wait for retired ones to close."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _closing:
+        await asyncio.gather(*_closing)
+
+
+def _unique_queries(queries: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for query in queries:
+        key = " ".join(query.split()).lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query.strip())
+    return unique
+
 
 async def search(
-    query: str, *, config: Annotated[RunnableConfig, InjectedToolArg]
-) -> Optional[list[dict[str, Any]]]:
+    query: Union[str, List[str]], *, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> list[dict[str, Any]] | None:
     """Search for general web results.
 
     This function performs a search using the Tavily search engine, which is designed
     to provide comprehensive, accurate, and trusted results. It's particularly useful
     for answering questions about current events.
+
+    Pass a list of queries to research several angles in one call. The queries run
+    concurrently and a page found by more than one query is returned once. A query
+    that fails is reported as a `{"query": ..., "error": ...}` entry after the results.
     """
     configuration = Configuration.from_runnable_config(config)
-    wrapped = TavilySearchResults(max_results=configuration.max_search_results)
-    result = await wrapped.ainvoke({"query": query})
-    return cast(list[dict[str, Any]], result)
+    queries = _unique_queries([query] if isinstance(query, str) else list(query))
+    semaphore = asyncio.Semaphore(max(1, configuration.search_concurrency))
+    credentials = await aget_credentials()
+    api_key = str(credentials.keys.get("TAVILY_API_KEY") or "")
+
+    async with get_tavily_client(api_key).in_use() as client:
+
+        async def run(q: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await client.search(q, configuration.max_search_results)
+
+        outcomes = await asyncio.gather(
+            *(run(q) for q in queries), return_exceptions=True
+        )
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if errors and len(errors) == len(outcomes):
+        raise errors[0]
+
+    best: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    failed: List[Dict[str, Any]] = []
+    order = 0
+    for q, outcome in zip(queries, outcomes):
+        if isinstance(outcome, BaseException):
+            # The model sees which angle is missing and can retry or rephrase it.
+            failed.append({"query": q, "error": f"{type(outcome).__name__}: {outcome}"})
+            continue
+        for result in outcome:
+            url = result.get("url") or f"{q}#{order}"
+            item = {k: v for k, v in result.items() if k != "raw_content"}
+            if len(queries) > 1:
+                item["query"] = q
+            previous = best.get(url)
+            if previous is None:
+                best[url] = (order, item)
+                order += 1
+            elif item.get("score", 0) > previous[1].get("score", 0):
+                best[url] = (previous[0], item)
+    return [
+        item for _, item in sorted(best.values(), key=lambda entry: entry[0])
+    ] + failed
 
 
 TOOLS: List[Callable[..., Any]] = [search]
@@ -0,0 +1,475 @@
+"""Sampled LangSmith tracing exported off the request path.
+
+With `TRACING_MODE=sampled` the LangSmith SDK's own tracing (which traces every
+run) is switched off and a tracer is installed for every run in the process
+instead. Sampling is head-based per conversation thread: whether a thread is
+traced is decided from a hash of its `thread_id` when a trace starts, so every
+turn of a conversation is either kept or dropped, on every worker. Runs without
+a thread id are sampled at random.
+
+Finished traces are put on a bounded queue and sent to LangSmith by a
+background thread. When the queue is full the trace is dropped (and counted)
+rather than slowing down the run. The most recent sampled traces are also kept
+in a local ring buffer, served on `/traces`, so they stay available when the
+LangSmith endpoint is unreachable or no API key is set.
+
+Settings (environment variables):
+
+- `TRACING_MODE`: `off`, `full` (the SDK traces every run) or `sampled`.
+  Without it, `LANGSMITH_TRACING`/`LANGCHAIN_TRACING_V2` decide between `full`
+  and `off`.
+- `TRACING_SAMPLE_RATE`: fraction of threads traced in `sampled` mode (default 0.1).
+- `TRACING_QUEUE_SIZE`: traces waiting for export before new ones are dropped
+  (default 1000).
+- `TRACING_BUFFER_SIZE`: recent traces kept locally (default 100).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Set
+from uuid import UUID
+
+from langchain_core.tracers.base import BaseTracer
+from langchain_core.tracers.context import register_configure_hook
+from langchain_core.tracers.schemas import Run
+
+from react_agent.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+TRACES = counter(
+    "agent_traces_total",
+    "Root runs seen by the sampled tracer, by what happened to them.",
+    ("result",),
+)
+
+_PLACEHOLDER_KEYS = ("", "YOUR_LANGSMITH_API_KEY", "your_langsmith_api_key")
+
+
+def tracing_mode() -> str:
+    """Return the configured tracing mode: `off`, `full` or `sampled`."""
+    mode = os.getenv("TRACING_MODE", "").strip().lower()
+    if mode in ("off", "full", "sampled"):
+        return mode
+    legacy = (
+        os.getenv("LANGSMITH_TRACING", "").lower() == "true"
+        or os.getenv("LANGCHAIN_TRACING_V2", "").lower() == "true"
+    )
+    return "full" if legacy else "off"
+
+
+def sample_rate() -> float:
+    """Return `TRACING_SAMPLE_RATE`, clamped to [0, 1]."""
+    try:
+        rate = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))
+    except ValueError:
+        rate = 0.1
+    return min(max(rate, 0.0), 1.0)
+
+
+def should_sample(thread_id: str | None, rate: float) -> bool:
+    """Decide whether a trace of `thread_id` is kept.
+
+    The same thread always gets the same answer for the same rate, in every
+    process, so a conversation is traced as a whole or not at all.
+    """
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    if not thread_id:
+        return random.random() < rate
+    digest = hashlib.sha256(str(thread_id).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 < rate
+
+
+def _thread_id(run: Run) -> str | None:
+    metadata = (run.extra or {}).get("metadata") or {}
+    thread_id = metadata.get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+
+def _walk(run: Run) -> List[Run]:
+    runs = [run]
+    for child in run.child_runs:
+        runs.extend(_walk(child))
+    return runs
+
+
+def _export_dict(run: Run, project: str) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "trace_id": run.trace_id,
+        "dotted_order": run.dotted_order,
+        "parent_run_id": run.parent_run_id,
+        "name": run.name,
+        "run_type": run.run_type,
+        "start_time": run.start_time,
+        "end_time": run.end_time,
+        "inputs": run.inputs,
+        "outputs": run.outputs,
+        "error": run.error,
+        "extra": run.extra,
+        "tags": run.tags,
+        "events": run.events,
+        "session_name": project,
+    }
+
+
+def _tree(run: Run) -> Dict[str, Any]:
+    return {
+        "id": str(run.id),
+        "name": run.name,
+        "run_type": run.run_type,
+        "start_time": run.start_time,
+        "end_time": run.end_time,
+        "error": run.error,
+        "inputs": run.inputs,
+        "outputs": run.outputs,
+        "children": [_tree(child) for child in run.child_runs],
+    }
+
+
+class TraceBuffer:
+    """The most recent sampled traces, newest last."""
+
+    def __init__(self, size: int) -> None:
+        """Create an empty buffer that keeps the last `size` traces."""
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=max(size, 1))
+        self._lock = threading.Lock()
+
+    def add(self, run: Run, status: str) -> Dict[str, Any]:
+        """Buffer the trace of the root `run` and return its entry."""
+        entry = {"run": run, "status": status}
+        with self._lock:
+            self._traces.append(entry)
+        return entry
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Return one summary per buffered trace, newest first."""
+        with self._lock:
+            entries = list(self._traces)
+        summaries = []
+        for entry in reversed(entries):
+            run: Run = entry["run"]
+            latency = (
+                (run.end_time - run.start_time).total_seconds()
+                if run.end_time
+                else None
+            )
+            summaries.append(
+                {
+                    "trace_id": str(run.trace_id or run.id),
+                    "thread_id": _thread_id(run),
+                    "name": run.name,
+                    "start_time": run.start_time.isoformat(),
+                    "latency_ms": round(latency * 1000, 1)
+                    if latency is not None
+                    else None,
+                    "error": run.error,
+                    "runs": len(_walk(run)),
+                    "status": entry["status"],
+                }
+            )
+        return summaries
+
+    def get(self, trace_id: str) -> Dict[str, Any] | None:
+        """Return the full run tree of a buffered trace."""
+        with self._lock:
+            entries = list(self._traces)
+        for entry in entries:
+            run: Run = entry["run"]
+            if str(run.trace_id or run.id) == trace_id:
+                return {"status": entry["status"], "trace": _tree(run)}
+        return None
+
+
+class TraceExporter:
+    """Sends traces to LangSmith from a background thread through a bounded queue."""
+
+    def __init__(self, maxsize: int, project: str, client: Any = None) -> None:
+        """Create an exporter to `project`; its thread starts with the first trace."""
+        self.project = project
+        self._client = client
+        self._queue: queue.Queue[Dict[str, Any]] = queue.Queue(maxsize=max(maxsize, 1))
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._error: Exception | None = None
+
+    def qsize(self) -> int:
+        """Return the number of traces waiting to be exported."""
+        return self._queue.qsize()
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Queue a buffered trace for export; return False if it was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            entry["status"] = "dropped"
+            TRACES.inc(result="dropped")
+            return False
+        return True
+
+    def flush(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the queue to empty."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._work, name="trace-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            # 트레이싱을 쓰지 않는 실행에서는 langsmith를 불러오지 않습니다.
+            from langsmith import Client
+
+            # 클라이언트는 전송 오류를 로그로만 남기므로, 콜백으로 받아 실패로 처리합니다.
+            self._client = Client(
+                auto_batch_tracing=False, tracing_error_callback=self._on_error
+            )
+        return self._client
+
+    def _on_error(self, error: Exception) -> None:
+        self._error = error
+
+    def _work(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                runs = [_export_dict(run, self.project) for run in _walk(entry["run"])]
+                self._error = None
+                self._get_client().batch_ingest_runs(create=runs)
+                if self._error is not None:
+                    raise self._error
+                entry["status"] = "exported"
+                TRACES.inc(result="exported")
+            except Exception as e:  # noqa: BLE001 - the trace stays in the local buffer
+                entry["status"] = "failed"
+                TRACES.inc(result="failed")
+                logger.warning(
+                    f"트레이스를 LangSmith로 보내지 못했습니다 (로컬 버퍼에 남아 있습니다): {e}"
+                )
+            finally:
+                self._queue.task_done()
+
+
+def _start(name: str) -> Callable[..., Any]:
+    base = getattr(BaseTracer, name)
+
+    def method(
+        self: SampledTracer,
+        *args: Any,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        if self._skip(run_id, parent_run_id, metadata):
+            return None
+        return base(
+            self,
+            *args,
+            run_id=run_id,
+            parent_run_id=parent_run_id,
+            metadata=metadata,
+            **kwargs,
+        )
+
+    method.__name__ = method.__qualname__ = name
+    return method
+
+
+def _event(name: str, ends_run: bool) -> Callable[..., Any]:
+    base = getattr(BaseTracer, name)
+
+    def method(self: SampledTracer, *args: Any, run_id: UUID, **kwargs: Any) -> Any:
+        if run_id in self._skipped:
+            if ends_run:
+                self._forget(run_id)
+            return None
+        return base(self, *args, run_id=run_id, **kwargs)
+
+    method.__name__ = method.__qualname__ = name
+    return method
+
+
+class SampledTracer(BaseTracer):
+    """Keeps the traces of sampled threads and hands them to the exporter.
+
+    Whether a trace is kept is decided when its root run starts. The runs of
+    an unsampled trace are never built: their ids are remembered until they
+    end so their callbacks return at once. A cancelled run may never end, so
+    the ids of a whole unsampled trace are also forgotten when its root ends
+    (LangGraph ends the root run with an error when a run is cancelled). Sampled traces run inline so the run
+    tree is built in callback order; the only work left on the request path is
+    bookkeeping and a non-blocking `put_nowait`.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        rate: float,
+        buffer: TraceBuffer,
+        exporter: TraceExporter | None = None,
+    ) -> None:
+        """Create a tracer that keeps the `rate` share of threads in `buffer`."""
+        super().__init__()
+        self.rate = rate
+        self.buffer = buffer
+        self.exporter = exporter
+        # 건너뛴 실행의 루트, 그리고 루트마다 건너뛴 실행들
+        self._skipped: Dict[UUID, UUID] = {}
+        self._skipped_trees: Dict[UUID, Set[UUID]] = {}
+
+    def _skip(
+        self, run_id: UUID, parent_run_id: UUID | None, metadata: Dict[str, Any] | None
+    ) -> bool:
+        if parent_run_id is None:
+            # 트레이스를 시작할 때 한 번 결정합니다 (head-based).
+            thread_id = (metadata or {}).get("thread_id")
+            if should_sample(None if thread_id is None else str(thread_id), self.rate):
+                return False
+            TRACES.inc(result="unsampled")
+            root = run_id
+        elif parent_run_id not in self._skipped:
+            return False
+        else:
+            root = self._skipped[parent_run_id]
+        self._skipped[run_id] = root
+        self._skipped_trees.setdefault(root, set()).add(run_id)
+        return True
+
+    def _forget(self, run_id: UUID) -> None:
+        root = self._skipped.pop(run_id)
+        if root == run_id:
+            for child in self._skipped_trees.pop(root, ()):
+                self._skipped.pop(child, None)
+        elif root in self._skipped_trees:
+            self._skipped_trees[root].discard(run_id)
+
+    on_chain_start = _start("on_chain_start")
+    on_chat_model_start = _start("on_chat_model_start")
+    on_llm_start = _start("on_llm_start")
+    on_tool_start = _start("on_tool_start")
+    on_retriever_start = _start("on_retriever_start")
+    on_llm_new_token = _event("on_llm_new_token", ends_run=False)
+    on_retry = _event("on_retry", ends_run=False)
+    on_chain_end = _event("on_chain_end", ends_run=True)
+    on_chain_error = _event("on_chain_error", ends_run=True)
+    on_llm_end = _event("on_llm_end", ends_run=True)
+    on_llm_error = _event("on_llm_error", ends_run=True)
+    on_tool_end = _event("on_tool_end", ends_run=True)
+    on_tool_error = _event("on_tool_error", ends_run=True)
+    on_retriever_end = _event("on_retriever_end", ends_run=True)
+    on_retriever_error = _event("on_retriever_error", ends_run=True)
+
+    def _persist_run(self, run: Run) -> None:
+        # 루트 실행이 끝나거나 실패하면 호출되며, 여기까지 온 트레이스는 모두 샘플링된 것입니다.
+        TRACES.inc(result="sampled")
+        entry = self.buffer.add(run, "pending" if self.exporter else "local")
+        if self.exporter is not None:
+            self.exporter.submit(entry)
+
+
+_tracer: SampledTracer | None = None
+_tracer_var: ContextVar[SampledTracer | None] | None = None
+
+
+def _has_api_key() -> bool:
+    key = os.getenv("LANGSMITH_API_KEY", "").strip().strip('"')
+    return key not in _PLACEHOLDER_KEYS and not key.startswith("lsv2-placeholder")
+
+
+def configure_tracing() -> SampledTracer | None:
+    """Install the sampled tracer if `TRACING_MODE=sampled`.
+
+    Turns the SDK's own tracing off so runs are not traced twice. Without a
+    LangSmith API key, sampled traces are only kept in the local buffer.
+    Calling it again returns the installed tracer.
+    """
+    global _tracer, _tracer_var
+    if tracing_mode() != "sampled":
+        return None
+    if _tracer is not None:
+        return _tracer
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["LANGSMITH_TRACING"] = "false"
+    try:
+        from langsmith import utils as ls_utils
+
+        # langsmith는 환경 변수 값을 캐시하므로 바꾼 값이 보이도록 비웁니다.
+        ls_utils.get_env_var.cache_clear()
+    except (ImportError, AttributeError):
+        pass
+
+    exporter = None
+    if _has_api_key():
+        exporter = TraceExporter(
+            int(os.getenv("TRACING_QUEUE_SIZE", "1000")),
+            os.getenv("LANGSMITH_PROJECT", "langgraph-react-mcp-chat"),
+        )
+        gauge(
+            "agent_trace_queue_depth",
+            "Sampled traces waiting to be sent to LangSmith.",
+            function=exporter.qsize,
+        )
+    buffer = TraceBuffer(int(os.getenv("TRACING_BUFFER_SIZE", "100")))
+    _tracer = SampledTracer(sample_rate(), buffer, exporter)
+    # 기본값으로 트레이서를 담은 컨텍스트 변수를 등록하면 모든 실행의 콜백에 추가됩니다.
+    _tracer_var = ContextVar("react_agent_sampled_tracer", default=_tracer)
+    register_configure_hook(_tracer_var, inheritable=True)
+    logger.info(
+        f"샘플링 트레이싱 사용: 스레드의 {_tracer.rate:.0%} 추적"
+        + ("" if exporter else " (API 키가 없어 로컬 버퍼에만 보관)")
+    )
+    return _tracer
+
+
+def get_tracer() -> SampledTracer | None:
+    """Return the installed sampled tracer, if any."""
+    return _tracer
+
+
+def recent_traces() -> List[Dict[str, Any]]:
+    """Return summaries of the locally buffered traces, newest first."""
+    return _tracer.buffer.summaries() if _tracer is not None else []
+
+
+def get_trace(trace_id: str) -> Dict[str, Any] | None:
+    """Return the full run tree of a locally buffered trace."""
+    return _tracer.buffer.get(trace_id) if _tracer is not None else None
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait for queued traces to be exported; return False on timeout."""
+    if _tracer is None or _tracer.exporter is None:
+        return True
+    return _tracer.exporter.flush(timeout)
+
+
+def dumps(value: Any) -> str:
+    """JSON-encode buffered traces, stringifying messages, datetimes and ids."""
+    return json.dumps(value, default=str, ensure_ascii=False)
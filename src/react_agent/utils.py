@@ -1,10 +1,11 @@
 """Utility & helper functions."""
 
 import json
+import os
 from pathlib import Path
-from typing import Dict, Any
-import aiofiles
+from typing import Any, Dict
 
+import aiofiles
 from langchain_core.messages import BaseMessage
 
 
@@ -31,6 +32,9 @@ async def load_mcp_config_json(filepath: str = "mcp_config.json") -> Dict[str, A
        - Adds "transport": "stdio" if the command is "npx"
        - Adds "transport": "sse" otherwise
 
+    With `MCP_CONFIG_PROFILE` set (e.g. `test`), `mcp_config.test.json` is read
+    instead of `mcp_config.json`.
+
     Returns:
         Dict[str, Any]: The processed configuration dictionary
 
@@ -40,6 +44,9 @@ async def load_mcp_config_json(filepath: str = "mcp_config.json") -> Dict[str, A
     """
     # Determine the path of the mcp_config.json file
     config_path = Path(__file__).parent / filepath
+    if profile := os.getenv("MCP_CONFIG_PROFILE"):
+        # 프로필을 지정하면 같은 이름에 프로필이 붙은 파일을 씁니다 (mcp_config.test.json 등).
+        config_path = config_path.with_suffix(f".{profile}{config_path.suffix}")
 
     try:
         # Load the JSON file asynchronously using aiofiles
@@ -0,0 +1,233 @@
+"""Boot-time warmup and readiness state.
+
+The warmup runs the work the first request would otherwise pay for: loading
+and validating credentials, reading the MCP configuration, starting the pooled
+MCP servers, creating the chat model client and compiling the nested agent.
+Optionally a canned dry run goes through a compiled agent with a fake model.
+
+Readiness only flips to `ready` once every stage has completed, so a load
+balancer polling `/ready` (see `react_agent.webapp`) never routes traffic to a
+cold instance.
+
+`startup()` configures the process-wide logging, sampled tracing and
+profiling hooks, reads the model price table and makes SIGHUP reload the
+credentials. The servers call it when they start, so importing
+`react_agent.graph` has no side effects.
+
+Settings (environment variables):
+
+- `WARMUP_ENABLED`: `true` (default) to warm up when the server starts.
+- `WARMUP_DRY_RUN`: `true` to include the fake-model dry run (default `false`).
+- `WARMUP_TIMEOUT`: seconds before the warmup is reported as failed (default 120).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+Status = Literal["idle", "warming", "ready", "failed"]
+
+
+@dataclass
+class WarmupState:
+    """Progress of the warmup, reported by the readiness endpoint."""
+
+    status: Status = "idle"
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the instance may receive traffic."""
+        return self.status == "ready"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the state as a JSON-serializable dict."""
+        return {
+            "status": self.status,
+            "stages": {
+                name: round(seconds, 4) for name, seconds in self.stages.items()
+            },
+            "error": self.error,
+        }
+
+
+class DryRunModel(BaseChatModel):
+    """A chat model that answers every prompt with a canned reply."""
+
+    reply: str = "pong"
+
+    @property
+    def _llm_type(self) -> str:
+        return "warmup-dry-run"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> DryRunModel:
+        """Ignore the tools; the dry run never calls them."""
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.reply))]
+        )
+
+
+state = WarmupState()
+_task: asyncio.Task[WarmupState] | None = None
+_started = False
+
+
+def startup() -> None:
+    """Configure logging, tracing, profiling and credential reloads (once)."""
+    global _started
+    if _started:
+        return
+    from react_agent.accounting import load_prices
+    from react_agent.api_keys import install_reload_signal
+    from react_agent.logging_config import configure_logging
+    from react_agent.profiling import install_profiler
+    from react_agent.tracing import configure_tracing
+
+    # 로그는 큐에 넣고 별도 스레드가 출력하므로 이벤트 루프가 I/O로 막히지 않습니다.
+    # 호스트 서버가 이미 로깅을 설정했다면 LOG_PROFILE을 지정했을 때만 큐를 거치도록 바꿉니다.
+    if os.getenv("LOG_PROFILE") or not logging.getLogger().handlers:
+        configure_logging()
+    # TRACING_MODE=sampled 이면 일부 스레드만 추적하고, 트레이스는 백그라운드 스레드가 내보냅니다.
+    configure_tracing()
+    # configurable.profile 이 켜진 실행만 루트 실행 단위로 프로파일링합니다.
+    install_profiler()
+    # 가격표(MODEL_PRICES 파일)는 첫 모델 호출 중이 아니라 시작할 때 읽습니다.
+    load_prices()
+    # SIGHUP 을 받으면 자격 증명을 다시 읽습니다. 시그널 핸들러는 메인 스레드에서만 설치할 수 있습니다.
+    if (
+        hasattr(signal, "SIGHUP")
+        and threading.current_thread() is threading.main_thread()
+    ):
+        install_reload_signal()
+    _started = True
+
+
+async def warmup(
+    config: RunnableConfig | None = None, *, dry_run: bool | None = None
+) -> WarmupState:
+    """Run every warmup stage and mark the instance ready.
+
+    Args:
+        config: The config whose `configurable` values select the MCP
+            configuration and graph mode to warm up.
+        dry_run: Whether to run the fake-model dry run. Defaults to
+            `WARMUP_DRY_RUN`.
+
+    Returns:
+        WarmupState: The final state, also available as `warmup.state`.
+    """
+    from langgraph.prebuilt import create_react_agent
+
+    from react_agent import mcp_pool
+    from react_agent.configuration import Configuration
+    from react_agent.secret_providers import ensure_default_provider
+
+    graph_module = _graph_module()
+    if dry_run is None:
+        dry_run = os.getenv("WARMUP_DRY_RUN", "false").lower() == "true"
+
+    state.status = "warming"
+    state.stages = {}
+    state.error = None
+    tools: List[Any] = []
+
+    async def credentials() -> None:
+        await ensure_default_provider()
+        await graph_module.check_api_keys()
+
+    async def configuration() -> None:
+        nonlocal servers
+        servers = await graph_module.load_mcp_servers(
+            Configuration.from_runnable_config(config or {})
+        )
+
+    async def mcp_tools() -> None:
+        nonlocal tools
+        tools = await mcp_pool.get_tools(servers)
+
+    async def chat_model() -> None:
+        nonlocal model
+        model = graph_module.load_chat_model()
+
+    async def agent() -> None:
+        graph_module.get_agent(model, tools)
+
+    async def fake_run() -> None:
+        await create_react_agent(DryRunModel(), tools).ainvoke(
+            {"messages": [("user", "ping")]}
+        )
+
+    servers: Dict[str, Any] = {}
+    model: Any = None
+    stages = [credentials, configuration, mcp_tools, chat_model, agent]
+    if dry_run:
+        stages.append(fake_run)
+    try:
+        for stage in stages:
+            started = time.perf_counter()
+            await stage()
+            state.stages[stage.__name__] = time.perf_counter() - started
+    except Exception as e:
+        state.status = "failed"
+        state.error = f"{type(e).__name__}: {e}"
+        logger.error(f"워밍업 실패: {state.error}")
+        return state
+    state.status = "ready"
+    logger.info(f"워밍업 완료: {state.as_dict()['stages']}")
+    return state
+
+
+def start_warmup(config: RunnableConfig | None = None) -> asyncio.Task[WarmupState]:
+    """Start the warmup in the background once and return its task."""
+    global _task
+    if _task is None:
+        timeout = float(os.getenv("WARMUP_TIMEOUT", "120"))
+        _task = asyncio.create_task(
+            _warmup_with_timeout(config, timeout), name="warmup"
+        )
+    return _task
+
+
+async def _warmup_with_timeout(
+    config: RunnableConfig | None, timeout: float
+) -> WarmupState:
+    try:
+        async with asyncio.timeout(timeout):
+            return await warmup(config)
+    except TimeoutError:
+        state.status = "failed"
+        state.error = f"warmup did not finish within {timeout:.0f}s"
+        logger.error(f"워밍업 실패: {state.error}")
+        return state
+
+
+def _graph_module() -> Any:
+    # `react_agent.graph` 속성은 컴파일된 그래프이므로 모듈을 직접 가져옵니다.
+    import importlib
+
+    return importlib.import_module("react_agent.graph")
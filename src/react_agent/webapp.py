@@ -0,0 +1,103 @@
+"""Custom HTTP routes mounted next to the LangGraph API server.
+
+Registered in `langgraph.json` under `http.app`. The warmup starts with the
+server and `/ready` returns 200 only once it has completed. `/metrics` serves
+the Prometheus metrics of `react_agent.metrics`, `/usage` the token and cost
+totals of `react_agent.accounting` and `/traces` the recently sampled traces
+kept locally by `react_agent.tracing`. On shutdown the in-flight runs
+are drained and the MCP servers are stopped.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from react_agent import accounting, metrics, tracing, warmup
+from react_agent.lifecycle import lifecycle
+
+
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe: 200 when warm, 503 while warming or after a failed warmup.
+
+    With `WARMUP_ENABLED=false` the instance is ready as soon as it runs. While
+    the server drains for shutdown it is never ready.
+    """
+    if lifecycle.draining:
+        return JSONResponse({"status": "draining"}, status_code=503)
+    if not _warmup_enabled():
+        return JSONResponse({"status": "ready", "warmup": "disabled"})
+    if warmup.state.status == "idle":
+        # 수명 주기 이벤트를 지원하지 않는 서버에서도 첫 확인 때 워밍업이 시작되도록 합니다.
+        warmup.start_warmup()
+    return JSONResponse(
+        warmup.state.as_dict(), status_code=200 if warmup.state.ready else 503
+    )
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus metrics of this process."""
+    return Response(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+async def usage(request: Request) -> JSONResponse:
+    """Token and cost totals of this process.
+
+    `?by=model|tool|thread|run` picks the grouping, `?thread_id=` lists the
+    runs of one thread and `?limit=` caps the number of entries.
+    """
+    params = request.query_params
+    by = "run" if "thread_id" in params else params.get("by", "model")
+    try:
+        totals = accounting.summary(
+            by, int(params.get("limit", "50")), params.get("thread_id")
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"by": by, "usage": totals})
+
+
+async def traces(request: Request) -> Response:
+    """Recently sampled traces of this process, or one trace by id."""
+    trace_id = request.path_params.get("trace_id")
+    if trace_id is None:
+        body = {"mode": tracing.tracing_mode(), "traces": tracing.recent_traces()}
+    else:
+        body = tracing.get_trace(trace_id)
+        if body is None:
+            return JSONResponse({"error": "trace not found"}, status_code=404)
+    return Response(tracing.dumps(body), media_type="application/json")
+
+
+def _warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Warm up when the server starts; drain and clean up when it stops."""
+    warmup.startup()
+    if _warmup_enabled():
+        warmup.start_warmup()
+    yield
+    await lifecycle.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route("/ready", ready),
+        Route("/metrics", metrics_endpoint),
+        Route("/usage", usage),
+        Route("/traces", traces),
+        Route("/traces/{trace_id}", traces),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,86 @@
+import importlib
+from typing import Any, Dict, List, Optional
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from react_agent import mcp_pool
+
+# `react_agent.graph` is shadowed by the compiled graph re-exported from the package.
+graph_module = importlib.import_module("react_agent.graph")
+
+
+def tool_names(tools: Any) -> List[str]:
+    return [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+
+
+class FakeToolCallingModel(BaseChatModel):
+    """Call the `echo` tool once, then answer with the tool result."""
+
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeToolCallingModel":
+        return self.model_copy(update={"bound_tools": tool_names(tools)})
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"done: {last.content}")
+        else:
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": "echo", "args": {"text": "hi"}, "id": "call-1"}],
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@tool
+def echo(text: str) -> str:
+    """Echo the given text."""
+    return text.upper()
+
+
+class SingleModeGraph:
+    """The compiled graph with a fake model and `echo` as the only MCP tool."""
+
+    def __init__(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.model: BaseChatModel = FakeToolCallingModel()
+        self.tools: List[Any] = [echo]
+        monkeypatch.setattr(
+            graph_module, "load_chat_model", lambda api_keys=None: self.model
+        )
+        monkeypatch.setattr(mcp_pool, "get_tools", self._get_tools)
+
+    async def _get_tools(self, mcp_servers: Any) -> List[Any]:
+        return self.tools
+
+    def ainvoke(
+        self, text: str, thread_id: Optional[str] = None, **configurable: Any
+    ) -> Any:
+        """Start one run of `text` in single mode unless `graph_mode` says otherwise."""
+        settings: Dict[str, Any] = {"graph_mode": "single", **configurable}
+        if thread_id is not None:
+            settings["thread_id"] = thread_id
+        return graph_module.graph.ainvoke(
+            {"messages": [("user", text)]}, {"configurable": settings}
+        )
+
+
+@pytest.fixture
+def single_mode_graph(monkeypatch: pytest.MonkeyPatch) -> SingleModeGraph:
+    return SingleModeGraph(monkeypatch)
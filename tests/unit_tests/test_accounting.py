@@ -0,0 +1,148 @@
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatResult
+
+from react_agent import accounting, metrics
+from react_agent.accounting import (
+    AccountingCallbackHandler,
+    Ledger,
+    load_prices,
+    message_cost,
+    price_for,
+    tool_shares,
+)
+from react_agent.webapp import app
+from tests.unit_tests.conftest import FakeToolCallingModel, graph_module
+
+USAGE = {
+    "input_tokens": 1000,
+    "output_tokens": 100,
+    "total_tokens": 1100,
+    "input_token_details": {"cache_read": 400},
+}
+
+
+class PricedModel(FakeToolCallingModel):
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": "claude-3-7-sonnet-20250219"}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = super()._generate(messages, stop, run_manager, **kwargs)
+        message = result.generations[0].message
+        message.usage_metadata = USAGE  # type: ignore[attr-defined]
+        return result
+
+
+def test_cost_uses_the_longest_matching_price(monkeypatch) -> None:
+    monkeypatch.setenv("MODEL_PRICES", '{"claude-3-7-sonnet-2025": {"output": 30}}')
+    message = AIMessage(
+        content="",
+        usage_metadata=USAGE,
+        response_metadata={"model": "claude-3-7-sonnet-20250219"},
+    )
+
+    assert price_for("claude-3-7-sonnet-20250219")["output"] == 30
+    # 600 uncached * $3 + 400 cached * $0.30 + 100 output * $30 per million tokens
+    assert message_cost(message) == pytest.approx(
+        (600 * 3 + 400 * 0.3 + 100 * 30) / 1e6
+    )
+    assert message_cost(AIMessage(content="", usage_metadata=USAGE)) == 0.0
+
+
+def test_price_file_is_read_once_at_startup(monkeypatch, tmp_path) -> None:
+    prices = tmp_path / "prices.json"
+    prices.write_text('{"claude-3-7-sonnet-2025": {"output": 45}}')
+    monkeypatch.setenv("MODEL_PRICES", str(prices))
+
+    load_prices()
+    prices.unlink()
+
+    assert price_for("claude-3-7-sonnet-20250219")["output"] == 45
+
+
+def test_cancelled_calls_do_not_pile_up_in_the_handler() -> None:
+    handler = AccountingCallbackHandler(Ledger(), max_runs=2)
+    for run_id in range(5):
+        handler.on_chat_model_start({}, [[HumanMessage(content="hi")]], run_id=run_id)
+
+    assert list(handler._started) == [3, 4]
+
+
+def test_tool_shares_split_the_prompt_by_tool_results() -> None:
+    prompt = [
+        HumanMessage(content="x" * 10),
+        AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "1"}]),
+        ToolMessage(content="s" * 60, tool_call_id="1", name="search"),
+        AIMessage(content="", tool_calls=[{"name": "read", "args": {}, "id": "2"}]),
+        ToolMessage(content="r" * 30, tool_call_id="2", name="read"),
+    ]
+
+    shares, triggering = tool_shares(prompt)
+
+    assert shares == {"search": 0.6, "read": 0.3}
+    assert triggering == ["read"]
+
+
+@pytest.mark.asyncio
+async def test_graph_run_is_accounted_per_model_thread_run_and_tool(
+    monkeypatch, single_mode_graph
+) -> None:
+    ledger = Ledger()
+    monkeypatch.setattr(accounting, "ledger", ledger)
+    monkeypatch.setattr(graph_module._accounting_handler, "ledger", ledger)
+    single_mode_graph.model = PricedModel()
+    model = "claude-3-7-sonnet-20250219"
+    cost_before = accounting.MODEL_COST.value(model=model)
+    calls_before = metrics.MODEL_CALL_SECONDS.count(model=model, status="ok")
+
+    await single_mode_graph.ainvoke("say hi", "acct-1")
+
+    call_cost = (600 * 3 + 400 * 0.3 + 100 * 15) / 1e6
+    thread = ledger.get("thread", "acct-1")
+    assert (
+        thread.calls,
+        thread.input_tokens,
+        thread.output_tokens,
+        thread.cached_tokens,
+    ) == (
+        2,
+        2000,
+        200,
+        800,
+    )
+    assert thread.cost == pytest.approx(2 * call_cost)
+    assert ledger.get("model", model).calls == 2
+    assert ledger.get("run", "acct-1:1").calls == 2
+    # 두 번째 호출은 echo 결과가 이끌어 냈으므로 출력 토큰이 모두 echo 에 돌아갑니다.
+    tool = ledger.get("tool", "echo")
+    assert (tool.calls, tool.output_tokens) == (1, 100)
+    assert 0 < tool.input_tokens < 1000
+    assert accounting.MODEL_COST.value(model=model) - cost_before == pytest.approx(
+        2 * call_cost
+    )
+    # 비용과 호출 시간 메트릭이 같은 모델 레이블을 씁니다.
+    assert (
+        metrics.MODEL_CALL_SECONDS.count(model=model, status="ok") == calls_before + 2
+    )
+    assert "agent_tool_cost_usd_total" in metrics.render()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        by_model = (await client.get("/usage")).json()
+        runs = (await client.get("/usage", params={"thread_id": "acct-1"})).json()
+        bad = await client.get("/usage", params={"by": "planet"})
+
+    assert by_model["usage"][0]["key"] == model
+    assert [r["key"] for r in runs["usage"]] == ["acct-1:1"]
+    assert bad.status_code == 400
@@ -0,0 +1,86 @@
+import json
+import os
+import signal
+import threading
+
+import pytest
+
+from react_agent import api_keys
+
+ANTHROPIC_KEY = "sk-ant-api03-" + "a" * 40
+OPENAI_KEY = "sk-proj-" + "b" * 40
+
+
+@pytest.fixture(autouse=True)
+def fresh_credentials(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api_keys, "_credentials", None)
+    monkeypatch.setattr(api_keys, "_secrets_provider", None)
+    for name in api_keys.CREDENTIAL_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_credentials_are_validated_once(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", ANTHROPIC_KEY)
+    calls = []
+    original = api_keys.is_valid_anthropic_key
+    monkeypatch.setattr(
+        api_keys,
+        "is_valid_anthropic_key",
+        lambda key: calls.append(key) or original(key),
+    )
+
+    first = api_keys.get_credentials()
+    assert api_keys.get_credentials() is first
+    assert api_keys.get_api_key("ANTHROPIC_API_KEY") == ANTHROPIC_KEY
+    assert first.available_providers == ("anthropic",)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_env_change_refreshes_credentials(monkeypatch) -> None:
+    first = await api_keys.aget_credentials()
+    assert first.available_providers == ()
+
+    monkeypatch.setenv("OPENAI_API_KEY", OPENAI_KEY)
+    # 동기 조회는 캐시만 읽고, 다시 읽는 일은 비동기 조회가 맡습니다.
+    assert api_keys.get_credentials() is first
+    second = await api_keys.aget_credentials()
+    assert second is not first
+    assert second.available_providers == ("openai",)
+
+
+@pytest.mark.asyncio
+async def test_key_file_change_refreshes_credentials(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(api_keys, "CREDENTIALS_FILE_CHECK_INTERVAL", 0.0)
+    assert (await api_keys.aget_credentials()).available_providers == ()
+
+    (tmp_path / ".env.json").write_text(
+        json.dumps({"ANTHROPIC_API_KEY": ANTHROPIC_KEY})
+    )
+    assert (await api_keys.aget_credentials()).available_providers == ("anthropic",)
+
+
+@pytest.mark.asyncio
+async def test_keys_are_read_off_the_event_loop(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", ANTHROPIC_KEY)
+    threads = []
+    original = api_keys.load_api_keys_from_env
+    monkeypatch.setattr(
+        api_keys,
+        "load_api_keys_from_env",
+        lambda: threads.append(threading.current_thread()) or original(),
+    )
+
+    assert (await api_keys.aget_credentials()).available_providers == ("anthropic",)
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        api_keys.install_reload_signal(signal.SIGUSR1)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert len(threads) == 1
+        await api_keys.aget_credentials()
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
@@ -0,0 +1,74 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from react_agent.budget import RunBudget, measure_run, partial_answer, should_stop
+
+
+def _tool_round(i: int):
+    return [
+        AIMessage(
+            content=f"step {i}",
+            tool_calls=[{"name": "echo", "args": {}, "id": f"c{i}"}],
+            usage_metadata={
+                "input_tokens": 90,
+                "output_tokens": 10,
+                "total_tokens": 100,
+            },
+        ),
+        ToolMessage(content="ok", tool_call_id=f"c{i}"),
+    ]
+
+
+def test_measure_run_counts_only_the_current_run() -> None:
+    messages = [
+        HumanMessage(content="old"),
+        *_tool_round(0),
+        HumanMessage(content="new"),
+    ]
+    messages += _tool_round(1) + _tool_round(2)
+
+    usage = measure_run(messages, started_at=100.0, now=130.0)
+
+    assert (usage.steps, usage.tool_calls, usage.tokens, usage.seconds) == (
+        2,
+        2,
+        200,
+        30.0,
+    )
+
+
+def test_should_stop_reports_the_exhausted_limit() -> None:
+    messages = [HumanMessage(content="q"), *_tool_round(0)]
+    started_at = 1.0
+
+    assert should_stop(RunBudget(), messages, started_at) is None
+    assert should_stop(RunBudget(max_steps=1), messages, started_at) == "steps"
+    assert should_stop(RunBudget(max_tokens=100), messages, started_at) == "tokens"
+    assert should_stop(RunBudget(max_seconds=0.5), messages, started_at) == "time"
+    # The pending tool call of the last AI message would exceed the limit.
+    messages.append(_tool_round(1)[0])
+    assert (
+        should_stop(RunBudget(max_tool_calls=1), messages, started_at) == "tool calls"
+    )
+
+
+def test_final_answers_are_never_stopped() -> None:
+    messages = [HumanMessage(content="q"), *_tool_round(0), AIMessage(content="done")]
+    assert should_stop(RunBudget(max_steps=1), messages, 1.0) is None
+
+
+def test_partial_answer_keeps_latest_model_text() -> None:
+    messages = [HumanMessage(content="q"), *_tool_round(0)]
+    assert "step 0" in partial_answer(messages, "time").content
+    assert "Sorry" in partial_answer([HumanMessage(content="q")], "time").content
+
+
+def test_estimated_cost_limit_stops_the_run() -> None:
+    round_ = _tool_round(0)
+    round_[0].response_metadata = {"model_name": "gpt-4-turbo"}
+    messages = [HumanMessage(content="q"), *round_]
+
+    # 90 input * $10 + 10 output * $30 per million tokens
+    assert measure_run(messages, started_at=1.0).cost == pytest.approx(0.0012)
+    assert should_stop(RunBudget(max_cost=0.001), messages, 1.0) == "cost"
+    assert should_stop(RunBudget(max_cost=0.01), messages, 1.0) is None
@@ -0,0 +1,144 @@
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.tools import StructuredTool
+
+from react_agent import mcp_pool, serve
+from react_agent.metrics import CANCELLED
+from tests.unit_tests.conftest import FakeToolCallingModel
+
+
+class SlowModel(FakeToolCallingModel):
+    """A model whose HTTP request never finishes."""
+
+    started: Any = None
+    cancelled: Any = None
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        raise AssertionError("unreachable")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("graph_mode", ["single", "nested"])
+async def test_cancelled_run_cancels_the_model_request(
+    single_mode_graph, graph_mode
+) -> None:
+    model = single_mode_graph.model = SlowModel(
+        started=asyncio.Event(), cancelled=asyncio.Event()
+    )
+    before = {
+        stage: CANCELLED.value(stage=stage) for stage in ("model_node", "model_call")
+    }
+
+    run = asyncio.create_task(
+        single_mode_graph.ainvoke("hi", f"cancel-{graph_mode}", graph_mode=graph_mode)
+    )
+    await asyncio.wait_for(model.started.wait(), 5)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+
+    assert model.cancelled.is_set()
+    for stage, value in before.items():
+        assert CANCELLED.value(stage=stage) == value + 1
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self._request_id = 7
+        self.notifications: List[Any] = []
+
+    async def send_notification(self, notification: Any) -> None:
+        self.notifications.append(notification)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_mcp_call_notifies_the_server() -> None:
+    async def slow_call(**arguments: Any) -> Any:
+        await asyncio.sleep(60)
+
+    session = FakeSession()
+    tool = StructuredTool(
+        name="slow",
+        description="Never finishes.",
+        args_schema={"type": "object", "properties": {}},
+        coroutine=slow_call,
+    )
+    tool = mcp_pool.cancel_on_abandon(tool, session)
+    call = asyncio.create_task(tool.ainvoke({}))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    [notification] = session.notifications
+    assert notification.root.method == "notifications/cancelled"
+    assert notification.root.params.requestId == 7
+
+
+def test_session_without_request_id_is_reported_not_wrapped(caplog) -> None:
+    class OtherSession:
+        async def send_notification(self, notification: Any) -> None:
+            raise AssertionError("no request id to cancel")
+
+    async def call(**arguments: Any) -> Any:
+        return "ok"
+
+    tool = StructuredTool(
+        name="other",
+        description="Runs on an MCP client without `_request_id`.",
+        args_schema={"type": "object", "properties": {}},
+        coroutine=call,
+    )
+    before = mcp_pool.INTERNALS_MISSING.value(attribute="OtherSession._request_id")
+
+    assert mcp_pool.cancel_on_abandon(tool, OtherSession()).coroutine is call
+    assert (
+        mcp_pool.INTERNALS_MISSING.value(attribute="OtherSession._request_id")
+        == before + 1
+    )
+    assert "OtherSession._request_id" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_the_run() -> None:
+    messages = asyncio.Queue()
+
+    class FakeRequest:
+        async def receive(self) -> Any:
+            return await messages.get()
+
+    cancelled = asyncio.Event()
+
+    async def run() -> str:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    before = CANCELLED.value(stage="run")
+    waiting = asyncio.create_task(serve._cancel_on_disconnect(FakeRequest(), run()))
+    await asyncio.sleep(0.01)
+    await messages.put({"type": "http.disconnect"})
+
+    assert await waiting is None
+    assert cancelled.is_set()
+    assert CANCELLED.value(stage="run") == before + 1
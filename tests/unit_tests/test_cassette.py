@@ -0,0 +1,141 @@
+import json
+import re
+import sys
+from typing import Any, List
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import StructuredTool
+from mcp.types import ImageContent
+
+from react_agent import cassette, mcp_pool, metrics, tool_outputs
+from react_agent.tool_outputs import OutputStore
+from tests.unit_tests.conftest import FakeToolCallingModel, echo, graph_module
+
+
+@pytest.mark.asyncio
+async def test_recorded_run_replays_without_model_or_mcp_server(
+    monkeypatch, tmp_path
+) -> None:
+    config_path = tmp_path / "mcp_config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "fake": {
+                        "command": sys.executable,
+                        "args": ["-m", "react_agent.fake_servers", "mcp"],
+                        "transport": "stdio",
+                    }
+                }
+            }
+        )
+    )
+    monkeypatch.setattr(graph_module, "_chat_models", {})
+    monkeypatch.setattr(graph_module, "_agents", {})
+    monkeypatch.setattr(
+        graph_module, "_create_chat_model", lambda *args: FakeToolCallingModel()
+    )
+    path = str(tmp_path / "run.cassette.json.gz")
+
+    def config(thread_id: str) -> Any:
+        return {"configurable": {"mcp_tools": str(config_path), "thread_id": thread_id}}
+
+    with cassette.use_cassette(path, "record"):
+        try:
+            recorded = await graph_module.graph.ainvoke(
+                {"messages": [("user", "hi")]}, config("record")
+            )
+        finally:
+            await mcp_pool.aclose_all()
+    assert recorded["messages"][-1].content == "done: hi"
+
+    def no_model(*args: Any) -> Any:
+        raise AssertionError("replay must not create a model")
+
+    monkeypatch.setattr(graph_module, "_create_chat_model", no_model)
+    with cassette.use_cassette(path, "replay", latency="zero"):
+        replayed = await graph_module.graph.ainvoke(
+            {"messages": [("user", "hi")]}, config("replay")
+        )
+    assert mcp_pool._clients == {}
+    assert [m.content for m in replayed["messages"]] == [
+        m.content for m in recorded["messages"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_request_is_a_cassette_miss(tmp_path) -> None:
+    path = str(tmp_path / "empty.json")
+    with cassette.use_cassette(path, "record"):
+        pass
+    with cassette.use_cassette(path, "replay"):
+        with pytest.raises(cassette.CassetteMiss):
+            await cassette.replay_model().ainvoke("hello")
+
+
+@pytest.mark.asyncio
+async def test_tool_artifacts_and_offloaded_outputs_replay(
+    monkeypatch, tmp_path
+) -> None:
+    image = ImageContent(type="image", data="aGk=", mimeType="image/png")
+
+    async def render(**arguments: Any) -> Any:
+        return "x" * 50, [image]
+
+    def tool() -> Any:
+        return StructuredTool(
+            name="render",
+            description="Render a picture.",
+            args_schema={"type": "object", "properties": {}},
+            coroutine=render,
+            response_format="content_and_artifact",
+        )
+
+    call = {"name": "render", "args": {}, "id": "c1", "type": "tool_call"}
+    monkeypatch.setenv("TOOL_OUTPUT_MAX_CHARS", "10")
+    monkeypatch.setattr(tool_outputs, "store", OutputStore())
+    path = str(tmp_path / "tools.json")
+    with cassette.use_cassette(path, "record") as recording:
+        recorded_tool, _ = mcp_pool.publish([cassette.record_tool_calls(tool())])
+        recording.record_tools("config", [recorded_tool])
+        recorded = await recorded_tool.ainvoke(call)
+
+    # 재생은 새 프로세스처럼 빈 저장소에서 시작해도 같은 핸들로 전체 출력을 읽을 수 있어야 합니다.
+    monkeypatch.setattr(tool_outputs, "store", OutputStore())
+    with cassette.use_cassette(path, "replay", latency="zero"):
+        replayed_tool, read_tool_output = mcp_pool.publish(
+            cassette.replay_tools("config")
+        )
+        replayed = await replayed_tool.ainvoke(call)
+
+    assert replayed.content == recorded.content
+    assert replayed.artifact == recorded.artifact == [image]
+    [handle] = re.findall(r'handle="(out_[0-9a-f]+)"', replayed.content)
+    assert read_tool_output.invoke({"handle": handle, "offset": 40}) == (
+        "xxxxxxxxxx\n\n[End of output: characters 40-50 of 50.]"
+    )
+
+
+class StartedModels(BaseCallbackHandler):
+    def __init__(self) -> None:
+        self.models: List[str] = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        self.models.append(metrics.model_name(kwargs.get("invocation_params")))
+
+
+@pytest.mark.asyncio
+async def test_recording_reports_the_real_model_and_serves_sync_calls(tmp_path) -> None:
+    path = str(tmp_path / "model.json")
+    started = StartedModels()
+    with cassette.use_cassette(path, "record"):
+        model = cassette.wrap_model(FakeToolCallingModel()).bind_tools([echo])
+        # 이벤트 루프 안에서 동기로 호출해도 됩니다.
+        model.invoke("say hi", {"callbacks": [started]})
+        await model.ainvoke("say hi", {"callbacks": [started]})
+    assert started.models == ["fake-tool-calling", "fake-tool-calling"]
+
+    with cassette.use_cassette(path, "replay", latency="zero"):
+        message = cassette.replay_model().bind_tools([echo]).invoke("say hi")
+    assert message.tool_calls[0]["name"] == "echo"
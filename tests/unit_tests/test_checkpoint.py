@@ -0,0 +1,109 @@
+import operator
+import os
+from typing import Annotated, List
+
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+
+from react_agent.checkpoint import ArchivingMemorySaver
+
+
+class CounterState(TypedDict):
+    items: Annotated[List[str], operator.add]
+
+
+def _build(checkpointer: ArchivingMemorySaver):
+    builder = StateGraph(CounterState)
+    builder.add_node("append", lambda state: {"items": ["x"]})
+    builder.add_edge("__start__", "append")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def test_idle_threads_are_archived_and_paged_back_in(tmp_path) -> None:
+    saver = ArchivingMemorySaver(archive_dir=str(tmp_path), idle_seconds=60)
+    graph = _build(saver)
+    config = {"configurable": {"thread_id": "t1"}}
+    graph.invoke({"items": ["a"]}, config)
+
+    assert saver.archive_idle(now=float("inf")) == 1
+    assert saver.archived_threads == 1
+    assert "t1" not in saver.storage
+    assert os.listdir(saver.archive_dir)
+
+    assert graph.get_state(config).values["items"] == ["a", "x"]
+    assert saver.archived_threads == 0
+
+    graph.invoke({"items": ["b"]}, config)
+    assert graph.get_state(config).values["items"] == ["a", "x", "b", "x"]
+
+
+def test_recently_used_threads_stay_in_memory(tmp_path) -> None:
+    saver = ArchivingMemorySaver(archive_dir=str(tmp_path), idle_seconds=3600)
+    graph = _build(saver)
+    graph.invoke({"items": ["a"]}, {"configurable": {"thread_id": "t1"}})
+
+    assert saver.archive_idle() == 0
+    assert "t1" in saver.storage
+
+
+def test_forked_thread_shares_parent_lineage(tmp_path) -> None:
+    saver = ArchivingMemorySaver(archive_dir=str(tmp_path))
+    graph = _build(saver)
+    parent = {"configurable": {"thread_id": "parent"}}
+    graph.invoke({"items": ["a"]}, parent)
+    parent_checkpoints = len(saver.storage["parent"][""])
+
+    child = saver.fork_thread(parent, "child")
+    assert "child" not in saver.storage
+    assert graph.get_state(child).values["items"] == ["a", "x"]
+
+    graph.invoke({"items": ["b"]}, {"configurable": {"thread_id": "child"}})
+    assert graph.get_state({"configurable": {"thread_id": "child"}}).values[
+        "items"
+    ] == ["a", "x", "b", "x"]
+    assert graph.get_state(parent).values["items"] == ["a", "x"]
+    history = list(graph.get_state_history({"configurable": {"thread_id": "child"}}))
+    assert len(history) == len(saver.storage["child"][""]) + parent_checkpoints
+
+    saver.delete_thread("parent")
+    assert graph.get_state({"configurable": {"thread_id": "child"}}).values[
+        "items"
+    ] == ["a", "x", "b", "x"]
+    assert len(
+        list(graph.get_state_history({"configurable": {"thread_id": "child"}}))
+    ) == len(history)
+
+
+def test_deleting_the_middle_of_a_fork_chain_keeps_the_fork_point(tmp_path) -> None:
+    saver = ArchivingMemorySaver(archive_dir=str(tmp_path))
+    graph = _build(saver)
+    root = {"configurable": {"thread_id": "root"}}
+    graph.invoke({"items": ["a"]}, root)
+    early = graph.get_state(root).config
+    graph.invoke({"items": ["b"]}, root)
+    middle = saver.fork_thread(root, "middle")
+    graph.invoke({"items": ["m"]}, {"configurable": {"thread_id": "middle"}})
+    # leaf 는 middle 이 root 에서 물려받은, middle 의 포크 지점보다 앞선 체크포인트에서 갈라집니다.
+    saver.fork_thread(
+        {
+            "configurable": {
+                "thread_id": "middle",
+                "checkpoint_id": early["configurable"]["checkpoint_id"],
+            }
+        },
+        "leaf",
+    )
+    leaf = {"configurable": {"thread_id": "leaf"}}
+    history = [s.values["items"] for s in graph.get_state_history(leaf)]
+
+    saver.delete_thread("middle")
+
+    assert saver._forks["leaf"] == ("root", early["configurable"]["checkpoint_id"])
+    assert (
+        middle["configurable"]["checkpoint_id"] > early["configurable"]["checkpoint_id"]
+    )
+    assert graph.get_state(leaf).values["items"] == ["a", "x"]
+    assert [s.values["items"] for s in graph.get_state_history(leaf)] == history
+    graph.invoke({"items": ["l"]}, leaf)
+    assert graph.get_state(leaf).values["items"] == ["a", "x", "l", "x"]
+    assert graph.get_state(root).values["items"] == ["a", "x", "b", "x"]
@@ -3,3 +3,23 @@ from react_agent.configuration import Configuration
 
 def test_configuration_empty() -> None:
     Configuration.from_runnable_config({})
+
+
+def test_configuration_is_cached_per_relevant_keys() -> None:
+    first = Configuration.from_runnable_config(
+        {"configurable": {"graph_mode": "single", "thread_id": "a"}}
+    )
+    second = Configuration.from_runnable_config(
+        {"configurable": {"thread_id": "b", "graph_mode": "single"}}
+    )
+    assert first is second
+    assert first.graph_mode == "single"
+    assert Configuration.from_runnable_config({}) is not first
+
+
+def test_configuration_with_unhashable_values_is_not_cached() -> None:
+    config = {"configurable": {"system_prompt": ["not", "hashable"]}}
+    assert Configuration.from_runnable_config(config).system_prompt == [
+        "not",
+        "hashable",
+    ]
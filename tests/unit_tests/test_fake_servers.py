@@ -0,0 +1,66 @@
+import sys
+
+import pytest
+
+from react_agent import mcp_pool, tools, utils
+from react_agent.fake_servers import (
+    BackgroundServer,
+    FakeBehavior,
+    create_mcp_server,
+    create_tavily_app,
+)
+
+
+@pytest.mark.asyncio
+async def test_test_profile_selects_the_fake_servers(monkeypatch) -> None:
+    monkeypatch.setenv("MCP_CONFIG_PROFILE", "test")
+    config = await utils.load_mcp_config_json("mcp_config.json")
+    assert set(config["mcpServers"]) == {"fake-stdio", "fake-sse"}
+
+
+@pytest.mark.asyncio
+async def test_fake_mcp_servers_over_stdio_and_sse() -> None:
+    behavior = FakeBehavior(payload_size=50, seed=1)
+    sse = create_mcp_server(behavior).sse_app()
+    with BackgroundServer(sse) as server:
+        servers = {
+            "stdio": {
+                "command": sys.executable,
+                "args": [
+                    "-m",
+                    "react_agent.fake_servers",
+                    "mcp",
+                    "--payload-size",
+                    "30",
+                ],
+                "transport": "stdio",
+            },
+            "sse": {"url": f"{server.url}/sse", "transport": "sse"},
+        }
+        try:
+            loaded = await mcp_pool.get_tools(servers)
+            fake_read = [t for t in loaded if t.name == "fake_read"]
+            assert len(fake_read) == 2
+            outputs = [await t.ainvoke({"path": "a.txt"}) for t in fake_read]
+        finally:
+            await mcp_pool.aclose_all()
+    assert sorted(len(o) for o in outputs) == [30, 50]
+    assert all(o.startswith("a.txt:") for o in outputs)
+    assert behavior.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fake_tavily_serves_the_search_tool(monkeypatch) -> None:
+    behavior = FakeBehavior(payload_size=20, failure_rate=0.5, seed=3)
+    with BackgroundServer(create_tavily_app(behavior)) as server:
+        monkeypatch.setenv("TAVILY_API_URL", server.url)
+        monkeypatch.setenv("TAVILY_API_KEY", "tvly-fake")
+        config = {"configurable": {"max_search_results": 2}}
+        try:
+            results = await tools.search([f"q{i}" for i in range(8)], config=config)
+        finally:
+            await tools.aclose_tavily_client()
+    assert behavior.calls == 8 and 0 < behavior.failures < 8
+    errors = [r for r in results if "error" in r]
+    assert len(errors) == behavior.failures
+    assert len(results) - len(errors) == 2 * (behavior.calls - behavior.failures)
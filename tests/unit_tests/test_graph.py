@@ -0,0 +1,165 @@
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import tools
+from react_agent.budget import PREBUILT_OUT_OF_STEPS
+from react_agent.fake_servers import BackgroundServer, FakeBehavior, create_tavily_app
+from tests.unit_tests.conftest import FakeToolCallingModel, graph_module
+
+
+@pytest.mark.asyncio
+async def test_single_graph_mode_runs_mcp_tools_in_outer_graph(
+    single_mode_graph,
+) -> None:
+    res = await single_mode_graph.ainvoke("say hi")
+
+    kinds = [type(m).__name__ for m in res["messages"]]
+    assert kinds == ["HumanMessage", "AIMessage", "ToolMessage", "AIMessage"]
+    assert res["messages"][-1].content == "done: HI"
+
+
+@pytest.mark.asyncio
+async def test_single_mode_binds_the_tools_once(monkeypatch, single_mode_graph) -> None:
+    monkeypatch.setattr(graph_module, "_bound_models", {})
+    binds = []
+    model_class = type(single_mode_graph.model)
+    bind_tools = model_class.bind_tools
+
+    def counting_bind_tools(self, tools: Any, **kwargs: Any) -> BaseChatModel:
+        binds.append(tools)
+        return bind_tools(self, tools, **kwargs)
+
+    monkeypatch.setattr(model_class, "bind_tools", counting_bind_tools)
+    await single_mode_graph.ainvoke("say hi")
+    await single_mode_graph.ainvoke("say hi again")
+    assert len(binds) == 1
+
+    # MCP 도구 목록이 바뀌면 (새 리스트) 다시 바인딩합니다.
+    single_mode_graph.tools = list(single_mode_graph.tools)
+    await single_mode_graph.ainvoke("say hi")
+    assert len(binds) == 2
+
+
+class FakeLoopingModel(FakeToolCallingModel):
+    """Keep calling the `echo` tool forever."""
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = AIMessage(
+            content=f"thinking {len(messages)}",
+            tool_calls=[
+                {
+                    "name": "echo",
+                    "args": {"text": "again"},
+                    "id": f"call-{len(messages)}",
+                }
+            ],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.mark.asyncio
+async def test_tool_call_budget_ends_run_with_partial_answer(single_mode_graph) -> None:
+    single_mode_graph.model = FakeLoopingModel()
+    res = await single_mode_graph.ainvoke("loop", max_tool_calls=2)
+
+    tool_messages = [m for m in res["messages"] if isinstance(m, ToolMessage)]
+    assert len(tool_messages) == 2
+    final = res["messages"][-1]
+    assert not final.tool_calls
+    assert "tool calls limit" in final.content
+    assert "thinking" in final.content
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("graph_mode", ["single", "nested"])
+async def test_default_config_ends_a_runaway_loop_with_partial_answer(
+    single_mode_graph, graph_mode
+) -> None:
+    single_mode_graph.model = FakeLoopingModel()
+
+    res = await single_mode_graph.ainvoke(
+        "loop", f"runaway-{graph_mode}", graph_mode=graph_mode
+    )
+
+    final = res["messages"][-1]
+    assert not final.tool_calls
+    assert "steps limit" in final.content
+    assert "thinking" in final.content
+
+
+@pytest.mark.asyncio
+async def test_nested_agent_out_of_steps_ends_with_partial_answer(
+    single_mode_graph,
+) -> None:
+    single_mode_graph.model = FakeLoopingModel()
+    # 예산에 단계 제한이 없으면 중첩 에이전트는 실행 설정의 recursion_limit 에서 멈춥니다.
+    configurable = {
+        "graph_mode": "nested",
+        "recursion_limit": 0,
+        "thread_id": "inner-steps",
+    }
+
+    res = await graph_module.graph.ainvoke(
+        {"messages": [("user", "loop")]},
+        {"recursion_limit": 4, "configurable": configurable},
+    )
+
+    final = res["messages"][-1]
+    assert final.content != PREBUILT_OUT_OF_STEPS
+    assert "steps limit" in final.content and "thinking" in final.content
+
+
+class FakeSearchModel(FakeToolCallingModel):
+    """Call the local `search` tool once, then answer with its result."""
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"found: {last.content}")
+        else:
+            assert "search" in self.bound_tools
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "search", "args": {"query": ["a", "b"]}, "id": "call-1"}
+                ],
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("graph_mode", ["single", "nested"])
+async def test_search_tool_is_bound_in_both_graph_modes(
+    monkeypatch, single_mode_graph, graph_mode
+) -> None:
+    behavior = FakeBehavior(payload_size=10, seed=1)
+    single_mode_graph.model = FakeSearchModel()
+    with BackgroundServer(create_tavily_app(behavior)) as server:
+        monkeypatch.setenv("TAVILY_API_URL", server.url)
+        monkeypatch.setenv("TAVILY_API_KEY", "tvly-fake")
+        try:
+            res = await single_mode_graph.ainvoke(
+                "look it up", f"search-{graph_mode}", graph_mode=graph_mode
+            )
+        finally:
+            await tools.aclose_tavily_client()
+
+    assert behavior.calls == 2
+    assert res["messages"][-1].content.startswith("found: ")
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+# Provider SDKs and optional tools must only be imported when first used.
+LAZY_MODULES = [
+    "anthropic",
+    "openai",
+    "langchain_anthropic",
+    "langchain_openai",
+    "langchain_community",
+    "langchain_mcp_adapters",
+    "tavily",
+]
+
+
+def _loaded_after(statement: str) -> list:
+    code = f"{statement}; import json, sys; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_package_import_does_not_build_the_graph() -> None:
+    assert "react_agent.graph" not in _loaded_after("import react_agent")
+
+
+def test_graph_import_does_not_load_provider_sdks() -> None:
+    loaded = set(_loaded_after("import react_agent.graph"))
+    assert not loaded & set(LAZY_MODULES)
+
+
+def test_graph_import_has_no_side_effects() -> None:
+    code = (
+        "import logging, os, react_agent.graph as g, react_agent.warmup as w; "
+        "print(os.environ.get('LANGSMITH_TRACING'), bool(logging.getLogger().handlers), g._memory is None); "
+        "w.startup(); "
+        "print(os.environ.get('LANGSMITH_TRACING'), bool(logging.getLogger().handlers))"
+    )
+    env = {**os.environ, "TRACING_MODE": "sampled", "LANGSMITH_TRACING": "true"}
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout.splitlines()
+    assert out[-2:] == ["true False True", "false True"]
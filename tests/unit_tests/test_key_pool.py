@@ -0,0 +1,149 @@
+import importlib
+
+import pytest
+
+from react_agent import api_keys, key_pool
+from react_agent.key_pool import KeyPool, parse_keys
+
+graph_module = importlib.import_module("react_agent.graph")
+
+KEY_A = "sk-ant-api03-" + "a" * 40
+KEY_B = "sk-ant-api03-" + "b" * 40
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_parse_keys_reads_optional_weights() -> None:
+    assert parse_keys("k1:3, k2,,k3:x") == [("k1", 3.0), ("k2", 1.0), ("k3:x", 1.0)]
+
+
+def test_least_loaded_selection_spreads_in_flight_requests() -> None:
+    pool = KeyPool("anthropic", [("a", 1.0), ("b", 1.0)])
+    first, second = pool.acquire(), pool.acquire()
+    assert {first, second} == {"a", "b"}
+
+    pool.release(first)
+    assert pool.acquire() == first
+    assert {s.key: s.requests for s in pool.stats()} == {first: 2, second: 1}
+
+
+def test_rate_limited_key_is_quarantined_until_it_expires() -> None:
+    now = [0.0]
+    pool = KeyPool("openai", [("a", 1.0), ("b", 1.0)], clock=lambda: now[0])
+    pool.quarantine("a", 10)
+    assert [pool.acquire() for _ in range(3)] == ["b", "b", "b"]
+
+    now[0] = 11
+    assert pool.acquire() == "a"
+
+
+def test_credentials_collect_the_key_pool(monkeypatch, tmp_path) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api_keys, "_credentials", None)
+    monkeypatch.setattr(api_keys, "_secrets_provider", None)
+    for name in api_keys.CREDENTIAL_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", KEY_A)
+    monkeypatch.setenv("ANTHROPIC_API_KEYS", f"{KEY_B}:2,not-a-key")
+
+    credentials = api_keys.get_credentials()
+    assert credentials.provider_keys("anthropic") == ((KEY_A, 1.0), (KEY_B, 2.0))
+    assert credentials.available_providers == ("anthropic",)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_retries_with_another_key(monkeypatch) -> None:
+    pool = KeyPool("anthropic", [(KEY_A, 1.0), (KEY_B, 1.0)])
+    monkeypatch.setattr(key_pool, "get_pool", lambda provider, keys: pool)
+    monkeypatch.setattr(
+        graph_module,
+        "get_credentials",
+        lambda: api_keys.CredentialState(
+            keys={},
+            openai_valid=False,
+            anthropic_valid=True,
+            langsmith_valid=False,
+            env=(),
+        ),
+    )
+    used = []
+
+    async def call(keys):
+        used.append(keys["anthropic"])
+        if len(used) == 1:
+            raise RateLimitError()
+        return "ok"
+
+    assert await graph_module.call_with_key_pool(call) == "ok"
+    assert len(set(used)) == 2
+    stats = {s.key: s for s in pool.stats()}
+    assert stats[used[0]].rate_limited == 1
+    assert all(s.in_flight == 0 for s in stats.values())
+
+    used.clear()
+    with pytest.raises(RateLimitError):
+        await graph_module.call_with_key_pool(call, can_retry=lambda: False)
+    assert len(used) == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_provider_fails_over_to_the_next(monkeypatch) -> None:
+    pools = {
+        "anthropic": KeyPool("anthropic", [(KEY_A, 1.0)]),
+        "openai": KeyPool("openai", [("sk-openai", 1.0)]),
+    }
+    monkeypatch.setattr(key_pool, "get_pool", lambda provider, keys: pools[provider])
+    monkeypatch.setattr(
+        graph_module,
+        "get_credentials",
+        lambda: api_keys.CredentialState(
+            keys={},
+            openai_valid=True,
+            anthropic_valid=True,
+            langsmith_valid=False,
+            env=(),
+        ),
+    )
+    used = []
+
+    async def call(keys):
+        used.append(dict(keys))
+        if "anthropic" in keys:
+            raise RateLimitError()
+        return "ok"
+
+    assert await graph_module.call_with_key_pool(call) == "ok"
+    assert used == [{"anthropic": KEY_A}, {"openai": "sk-openai"}]
+
+    # 키가 모두 격리된 프로바이더는 건너뛰고 다음 프로바이더부터 시도합니다.
+    used.clear()
+    assert await graph_module.call_with_key_pool(call) == "ok"
+    assert used == [{"openai": "sk-openai"}]
+
+
+def test_chat_model_uses_the_provider_of_the_borrowed_key(monkeypatch) -> None:
+    monkeypatch.setattr(graph_module, "_chat_models", {})
+    monkeypatch.setattr(
+        graph_module,
+        "get_credentials",
+        lambda: api_keys.CredentialState(
+            keys={},
+            openai_valid=True,
+            anthropic_valid=True,
+            langsmith_valid=False,
+            env=(),
+        ),
+    )
+    monkeypatch.setattr(
+        graph_module,
+        "_create_chat_model",
+        lambda provider, model_name, api_key: (provider, api_key),
+    )
+
+    assert graph_module.load_chat_model({"openai": "sk-openai"}) == (
+        "openai",
+        "sk-openai",
+    )
+    assert graph_module.load_chat_model()[0] == "anthropic"
@@ -0,0 +1,64 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from react_agent import lifecycle as lifecycle_module
+from react_agent.lifecycle import (
+    Lifecycle,
+    ShuttingDownError,
+    descendant_pids,
+)
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_short_runs_and_cancels_long_ones() -> None:
+    lifecycle = Lifecycle()
+    finished = []
+
+    async def run(seconds: float) -> None:
+        with lifecycle.track():
+            await asyncio.sleep(seconds)
+            finished.append(seconds)
+
+    short = asyncio.create_task(run(0.01))
+    long = asyncio.create_task(run(10))
+    await asyncio.sleep(0)
+    assert lifecycle.in_flight == 2
+
+    assert await lifecycle.drain(timeout=0.2) == 1
+    assert finished == [0.01]
+    assert short.done() and long.cancelled()
+    with pytest.raises(ShuttingDownError):
+        lifecycle.admit()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+@pytest.mark.asyncio
+async def test_shutdown_terminates_grandchild_processes(monkeypatch) -> None:
+    async def no_clients() -> None:
+        return None
+
+    monkeypatch.setattr(lifecycle_module.mcp_pool, "aclose_all", no_clients)
+    # A shell whose `sleep` child outlives it, like `npx` starting a node server.
+    shell = subprocess.Popen(["sh", "-c", "sleep 60 & wait"])
+    try:
+        for _ in range(100):
+            if len(descendant_pids()) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        tree = descendant_pids()
+        assert shell.pid in tree and len(tree) >= 2
+
+        await Lifecycle().shutdown(timeout=0)
+        assert shell.wait(timeout=5) is not None
+        assert not [pid for pid in descendant_pids() if pid in tree]
+    finally:
+        if shell.poll() is None:
+            shell.kill()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+def test_descendants_of_unknown_process_are_empty() -> None:
+    assert descendant_pids(pid=2**22 + 1) == []
@@ -0,0 +1,77 @@
+import json
+import logging
+
+import pytest
+
+from react_agent.logging_config import (
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    parse_sample_rates,
+    shutdown_logging,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_json_formatter_includes_extra_fields() -> None:
+    record = logging.makeLogRecord(
+        {
+            "name": "react_agent.graph",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": "step %d",
+            "args": (3,),
+            "thread_id": "t-1",
+        }
+    )
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "step 3"
+    assert payload["logger"] == "react_agent.graph"
+    assert payload["thread_id"] == "t-1"
+
+
+def test_sampling_filter_uses_most_specific_rate() -> None:
+    sampler = SamplingFilter(parse_sample_rates("react_agent=1,react_agent.graph=0"))
+    info = logging.makeLogRecord({"name": "react_agent.graph", "levelno": logging.INFO})
+    warning = logging.makeLogRecord(
+        {"name": "react_agent.graph", "levelno": logging.WARNING}
+    )
+    other = logging.makeLogRecord(
+        {"name": "react_agent.mcp_pool", "levelno": logging.INFO}
+    )
+    assert not sampler.filter(info)
+    assert sampler.filter(warning)
+    assert sampler.filter(other)
+
+
+def test_records_are_written_by_the_listener(root_logger) -> None:
+    handler = ListHandler()
+    configure_logging(
+        "production", sample_rates={"noisy": 0}, handlers=[handler], level="INFO"
+    )
+    logging.getLogger("react_agent.test").info("hello", extra={"run_id": "r-1"})
+    logging.getLogger("noisy").info("dropped")
+    shutdown_logging()
+
+    assert len(handler.lines) == 1
+    payload = json.loads(handler.lines[0])
+    assert payload["message"] == "hello"
+    assert payload["run_id"] == "r-1"
@@ -0,0 +1,51 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from react_agent.messages import (
+    CompactMessage,
+    add_compact_messages,
+    from_compact,
+    to_compact,
+)
+
+
+def _conversation():
+    return [
+        HumanMessage(content="hi", id="1"),
+        AIMessage(
+            content="",
+            id="2",
+            tool_calls=[{"name": "echo", "args": {"text": "hi"}, "id": "c1"}],
+            usage_metadata={"input_tokens": 3, "output_tokens": 2, "total_tokens": 5},
+        ),
+        ToolMessage(content="HI", tool_call_id="c1", name="echo", id="3"),
+    ]
+
+
+def test_compact_round_trip() -> None:
+    for message in _conversation():
+        compact = to_compact(message)
+        assert not hasattr(compact, "__dict__")
+        assert from_compact(compact) == message
+
+
+def test_add_compact_messages_appends_replaces_and_removes() -> None:
+    messages = add_compact_messages([], _conversation())
+    assert [m.role for m in messages] == ["human", "ai", "tool"]
+
+    messages = add_compact_messages(messages, [AIMessage(content="edited", id="2")])
+    assert messages[1].content == "edited"
+
+    messages = add_compact_messages(
+        messages, [RemoveMessage(id="3"), ("user", "again")]
+    )
+    assert [m.role for m in messages] == ["human", "ai", "human"]
+    assert messages[-1].id is not None
+
+
+def test_compact_messages_survive_checkpoint_serialization() -> None:
+    serde = JsonPlusSerializer()
+    messages = add_compact_messages([], _conversation())
+    restored = serde.loads_typed(serde.dumps_typed(messages))
+    assert all(isinstance(m, CompactMessage) for m in restored)
+    assert restored == messages
@@ -0,0 +1,70 @@
+import httpx
+import pytest
+
+from react_agent import metrics
+from react_agent.metrics import Histogram
+from react_agent.webapp import app
+from tests.unit_tests.conftest import graph_module
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("test_seconds", "Test.", ("node",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, node='a"b')
+
+    lines = histogram._lines()
+    assert 'test_seconds_bucket{node="a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{node="a\\"b",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{node="a\\"b",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{node="a\\"b"} 3' in lines
+
+
+@pytest.mark.asyncio
+async def test_graph_run_is_exposed_on_metrics_endpoint(
+    monkeypatch, single_mode_graph
+) -> None:
+    # 앞선 테스트의 MCP 서버가 같은 이름의 도구를 등록했을 수 있습니다.
+    monkeypatch.setattr(graph_module._metrics_handler, "tool_servers", {})
+    before = {
+        node: metrics.NODE_SECONDS.count(node=node)
+        for node in ("call_model", "tools", "route_model_output")
+    }
+    tool_calls = metrics.TOOL_SECONDS.count(server="local", tool="echo", status="ok")
+
+    await single_mode_graph.ainvoke("say hi", "metrics")
+
+    assert metrics.NODE_SECONDS.count(node="call_model") == before["call_model"] + 2
+    assert metrics.NODE_SECONDS.count(node="tools") == before["tools"] + 1
+    assert (
+        metrics.NODE_SECONDS.count(node="route_model_output")
+        == before["route_model_output"] + 2
+    )
+    assert (
+        metrics.TOOL_SECONDS.count(server="local", tool="echo", status="ok")
+        == tool_calls + 1
+    )
+    assert metrics.ACTIVE_THREADS.samples() == {(): 0}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://t"
+    ) as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE agent_node_seconds histogram" in response.text
+    assert (
+        'agent_model_call_seconds_count{model="fake-tool-calling",status="ok"}'
+        in response.text
+    )
+    assert "agent_runs_in_flight 0" in response.text
+
+
+def test_cancelled_calls_do_not_pile_up_in_the_handler() -> None:
+    handler = metrics.MetricsCallbackHandler(max_runs=2)
+    # 취소된 호출은 끝 콜백이 오지 않으므로 시작 기록만 남습니다.
+    for run_id in range(5):
+        handler.on_chat_model_start(
+            {}, [[]], run_id=run_id, invocation_params={"model": "m"}
+        )
+    handler.on_tool_start({"name": "echo"}, "", run_id="tool")
+
+    assert list(handler._started) == [4, "tool"]
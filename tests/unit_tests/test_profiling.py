@@ -0,0 +1,76 @@
+import threading
+import time
+import tracemalloc
+from typing import List
+
+import pytest
+
+from react_agent import profiling
+
+
+@pytest.mark.asyncio
+async def test_nested_blocks_write_one_profile(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_INTERVAL", "0.001")
+
+    def busy() -> List[str]:
+        deadline = time.perf_counter() + 0.05
+        kept = []
+        while time.perf_counter() < deadline:
+            kept.append("x" * 1000)
+        return kept
+
+    async with profiling.profile_run("t/1"):
+        async with profiling.profile_run("t/1"):
+            kept = busy()
+        assert not list(tmp_path.iterdir())
+
+    folded = (tmp_path / "t_1.folded").read_text().splitlines()
+    assert any("busy" in line for line in folded)
+    assert all(line.rpartition(" ")[2].isdigit() for line in folded)
+    report = (tmp_path / "t_1.alloc.txt").read_text()
+    assert report.startswith("# run of thread t/1")
+    assert "test_profiling.py" in report
+    assert not tracemalloc.is_tracing()
+    assert kept
+
+
+@pytest.mark.asyncio
+async def test_snapshots_are_taken_off_the_event_loop(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    take_snapshot = tracemalloc.take_snapshot
+    threads = []
+
+    def recording_snapshot() -> tracemalloc.Snapshot:
+        threads.append(threading.current_thread())
+        return take_snapshot()
+
+    monkeypatch.setattr(tracemalloc, "take_snapshot", recording_snapshot)
+    async with profiling.profile_run("off-loop"):
+        pass
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert (tmp_path / "off-loop.alloc.txt").exists()
+
+
+@pytest.mark.asyncio
+async def test_graph_profiles_only_flagged_runs(
+    monkeypatch, tmp_path, single_mode_graph
+) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    profiling.install_profiler()
+
+    for thread_id, profile in (("plain", False), ("slow", True)):
+        await single_mode_graph.ainvoke("say hi", thread_id, profile=profile)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "slow.alloc.txt",
+        "slow.folded",
+    ]
+    # 노드 세 번(call_model, tools, call_model)을 거쳐도 실행마다 한 번만 기록됩니다.
+    assert (tmp_path / "slow.alloc.txt").read_text().count("# run of thread slow") == 1
+    assert not profiling._profiler.sessions
+
+    monkeypatch.setenv("PROFILE_ENABLED", "false")
+    assert not profiling.requested({"configurable": {"profile": True}})
@@ -0,0 +1,86 @@
+import asyncio
+import importlib
+import json
+import os
+
+import pytest
+
+from react_agent import api_keys
+from react_agent.secret_providers import (
+    EnvSecretsProvider,
+    JsonFileSecretsProvider,
+    SecretsProvider,
+    WatchedFileSecretsProvider,
+)
+
+graph_module = importlib.import_module("react_agent.graph")
+
+OLD_KEY = "sk-ant-api03-" + "a" * 40
+NEW_KEY = "sk-ant-api03-" + "c" * 40
+
+
+@pytest.fixture(autouse=True)
+def fresh_credentials(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api_keys, "_credentials", None)
+    monkeypatch.setattr(api_keys, "_secrets_provider", None)
+    for name in api_keys.CREDENTIAL_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+
+
+def _write_keys(path, key: str, mtime: float) -> None:
+    path.write_text(json.dumps({"ANTHROPIC_API_KEY": key}))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.asyncio
+async def test_env_provider_reads_named_variables(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", OLD_KEY)
+    provider = EnvSecretsProvider(["ANTHROPIC_API_KEY", "OPENAI_API_KEY"])
+    await provider.start()
+    assert await provider.get("ANTHROPIC_API_KEY") == OLD_KEY
+    assert await provider.get("OPENAI_API_KEY") is None
+    with pytest.raises(TypeError):
+        SecretsProvider()  # type: ignore[abstract]
+
+
+@pytest.mark.asyncio
+async def test_json_file_provider_swaps_snapshot(tmp_path) -> None:
+    path = tmp_path / "keys.json"
+    _write_keys(path, OLD_KEY, 1_000)
+    provider = JsonFileSecretsProvider(str(path))
+    await provider.start()
+    old = provider.snapshot
+
+    assert not await provider.refresh()
+    _write_keys(path, NEW_KEY, 2_000)
+    assert await provider.refresh()
+    assert provider.snapshot["ANTHROPIC_API_KEY"] == NEW_KEY
+    assert old["ANTHROPIC_API_KEY"] == OLD_KEY
+
+
+@pytest.mark.asyncio
+async def test_rotation_reaches_new_model_clients(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(graph_module, "_chat_models", {})
+    path = tmp_path / "keys.json"
+    _write_keys(path, OLD_KEY, 1_000)
+    provider = WatchedFileSecretsProvider(str(path), poll_interval=0.01)
+    await provider.start()
+    try:
+        api_keys.set_secrets_provider(provider)
+        in_flight = graph_module.load_chat_model()
+        assert graph_module.load_chat_model() is in_flight
+
+        _write_keys(path, NEW_KEY, 2_000)
+        for _ in range(100):
+            if api_keys.get_api_key("ANTHROPIC_API_KEY") == NEW_KEY:
+                break
+            await asyncio.sleep(0.01)
+        assert api_keys.get_api_key("ANTHROPIC_API_KEY") == NEW_KEY
+
+        rotated = graph_module.load_chat_model()
+        assert rotated is not in_flight
+        assert rotated.anthropic_api_key.get_secret_value() == NEW_KEY
+        assert in_flight.anthropic_api_key.get_secret_value() == OLD_KEY
+    finally:
+        await provider.aclose()
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import signal
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+
+from react_agent import serve, warmup
+from react_agent.checkpoint import ArchivingMemorySaver
+from react_agent.lifecycle import lifecycle
+from tests.unit_tests.conftest import graph_module
+
+
+def make_worker() -> Starlette:
+    """A separate app instance, like the one each worker process builds."""
+    return Starlette(routes=serve.app.routes, lifespan=serve.lifespan)
+
+
+@pytest.mark.asyncio
+async def test_thread_resumes_on_another_worker(
+    monkeypatch, tmp_path, single_mode_graph
+) -> None:
+    monkeypatch.setenv("CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    monkeypatch.setattr(warmup, "start_warmup", lambda config=None: None)
+    # Stopping the workers drains the shared lifecycle; restore it for other tests.
+    monkeypatch.setattr(lifecycle, "accepting", True)
+
+    body = {
+        "input": {"messages": [{"role": "user", "content": "say hi"}]},
+        "config": {"configurable": {"graph_mode": "single"}},
+    }
+    first, second = make_worker(), make_worker()
+    async with (
+        first.router.lifespan_context(first),
+        second.router.lifespan_context(second),
+    ):
+        async with (
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=first), base_url="http://w1"
+            ) as w1,
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=second), base_url="http://w2"
+            ) as w2,
+        ):
+            response = await w1.post("/threads/t-1/runs/wait", json=body)
+            assert response.status_code == 200
+            assert response.json()["messages"][-1]["data"]["content"] == "done: HI"
+
+            state = (await w2.get("/threads/t-1/state")).json()
+            assert [m["type"] for m in state["messages"]] == [
+                "human",
+                "ai",
+                "tool",
+                "ai",
+            ]
+            assert (await w2.get("/threads/missing/state")).status_code == 404
+            assert (await w2.post("/threads/t-1/fork")).status_code == 501
+
+    assert lifecycle.draining
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_archives_user_threads(
+    monkeypatch, tmp_path, single_mode_graph
+) -> None:
+    saver = ArchivingMemorySaver(archive_dir=str(tmp_path), idle_seconds=60)
+    monkeypatch.setenv("CHECKPOINT_BACKEND", "memory")
+    monkeypatch.setattr(graph_module, "_memory", saver)
+    monkeypatch.setattr(warmup, "start_warmup", lambda config=None: None)
+    monkeypatch.setattr(lifecycle, "accepting", True)
+
+    body = {
+        "input": {"messages": [{"role": "user", "content": "say hi"}]},
+        "config": {"configurable": {"graph_mode": "nested"}},
+    }
+    worker = make_worker()
+    async with worker.router.lifespan_context(worker):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=worker), base_url="http://w"
+        ) as client:
+            assert (
+                await client.post("/threads/m-1/runs/wait", json=body)
+            ).status_code == 200
+            assert saver.archive_idle(now=float("inf")) == 1
+            assert saver.archived_threads == 1
+
+            state = (await client.get("/threads/m-1/state")).json()
+            assert state["messages"][-1]["data"]["content"] == "done: HI"
+            assert saver.archived_threads == 0
+
+            forked = await client.post("/threads/m-1/fork", json={"thread_id": "m-2"})
+            assert forked.json()["thread_id"] == "m-2"
+            state = (await client.get("/threads/m-2/state")).json()
+            assert state["messages"][-1]["data"]["content"] == "done: HI"
+            assert (
+                await client.post("/threads/m-1/fork", json={"thread_id": "m-2"})
+            ).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_sigterm_starts_the_drain_before_uvicorn_shuts_down(monkeypatch) -> None:
+    monkeypatch.setenv("DRAIN_TIMEOUT", "0.1")
+    monkeypatch.setattr(lifecycle, "accepting", True)
+    monkeypatch.setattr(lifecycle, "_drain_task", None)
+    seen_by_uvicorn = []
+    uvicorn_handler = signal.signal(
+        signal.SIGTERM, lambda signum, frame: seen_by_uvicorn.append(lifecycle.draining)
+    )
+    restore = serve.install_drain_hook(asyncio.get_running_loop())
+
+    async def long_run() -> None:
+        with lifecycle.track():
+            await asyncio.sleep(10)
+
+    run = asyncio.create_task(long_run())
+    try:
+        await asyncio.sleep(0)
+        os.kill(os.getpid(), signal.SIGTERM)
+        # uvicorn's own handler runs after the server stopped admitting runs.
+        assert seen_by_uvicorn == [True]
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=serve.app), base_url="http://w"
+        ) as client:
+            assert (await client.get("/ready")).status_code == 503
+            assert (
+                await client.post("/threads/t/runs/wait", json={})
+            ).status_code == 503
+
+        # The drain deadline runs from the signal, without waiting for the lifespan shutdown.
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(run, 1)
+        assert await lifecycle._drain_task == 1
+    finally:
+        restore()
+        signal.signal(signal.SIGTERM, uvicorn_handler)
+        run.cancel()
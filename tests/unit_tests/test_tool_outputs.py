@@ -0,0 +1,54 @@
+import pytest
+
+from react_agent import tool_outputs
+from react_agent.tool_outputs import OutputStore, offload, read_tool_output
+
+
+def test_store_spills_oldest_outputs_to_disk(tmp_path) -> None:
+    store = OutputStore(memory_chars=10, directory=str(tmp_path))
+    first = store.put("a" * 8)
+    second = store.put("b" * 8)
+
+    assert (tmp_path / f"{first}.txt").exists()
+    assert not (tmp_path / f"{second}.txt").exists()
+    assert store.get(first) == "a" * 8
+    assert store.get(second) == "b" * 8
+    assert store.get("../etc/passwd") is None
+
+
+def test_large_output_is_replaced_by_preview_and_paged(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(tool_outputs, "store", OutputStore(directory=str(tmp_path)))
+    monkeypatch.setenv("TOOL_OUTPUT_MAX_CHARS", "100")
+    monkeypatch.setenv("TOOL_OUTPUT_PREVIEW_CHARS", "40")
+    text = "".join(str(i % 10) for i in range(250))
+
+    assert offload("short", "read_file") == "short"
+    message = offload(text, "read_file")
+    assert message.startswith(text[:40]) and len(message) < 250
+    handle = message.split('handle="')[1].split('"')[0]
+
+    page = read_tool_output.invoke({"handle": handle, "offset": 40, "limit": 100})
+    assert page.startswith(text[40:140]) and "offset=140" in page
+    last = read_tool_output.invoke({"handle": handle, "offset": 200})
+    assert last.startswith(text[200:]) and "End of output" in last
+    assert "Unknown" in read_tool_output.invoke({"handle": "out_0000000000000000"})
+
+
+@pytest.mark.asyncio
+async def test_mcp_tool_outputs_are_offloaded(monkeypatch) -> None:
+    from langchain_core.tools import StructuredTool
+
+    monkeypatch.setenv("TOOL_OUTPUT_MAX_CHARS", "10")
+
+    async def read_file(path: str):
+        """Read a file."""
+        return ["x" * 20, "y" * 20], None
+
+    tool = StructuredTool.from_function(
+        coroutine=read_file, name="read_file", response_format="content_and_artifact"
+    )
+    tool_outputs.offload_large_outputs(tool)
+    result = await tool.ainvoke(
+        {"type": "tool_call", "id": "1", "name": "read_file", "args": {"path": "a"}}
+    )
+    assert "read_tool_output" in result.content
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from react_agent import tools
+from react_agent.tools import TavilyClient
+
+
+def _client(handler) -> TavilyClient:
+    return TavilyClient(
+        "tvly-test", "http://tavily.test", transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_runs_queries_concurrently_and_dedupes(monkeypatch) -> None:
+    active = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        query = json.loads(request.content)["query"]
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(
+            200,
+            json={
+                "results": [
+                    {
+                        "url": "https://shared.example",
+                        "content": query,
+                        "score": len(query),
+                    },
+                    {"url": f"https://{query}.example", "content": query, "score": 0.5},
+                ]
+            },
+        )
+
+    client = _client(handler)
+    monkeypatch.setattr(tools, "get_tavily_client", lambda api_key=None: client)
+    config = {"configurable": {"search_concurrency": 2}}
+
+    results = await tools.search(["a", "bb", "ccc", "BB ", "dddd"], config=config)
+    await client.aclose()
+
+    assert peak == 2
+    urls = [r["url"] for r in results]
+    assert len(urls) == len(set(urls)) == 5
+    # 여러 쿼리가 같은 페이지를 찾으면 점수가 가장 높은 결과를 남깁니다.
+    assert results[0] == {
+        "url": "https://shared.example",
+        "content": "dddd",
+        "score": 4,
+        "query": "dddd",
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_reports_failed_queries_and_raises_only_when_all_fail(
+    monkeypatch,
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["query"] == "bad":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"results": [{"url": "https://ok.example"}]})
+
+    client = _client(handler)
+    monkeypatch.setattr(tools, "get_tavily_client", lambda api_key=None: client)
+    config = {"configurable": {}}
+
+    results = await tools.search(["bad", "good"], config=config)
+    assert results[0] == {"url": "https://ok.example", "query": "good"}
+    assert results[1]["query"] == "bad"
+    assert results[1]["error"].startswith("HTTPStatusError: Server error '500")
+    with pytest.raises(httpx.HTTPStatusError):
+        await tools.search("bad", config=config)
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rotated_client_is_closed_after_its_searches_finish(monkeypatch) -> None:
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={"results": [{"url": "https://ok.example"}]})
+
+    monkeypatch.setattr(tools, "_client", _client(handler))
+    monkeypatch.setenv("TAVILY_API_KEY", "tvly-test")
+    monkeypatch.setenv("TAVILY_API_URL", "http://tavily.test")
+    old = tools.get_tavily_client("tvly-test")
+    idle = TavilyClient("tvly-idle", "http://tavily.test")
+
+    searching = asyncio.create_task(tools.search("q", config={"configurable": {}}))
+    await asyncio.sleep(0.01)
+    # 키가 바뀌어도 진행 중인 검색은 이전 클라이언트로 끝까지 갑니다.
+    monkeypatch.setenv("TAVILY_API_KEY", "tvly-rotated")
+    new = tools.get_tavily_client("tvly-rotated")
+    assert new is not old and not old._http.is_closed
+    release.set()
+
+    assert await searching == [{"url": "https://ok.example"}]
+    assert old._http.is_closed
+    idle.retire()
+    await tools.aclose_tavily_client()
+    assert idle._http.is_closed and new._http.is_closed
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, TypedDict
+from uuid import uuid4
+
+import httpx
+import pytest
+from langchain_core.tracers.base import BaseTracer
+from langgraph.graph import StateGraph
+
+from react_agent import tracing
+from react_agent.tracing import SampledTracer, TraceBuffer, TraceExporter, should_sample
+from react_agent.webapp import app
+
+
+class State(TypedDict):
+    count: int
+
+
+def _graph() -> Any:
+    builder = StateGraph(State)
+    builder.add_node("step", lambda state: {"count": state["count"] + 1})
+    builder.add_edge("__start__", "step")
+    return builder.compile()
+
+
+class FakeClient:
+    def __init__(self, release: threading.Event) -> None:
+        self.release = release
+        self.batches: List[List[Dict[str, Any]]] = []
+
+    def batch_ingest_runs(self, create: List[Dict[str, Any]]) -> None:
+        self.release.wait(5)
+        self.batches.append(create)
+
+
+def test_sampling_is_decided_per_thread() -> None:
+    threads = [f"thread-{i}" for i in range(2000)]
+    kept = [t for t in threads if should_sample(t, 0.25)]
+
+    assert 400 < len(kept) < 600
+    assert all(should_sample(t, 0.25) for t in kept)
+    assert should_sample("any", 1.0) and not should_sample("any", 0.0)
+
+
+def test_only_sampled_threads_are_exported_whole() -> None:
+    release = threading.Event()
+    release.set()
+    client = FakeClient(release)
+    exporter = TraceExporter(10, "test-project", client=client)
+    tracer = SampledTracer(0.5, TraceBuffer(10), exporter)
+    kept = next(f"t{i}" for i in range(100) if should_sample(f"t{i}", 0.5))
+    dropped = next(f"t{i}" for i in range(100) if not should_sample(f"t{i}", 0.5))
+    graph = _graph()
+
+    for thread_id in (kept, dropped, kept):
+        graph.invoke(
+            {"count": 0},
+            {"callbacks": [tracer], "configurable": {"thread_id": thread_id}},
+        )
+    assert exporter.flush(5)
+
+    assert len(client.batches) == 2
+    runs = client.batches[0]
+    assert {run["session_name"] for run in runs} == {"test-project"}
+    assert {run["trace_id"] for run in runs} == {runs[0]["id"]}
+    assert "step" in {run["name"] for run in runs}
+    summaries = tracer.buffer.summaries()
+    assert [s["thread_id"] for s in summaries] == [kept, kept]
+    assert {s["status"] for s in summaries} == {"exported"}
+
+
+def test_unsampled_traces_build_no_runs_and_failed_traces_leave_nothing_behind() -> (
+    None
+):
+    tracer = SampledTracer(0.5, TraceBuffer(10))
+    kept = next(f"t{i}" for i in range(100) if should_sample(f"t{i}", 0.5))
+    dropped = next(f"t{i}" for i in range(100) if not should_sample(f"t{i}", 0.5))
+    built: List[str] = []
+    tracer._start_trace = lambda run: (
+        built.append(run.name) or BaseTracer._start_trace(tracer, run)
+    )
+
+    def fail(state: State) -> State:
+        raise ValueError("boom")
+
+    builder = StateGraph(State)
+    builder.add_node("fail", fail)
+    builder.add_edge("__start__", "fail")
+    failing = builder.compile()
+
+    _graph().invoke(
+        {"count": 0}, {"callbacks": [tracer], "configurable": {"thread_id": dropped}}
+    )
+    assert built == []
+    for thread_id in (dropped, kept):
+        with pytest.raises(ValueError):
+            failing.invoke(
+                {"count": 0},
+                {"callbacks": [tracer], "configurable": {"thread_id": thread_id}},
+            )
+
+    assert "fail" in built
+    assert not tracer._skipped and not tracer.run_map
+    assert [s["thread_id"] for s in tracer.buffer.summaries()] == [kept]
+
+
+def test_cancelled_unsampled_runs_are_forgotten_with_their_root() -> None:
+    tracer = SampledTracer(0.0, TraceBuffer(10))
+    root, node, model = uuid4(), uuid4(), uuid4()
+    tracer.on_chain_start({}, {}, run_id=root, metadata={"thread_id": "cancelled"})
+    tracer.on_chain_start({}, {}, run_id=node, parent_run_id=root)
+    tracer.on_chat_model_start({}, [[]], run_id=model, parent_run_id=node)
+    tracer.on_chain_end({}, run_id=node)
+
+    # 취소된 모델 호출은 끝나지 않지만, LangGraph는 루트 실행을 오류로 끝냅니다.
+    tracer.on_chain_error(asyncio.CancelledError(), run_id=root)
+
+    assert not tracer._skipped and not tracer._skipped_trees
+
+
+def test_full_queue_drops_instead_of_blocking() -> None:
+    release = threading.Event()
+    exporter = TraceExporter(1, "test-project", client=FakeClient(release))
+    tracer = SampledTracer(1.0, TraceBuffer(10), exporter)
+    graph = _graph()
+
+    # 첫 트레이스는 전송 중에 멈춰 있고, 두 번째가 큐를 채우고, 세 번째는 버려집니다.
+    for i in range(3):
+        graph.invoke(
+            {"count": 0},
+            {"callbacks": [tracer], "configurable": {"thread_id": f"q{i}"}},
+        )
+        if i == 0:
+            while exporter.qsize():
+                pass
+    statuses = [s["status"] for s in tracer.buffer.summaries()]
+    release.set()
+    assert exporter.flush(5)
+
+    assert statuses[0] == "dropped"
+    assert [s["status"] for s in tracer.buffer.summaries()] == [
+        "dropped",
+        "exported",
+        "exported",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_local_buffer_is_served_on_traces_endpoint(monkeypatch) -> None:
+    tracer = SampledTracer(1.0, TraceBuffer(2))
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    graph = _graph()
+    for i in range(3):
+        graph.invoke(
+            {"count": i},
+            {"callbacks": [tracer], "configurable": {"thread_id": f"b{i}"}},
+        )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        listing = (await client.get("/traces")).json()
+        detail = await client.get(f"/traces/{listing['traces'][0]['trace_id']}")
+        missing = await client.get("/traces/unknown")
+
+    assert [t["thread_id"] for t in listing["traces"]] == ["b2", "b1"]
+    assert {t["status"] for t in listing["traces"]} == {"local"}
+    assert detail.json()["trace"]["outputs"] == {"count": 3}
+    assert missing.status_code == 404
@@ -0,0 +1,92 @@
+import importlib
+import os
+import signal
+from typing import Any, List
+
+import httpx
+import pytest
+from langchain_core.tools import tool
+
+from react_agent import api_keys, mcp_pool, warmup
+from react_agent.warmup import DryRunModel, WarmupState
+from react_agent.webapp import app
+
+graph_module = importlib.import_module("react_agent.graph")
+
+
+@tool
+def echo(text: str) -> str:
+    """Echo the given text."""
+    return text
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(warmup, "state", WarmupState())
+    monkeypatch.setattr(warmup, "_task", None)
+
+
+@pytest.mark.asyncio
+async def test_warmup_prebuilds_everything_and_becomes_ready(monkeypatch) -> None:
+    tools = [echo]
+    model = DryRunModel()
+
+    async def fake_get_tools(mcp_servers: Any) -> List[Any]:
+        return tools
+
+    monkeypatch.setattr(mcp_pool, "get_tools", fake_get_tools)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda api_keys=None: model)
+    monkeypatch.setattr(graph_module, "_agents", {})
+
+    state = await warmup.warmup(dry_run=True)
+
+    assert state.ready
+    assert list(state.stages) == [
+        "credentials",
+        "configuration",
+        "mcp_tools",
+        "chat_model",
+        "agent",
+        "fake_run",
+    ]
+    assert graph_module.get_agent(model, tools) is graph_module.get_agent(model, tools)
+    assert len(graph_module._agents) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_not_ready(monkeypatch) -> None:
+    async def broken_get_tools(mcp_servers: Any) -> List[Any]:
+        raise RuntimeError("npx not found")
+
+    monkeypatch.setattr(mcp_pool, "get_tools", broken_get_tools)
+
+    state = await warmup.warmup()
+
+    assert state.status == "failed"
+    assert "npx not found" in state.error
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_reflects_warmup_state(monkeypatch) -> None:
+    monkeypatch.setattr(warmup, "start_warmup", lambda config=None: None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        warmup.state.status = "warming"
+        assert (await client.get("/ready")).status_code == 503
+
+        warmup.state.status = "ready"
+        response = await client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+
+def test_startup_makes_sighup_reload_the_credentials(monkeypatch) -> None:
+    monkeypatch.setattr(warmup, "_started", False)
+    monkeypatch.setattr(api_keys._local_keys, "stale", False)
+    previous = signal.getsignal(signal.SIGHUP)
+    try:
+        warmup.startup()
+        os.kill(os.getpid(), signal.SIGHUP)
+        assert api_keys._local_keys.stale
+    finally:
+        signal.signal(signal.SIGHUP, previous)